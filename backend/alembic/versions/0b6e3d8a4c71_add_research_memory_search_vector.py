@@ -0,0 +1,70 @@
+"""Add full-text search vector to research_memory
+
+Revision ID: 0b6e3d8a4c71
+Revises: f4c1a9e27b36
+Create Date: 2026-10-17 16:34:52.208817
+
+"""
+from typing import Sequence, Union
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6e3d8a4c71'
+down_revision: Union[str, Sequence[str], None] = 'f4c1a9e27b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english'::regconfig, coalesce(:query, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(:response, '')), 'B')"
+)
+
+
+def _decompress(data: bytes, codec: str) -> str:
+    if codec == 'zstd':
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+    return zlib.decompress(data).decode('utf-8')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('research_memory', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # Backfill: inline responses in SQL, blob-backed responses row by row
+    op.execute(
+        "UPDATE research_memory SET search_vector = "
+        "setweight(to_tsvector('english'::regconfig, coalesce(query, '')), 'A') || "
+        "setweight(to_tsvector('english'::regconfig, coalesce(response, '')), 'B') "
+        "WHERE response IS NOT NULL"
+    )
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT m.id, m.query, b.codec, b.data FROM research_memory m "
+        "JOIN content_blobs b ON b.hash = m.response_hash WHERE m.response IS NULL"
+    ))
+    for row_id, query, codec, data in rows.fetchall():
+        conn.execute(
+            sa.text(f"UPDATE research_memory SET search_vector = {SEARCH_DOCUMENT} WHERE id = :id"),
+            {"query": query, "response": _decompress(data, codec), "id": row_id},
+        )
+
+    op.create_index(
+        'ix_research_memory_search_vector',
+        'research_memory',
+        ['search_vector'],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_research_memory_search_vector', table_name='research_memory', postgresql_using='gin')
+    op.drop_column('research_memory', 'search_vector')
@@ -0,0 +1,39 @@
+"""Add research_cache table
+
+Revision ID: a7c2e91d4b10
+Revises: 4ef3bc134723
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2e91d4b10'
+down_revision: Union[str, Sequence[str], None] = '4ef3bc134723'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'research_cache',
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('query', sa.Text(), nullable=False),
+        sa.Column('response', sa.Text(), nullable=False),
+        sa.Column('hit_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('cache_key'),
+    )
+    op.create_index(op.f('ix_research_cache_expires_at'), 'research_cache', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_research_cache_expires_at'), table_name='research_cache')
+    op.drop_table('research_cache')
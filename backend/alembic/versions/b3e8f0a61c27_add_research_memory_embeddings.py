@@ -0,0 +1,56 @@
+"""Add research_memory_embeddings table (pgvector)
+
+Revision ID: b3e8f0a61c27
+Revises: a7c2e91d4b10
+Create Date: 2026-10-17 11:40:03.527316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e8f0a61c27'
+down_revision: Union[str, Sequence[str], None] = 'a7c2e91d4b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match EMBEDDING_DIMENSIONS in app/config.py
+EMBEDDING_DIMENSIONS = 768
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    op.create_table(
+        'research_memory_embeddings',
+        sa.Column('research_memory_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('embedding', Vector(EMBEDDING_DIMENSIONS), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['research_memory_id'], ['research_memory.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('research_memory_id'),
+    )
+    op.create_index(
+        op.f('ix_research_memory_embeddings_user_id'),
+        'research_memory_embeddings',
+        ['user_id'],
+        unique=False,
+    )
+
+    # Approximate nearest-neighbour index for cosine distance
+    op.execute(
+        "CREATE INDEX ix_research_memory_embeddings_embedding_hnsw "
+        "ON research_memory_embeddings USING hnsw (embedding vector_cosine_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_research_memory_embeddings_embedding_hnsw")
+    op.drop_index(op.f('ix_research_memory_embeddings_user_id'), table_name='research_memory_embeddings')
+    op.drop_table('research_memory_embeddings')
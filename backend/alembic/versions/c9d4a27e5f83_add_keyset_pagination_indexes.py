@@ -0,0 +1,41 @@
+"""Add (user_id, created_at DESC, id DESC) indexes for keyset pagination
+
+Revision ID: c9d4a27e5f83
+Revises: b3e8f0a61c27
+Create Date: 2026-10-17 13:05:51.904712
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9d4a27e5f83'
+down_revision: Union[str, Sequence[str], None] = 'b3e8f0a61c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Serves history pages, memory context lookups and their keyset cursors
+    op.create_index(
+        'ix_research_memory_user_created_id',
+        'research_memory',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    op.create_index(
+        'ix_linkedin_posts_user_created_id',
+        'linkedin_posts',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_linkedin_posts_user_created_id', table_name='linkedin_posts')
+    op.drop_index('ix_research_memory_user_created_id', table_name='research_memory')
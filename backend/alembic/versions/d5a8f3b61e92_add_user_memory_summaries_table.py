@@ -0,0 +1,36 @@
+"""Add user_memory_summaries table
+
+Revision ID: d5a8f3b61e92
+Revises: c9d4a27e5f83
+Create Date: 2026-10-17 14:21:07.530618
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8f3b61e92'
+down_revision: Union[str, Sequence[str], None] = 'c9d4a27e5f83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_memory_summaries',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('summarized_through_id', sa.Integer(), nullable=False),
+        sa.Column('memory_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_memory_summaries')
@@ -0,0 +1,33 @@
+"""Add (user_id, session_id, created_at) index to conversation_history
+
+Revision ID: e2b7c4d90a15
+Revises: d5a8f3b61e92
+Create Date: 2026-10-17 15:02:44.187320
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c4d90a15'
+down_revision: Union[str, Sequence[str], None] = 'd5a8f3b61e92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_conversation_history_user_session_created',
+        'conversation_history',
+        ['user_id', 'session_id', 'created_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_conversation_history_user_session_created', table_name='conversation_history')
@@ -0,0 +1,91 @@
+"""Add content_blobs and move research/LinkedIn bodies to it
+
+Revision ID: f4c1a9e27b36
+Revises: e2b7c4d90a15
+Create Date: 2026-10-17 15:48:19.664203
+
+"""
+from typing import Sequence, Union
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c1a9e27b36'
+down_revision: Union[str, Sequence[str], None] = 'e2b7c4d90a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'content_blobs',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('codec', sa.String(length=16), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('hash'),
+    )
+
+    # Existing rows keep their inline text (scripts/backfill_content_blobs.py moves
+    # them); new rows reference a blob
+    op.alter_column('research_memory', 'response', existing_type=sa.Text(), nullable=True)
+    op.add_column('research_memory', sa.Column('response_hash', sa.String(length=64), nullable=True))
+    op.add_column('research_memory', sa.Column('response_preview', sa.Text(), nullable=True))
+    op.add_column('research_memory', sa.Column('response_length', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_research_memory_response_hash_content_blobs',
+        'research_memory', 'content_blobs',
+        ['response_hash'], ['hash'],
+    )
+
+    op.alter_column('linkedin_posts', 'original_content', existing_type=sa.Text(), nullable=True)
+    op.add_column('linkedin_posts', sa.Column('original_content_hash', sa.String(length=64), nullable=True))
+    op.create_foreign_key(
+        'fk_linkedin_posts_original_content_hash_content_blobs',
+        'linkedin_posts', 'content_blobs',
+        ['original_content_hash'], ['hash'],
+    )
+
+
+def _decompress(data: bytes, codec: str) -> str:
+    if codec == 'zstd':
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+    return zlib.decompress(data).decode('utf-8')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Copy blob-backed bodies back inline before dropping the references
+    conn = op.get_bind()
+    for table, text_column, hash_column in (
+        ('research_memory', 'response', 'response_hash'),
+        ('linkedin_posts', 'original_content', 'original_content_hash'),
+    ):
+        rows = conn.execute(sa.text(
+            f"SELECT t.id, b.codec, b.data FROM {table} t "
+            f"JOIN content_blobs b ON b.hash = t.{hash_column} WHERE t.{text_column} IS NULL"
+        ))
+        for row_id, codec, data in rows.fetchall():
+            conn.execute(
+                sa.text(f"UPDATE {table} SET {text_column} = :text WHERE id = :id"),
+                {"text": _decompress(data, codec), "id": row_id},
+            )
+
+    op.drop_constraint('fk_linkedin_posts_original_content_hash_content_blobs', 'linkedin_posts', type_='foreignkey')
+    op.drop_column('linkedin_posts', 'original_content_hash')
+    op.alter_column('linkedin_posts', 'original_content', existing_type=sa.Text(), nullable=False)
+
+    op.drop_constraint('fk_research_memory_response_hash_content_blobs', 'research_memory', type_='foreignkey')
+    op.drop_column('research_memory', 'response_length')
+    op.drop_column('research_memory', 'response_preview')
+    op.drop_column('research_memory', 'response_hash')
+    op.alter_column('research_memory', 'response', existing_type=sa.Text(), nullable=False)
+
+    op.drop_table('content_blobs')
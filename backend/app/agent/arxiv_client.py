@@ -0,0 +1,149 @@
+"""
+Async arXiv retrieval client
+Queries the arXiv Atom API over a shared pooled HTTP client and caches results per query
+"""
+
+from typing import Optional
+import asyncio
+import xml.etree.ElementTree as ET
+
+import httpx
+
+from app.config import get_settings
+from app.services.cache import TTLCache
+
+settings = get_settings()
+
+ATOM_NS = {"atom": "http://www.w3.org/2005/Atom"}
+
+_http_client: Optional[httpx.AsyncClient] = None
+_results_cache = TTLCache(
+    maxsize=settings.ARXIV_CACHE_MAX_ENTRIES,
+    ttl=settings.ARXIV_CACHE_TTL_SECONDS,
+)
+_in_flight: dict[str, asyncio.Task] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the process-wide pooled HTTP client for arXiv"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=settings.ARXIV_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the pooled HTTP client (called on application shutdown)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def parse_atom_feed(feed_xml: str, max_results: int) -> list[dict]:
+    """
+    Parse an arXiv Atom feed into paper dicts
+
+    Args:
+        feed_xml: Raw Atom XML from the arXiv API
+        max_results: Maximum number of entries to return
+
+    Returns:
+        List of dicts with keys: published, title, authors, summary, url
+    """
+    root = ET.fromstring(feed_xml)
+    papers = []
+    for entry in root.findall("atom:entry", ATOM_NS)[:max_results]:
+        title = entry.findtext("atom:title", default="", namespaces=ATOM_NS)
+        summary = entry.findtext("atom:summary", default="", namespaces=ATOM_NS)
+        published = entry.findtext("atom:published", default="", namespaces=ATOM_NS)
+        authors = [
+            author.findtext("atom:name", default="", namespaces=ATOM_NS)
+            for author in entry.findall("atom:author", ATOM_NS)
+        ]
+
+        # arXiv error responses come back as a single entry titled "Error"
+        if title.strip() == "Error":
+            continue
+
+        papers.append(
+            {
+                "published": published[:10],
+                "title": " ".join(title.split()),
+                "authors": ", ".join(name.strip() for name in authors if name),
+                "summary": " ".join(summary.split()),
+                "url": entry.findtext("atom:id", default="", namespaces=ATOM_NS),
+            }
+        )
+    return papers
+
+
+def format_papers(papers: list[dict], doc_content_chars_max: int) -> str:
+    """Format papers as text for the synthesis prompt"""
+    docs = [
+        f"Published: {paper['published']}\n"
+        f"Title: {paper['title']}\n"
+        f"Authors: {paper['authors']}\n"
+        f"Summary: {paper['summary']}"
+        for paper in papers
+    ]
+    return "\n\n".join(docs)[:doc_content_chars_max]
+
+
+async def _fetch_papers(query: str, cache_key: str) -> str:
+    """Fetch and format results for a query from the arXiv API, then cache them"""
+    client = get_http_client()
+    response = await client.get(
+        settings.ARXIV_API_URL,
+        params={
+            "search_query": query[:300],
+            "start": 0,
+            "max_results": settings.ARXIV_MAX_RESULTS,
+        },
+    )
+    response.raise_for_status()
+
+    papers = parse_atom_feed(response.text, settings.ARXIV_MAX_RESULTS)
+    results = format_papers(papers, settings.ARXIV_DOC_CHARS_MAX)
+    _results_cache.set(cache_key, results)
+    return results
+
+
+def _finish_fetch(cache_key: str, task: asyncio.Task):
+    """Drop a finished fetch from the in-flight map"""
+    _in_flight.pop(cache_key, None)
+    # Retrieve the exception so a fetch whose waiters all gave up isn't logged as unhandled
+    if not task.cancelled():
+        task.exception()
+
+
+async def search_papers(query: str) -> str:
+    """
+    Search arXiv for a query, sharing cached and in-flight results across users
+
+    The upstream fetch runs as its own task, so a caller that gives up
+    (e.g. on a deadline) doesn't cancel it for other waiters or the cache.
+
+    Args:
+        query: Search query
+
+    Returns:
+        Formatted paper summaries, or an empty string when nothing matched
+    """
+    cache_key = " ".join(query.lower().split())
+
+    cached = _results_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Concurrent misses for the same query share one upstream request
+    task = _in_flight.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(_fetch_papers(query, cache_key))
+        _in_flight[cache_key] = task
+        task.add_done_callback(lambda done: _finish_fetch(cache_key, done))
+
+    return await asyncio.shield(task)
@@ -0,0 +1,140 @@
+"""
+Token-budgeted context packing for the synthesis prompt
+Counts tokens locally, drops sentences repeated across sources and trims each
+source to its budget while keeping the paragraphs most relevant to the query
+"""
+
+import re
+
+from app.config import get_settings
+from app.services import metrics
+
+settings = get_settings()
+
+# Approximates subword tokenization: words split into <=4-char pieces, plus punctuation
+TOKEN_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "is", "are", "was",
+    "were", "be", "with", "as", "by", "at", "from", "that", "this", "it", "what", "how",
+    "why", "who", "when", "which", "do", "does", "about", "latest", "new",
+}
+
+
+def count_tokens(text: str) -> int:
+    """Approximate Gemini token count without a network call"""
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def _content_words(text: str) -> set[str]:
+    return {word for word in WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS}
+
+
+def _sentence_key(sentence: str) -> str:
+    return " ".join(WORD_PATTERN.findall(sentence.lower()))
+
+
+def relevance_score(query: str, text: str) -> float:
+    """Fraction of the query's content words that appear in `text` (0.0 - 1.0)"""
+    query_words = _content_words(query)
+    if not query_words:
+        return 0.0
+    return len(query_words & _content_words(text)) / len(query_words)
+
+
+def dedupe_sentences(text: str, seen: set[str]) -> str:
+    """
+    Drop sentences whose normalized form was already seen (updates `seen` in place)
+
+    Paragraph breaks are kept so trimming can still work per paragraph.
+    """
+    paragraphs = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        kept = []
+        for sentence in SENTENCE_SPLIT.split(paragraph):
+            key = _sentence_key(sentence)
+            # Very short fragments (headings, bullets) are never treated as duplicates
+            if len(key) > 30 and key in seen:
+                continue
+            seen.add(key)
+            kept.append(sentence)
+        if kept:
+            paragraphs.append(" ".join(kept))
+    return "\n\n".join(paragraphs)
+
+
+def _cut_to_tokens(text: str, token_budget: int) -> str:
+    """Cut text right after its `token_budget`-th token"""
+    for count, match in enumerate(TOKEN_PATTERN.finditer(text), start=1):
+        if count == token_budget:
+            return text[: match.end()]
+    return text
+
+
+def trim_to_budget(text: str, query: str, token_budget: int) -> str:
+    """
+    Keep the highest-value paragraphs that fit in `token_budget`, in original order
+
+    Paragraphs are scored by overlap with the query's content words; the first
+    paragraph (usually the direct answer) and paragraphs citing URLs get a bonus.
+    """
+    if count_tokens(text) <= token_budget:
+        return text
+
+    query_words = _content_words(query)
+    paragraphs = [p for p in re.split(r"\n\s*\n", text) if p.strip()]
+    scored = []
+    for index, paragraph in enumerate(paragraphs):
+        words = _content_words(paragraph)
+        overlap = len(words & query_words) / (len(query_words) or 1)
+        density = len(words & query_words) / (len(words) or 1)
+        bonus = (1.0 if index == 0 else 0.0) + (0.5 if "http" in paragraph else 0.0)
+        scored.append((overlap + density + bonus, index, paragraph))
+
+    selected = []
+    used = 0
+    for _, index, paragraph in sorted(scored, key=lambda item: (-item[0], item[1])):
+        tokens = count_tokens(paragraph)
+        if used + tokens > token_budget:
+            continue
+        selected.append((index, paragraph))
+        used += tokens
+
+    if not selected:
+        # Every paragraph is over budget on its own; cut the best one down
+        best = max(scored, key=lambda item: (item[0], -item[1]))[2]
+        return _cut_to_tokens(best, token_budget)
+
+    return "\n\n".join(paragraph for _, paragraph in sorted(selected))
+
+
+def pack_context(query: str, web_text: str, arxiv_text: str) -> tuple[str, str]:
+    """
+    Pack both sources for the synthesis prompt
+
+    Args:
+        query: User's research query
+        web_text: Grounded Google Search answer
+        arxiv_text: Formatted arXiv results
+
+    Returns:
+        Tuple of (packed web text, packed arXiv text)
+    """
+    tokens_before = count_tokens(web_text) + count_tokens(arxiv_text)
+
+    # The web answer is the primary source, so duplicates are dropped from arXiv
+    seen: set[str] = set()
+    web_packed = dedupe_sentences(web_text, seen)
+    arxiv_packed = dedupe_sentences(arxiv_text, seen)
+
+    web_packed = trim_to_budget(web_packed, query, settings.CONTEXT_WEB_TOKEN_BUDGET)
+    arxiv_packed = trim_to_budget(arxiv_packed, query, settings.CONTEXT_ARXIV_TOKEN_BUDGET)
+
+    tokens_after = count_tokens(web_packed) + count_tokens(arxiv_packed)
+    print(f"📦 Context packed: {tokens_before} → {tokens_after} tokens")
+    metrics.observe("synthesis_context_tokens_before", tokens_before)
+    metrics.observe("synthesis_context_tokens_after", tokens_after)
+
+    return web_packed, arxiv_packed
@@ -0,0 +1,264 @@
+"""
+Shared Gemini client, admission control and async streaming helper
+Keeps one genai.Client per process so every node reuses the same connection pool,
+and routes every call through one scheduler (in-flight cap, RPM/TPM buckets,
+priority lanes, jittered backoff on 429/503)
+"""
+
+from typing import Awaitable, Callable, Optional
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from functools import lru_cache
+import asyncio
+import heapq
+import itertools
+import random
+import time
+
+from google import genai
+from google.genai import errors, types
+
+from app.config import get_settings
+from app.agent.context_packer import count_tokens
+from app.services import metrics
+
+settings = get_settings()
+
+# Provider responses worth retrying after a backoff
+RETRYABLE_STATUS_CODES = {429, 503}
+
+
+class Priority(IntEnum):
+    """Scheduler lanes; lower values are admitted first"""
+
+    INTERACTIVE = 0  # Research answers a user is waiting on
+    STANDARD = 1  # LinkedIn post generation
+    BATCH = 2  # Hashtags and background work
+
+
+class GeminiUnavailableError(Exception):
+    """Gemini kept rate-limiting or was unavailable after all retries"""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute` tokens per minute"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.tokens = float(per_minute)
+        self.fill_rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    async def take(self, amount: int = 1):
+        """Wait until `amount` tokens are available and consume them (no-op when disabled)"""
+        if self.capacity <= 0:
+            return
+
+        amount = min(amount, self.capacity)
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+            self.updated = now
+
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+
+            await asyncio.sleep((amount - self.tokens) / self.fill_rate)
+
+
+class GeminiScheduler:
+    """Priority-aware admission control shared by every Gemini call in the process"""
+
+    def __init__(self, max_in_flight: int, rpm_limit: int, tpm_limit: int):
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._requests = TokenBucket(rpm_limit)
+        self._tokens = TokenBucket(tpm_limit)
+
+    def _update_gauges(self):
+        metrics.set_gauge("gemini_queue_depth", len(self._waiters))
+        metrics.set_gauge("gemini_in_flight", self.in_flight)
+
+    async def _acquire(self, priority: Priority):
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self._update_gauges()
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        self._update_gauges()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # If the slot was already handed to us, pass it on
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        # Hand the slot straight to the highest-priority live waiter
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+
+        self.in_flight -= 1
+        self._update_gauges()
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority, estimated_tokens: int):
+        """Hold one in-flight slot, after passing the RPM/TPM buckets"""
+        started = time.monotonic()
+        await self._acquire(priority)
+        try:
+            await self._requests.take(1)
+            await self._tokens.take(estimated_tokens)
+            metrics.observe(
+                f"gemini_queue_wait_seconds.{priority.name.lower()}", time.monotonic() - started
+            )
+            yield
+        finally:
+            self._release()
+
+
+@lru_cache()
+def get_gemini_client() -> genai.Client:
+    """Get cached process-wide Gemini client"""
+    return genai.Client(api_key=settings.GEMINI_API_KEY)
+
+
+@lru_cache()
+def get_scheduler() -> GeminiScheduler:
+    """Get the process-wide Gemini call scheduler"""
+    return GeminiScheduler(
+        max_in_flight=settings.GEMINI_MAX_IN_FLIGHT,
+        rpm_limit=settings.GEMINI_RPM_LIMIT,
+        tpm_limit=settings.GEMINI_TPM_LIMIT,
+    )
+
+
+def estimate_tokens(contents: list[types.Content]) -> int:
+    """Local prompt token estimate for the TPM bucket"""
+    return 1 + sum(
+        count_tokens(part.text or "") for content in contents for part in content.parts or []
+    )
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff"""
+    ceiling = min(
+        settings.GEMINI_BACKOFF_MAX_SECONDS,
+        settings.GEMINI_BACKOFF_BASE_SECONDS * (2**attempt),
+    )
+    return random.uniform(0, ceiling)
+
+
+def record_usage(metric_name: str, usage: Optional[types.GenerateContentResponseUsageMetadata], latency: float):
+    """Record call latency and token usage, including thinking tokens"""
+    metrics.observe(f"gemini_latency_seconds.{metric_name}", latency)
+    if usage is None:
+        return
+
+    metrics.observe(f"gemini_thinking_tokens.{metric_name}", usage.thoughts_token_count or 0)
+    metrics.observe(f"gemini_prompt_tokens.{metric_name}", usage.prompt_token_count or 0)
+    metrics.observe(f"gemini_output_tokens.{metric_name}", usage.candidates_token_count or 0)
+
+
+async def stream_generate(
+    contents: list[types.Content],
+    config: Optional[types.GenerateContentConfig] = None,
+    on_chunk: Optional[Callable[[str], Awaitable[None]]] = None,
+    priority: Priority = Priority.INTERACTIVE,
+    metric_name: Optional[str] = None,
+) -> str:
+    """
+    Stream a Gemini response on the SDK's async path without blocking the event loop
+
+    Args:
+        contents: Prompt contents
+        config: Optional generation config
+        on_chunk: Optional coroutine called with each text chunk as it arrives
+        priority: Scheduler lane for this call
+        metric_name: Optional name for recording latency and thinking-token usage
+
+    Returns:
+        Full concatenated response text
+
+    Raises:
+        GeminiUnavailableError: If Gemini still returns 429/503 after all retries
+    """
+    client = get_gemini_client()
+    scheduler = get_scheduler()
+    estimated_tokens = estimate_tokens(contents)
+
+    for attempt in range(settings.GEMINI_MAX_RETRIES + 1):
+        response_text = ""
+        usage = None
+        try:
+            async with scheduler.slot(priority, estimated_tokens):
+                started = time.monotonic()
+                async for chunk in await client.aio.models.generate_content_stream(
+                    model=settings.GEMINI_MODEL, contents=contents, config=config
+                ):
+                    if chunk.usage_metadata:
+                        usage = chunk.usage_metadata
+                    if chunk.text:
+                        response_text += chunk.text
+                        if on_chunk:
+                            await on_chunk(chunk.text)
+
+            if metric_name:
+                record_usage(metric_name, usage, time.monotonic() - started)
+            return response_text
+        except errors.APIError as e:
+            if e.code not in RETRYABLE_STATUS_CODES:
+                raise
+
+            metrics.increment(f"gemini_{e.code}_total")
+
+            # Chunks already reached the caller, so a retry would duplicate output
+            if response_text or attempt == settings.GEMINI_MAX_RETRIES:
+                raise GeminiUnavailableError(
+                    f"Gemini unavailable after {attempt + 1} attempt(s): {e.code} {e.message}"
+                ) from e
+
+            delay = backoff_delay(attempt)
+            print(f"⏳ Gemini returned {e.code}, retrying in {delay:.2f}s")
+            metrics.increment("gemini_retries_total")
+            await asyncio.sleep(delay)
+
+
+async def embed_text(
+    text: str,
+    task_type: str = "RETRIEVAL_DOCUMENT",
+    priority: Priority = Priority.BATCH,
+) -> list[float]:
+    """
+    Embed text with the configured Gemini embedding model
+
+    Args:
+        text: Text to embed
+        task_type: "RETRIEVAL_DOCUMENT" for stored memories, "RETRIEVAL_QUERY" for lookups
+        priority: Scheduler lane for this call
+
+    Returns:
+        Embedding vector with EMBEDDING_DIMENSIONS values
+    """
+    client = get_gemini_client()
+    async with get_scheduler().slot(priority, count_tokens(text) + 1):
+        result = await client.aio.models.embed_content(
+            model=settings.EMBEDDING_MODEL,
+            contents=text,
+            config=types.EmbedContentConfig(
+                task_type=task_type,
+                output_dimensionality=settings.EMBEDDING_DIMENSIONS,
+            ),
+        )
+    return list(result.embeddings[0].values)
+
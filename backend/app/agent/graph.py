@@ -7,14 +7,17 @@ Uses parallel execution:
 
 from typing import TypedDict, Annotated, Optional, Any
 from langgraph.graph import StateGraph, END
-from google import genai
 from google.genai import types
-from langchain_community.utilities import ArxivAPIWrapper
 import operator
 import asyncio
 
 from app.config import get_settings
 from app.agent.tools import get_memory_context
+from app.agent.gemini import stream_generate
+from app.agent.arxiv_client import search_papers
+from app.agent.query_classifier import classify_query, synthesis_level, thinking_budget
+from app.agent.context_packer import pack_context, relevance_score
+from app.services import metrics
 
 settings = get_settings()
 
@@ -25,18 +28,59 @@ class AgentState(TypedDict):
 
     user_id: str
     query: str
-    memory_context: str
+    memory_context: Optional[str]  # None means "load in get_context"
     gemini_response: Annotated[str, operator.add]
     arxiv_response: Annotated[str, operator.add]
     final_response: str
+    timed_out_tools: Annotated[list[str], operator.add]  # Branches that missed their deadline
+    thinking_level: Optional[str]  # "none" | "small" | "large"; None means classify the query
+    arxiv_relevance: float  # Local relevance of arXiv results to the query (0.0 - 1.0)
     event_queue: Optional[asyncio.Queue]  # For streaming events to frontend
+    grounded_stream: Optional["GroundedAnswerStream"]  # Google chunks held until the route is known
 
 
-# Initialize Gemini with Google Search
-def create_gemini_client():
-    """Create Gemini client with Google Search enabled"""
-    client = genai.Client(api_key=settings.GEMINI_API_KEY)
-    return client
+class GroundedAnswerStream:
+    """Holds Google Search chunks until the synthesis route is known
+
+    Chunks are buffered while the route is open. Once the fast path is certain
+    the buffer is flushed and later chunks go straight to the frontend; if
+    synthesis runs instead the buffer is dropped.
+    """
+
+    def __init__(self, event_queue: asyncio.Queue):
+        self.event_queue = event_queue
+        self.chunks: list[str] = []
+        self.released = False
+        self.discarded = False
+
+    async def add(self, text: str):
+        if self.discarded:
+            return
+        if self.released:
+            await self.event_queue.put({"type": "response_delta", "delta": text})
+        else:
+            self.chunks.append(text)
+
+    async def release(self):
+        """Flush buffered chunks and stream the rest live"""
+        if self.released or self.discarded:
+            return
+        self.released = True
+        buffered = "".join(self.chunks)
+        self.chunks = []
+        if buffered:
+            await self.event_queue.put({"type": "response_delta", "delta": buffered})
+
+    def discard(self):
+        """Drop buffered chunks; the synthesized answer is streamed instead"""
+        self.discarded = True
+        self.chunks = []
+
+
+async def emit_tool_timeout(event_queue: Optional[asyncio.Queue], tool: str, deadline: float):
+    """Tell the frontend a tool missed its deadline (synthesis continues without it)"""
+    if event_queue:
+        await event_queue.put({"type": "tool_timeout", "tool": tool, "deadline_seconds": deadline})
 
 
 # Agent nodes
@@ -44,9 +88,17 @@ async def get_context(state: AgentState) -> AgentState:
     """Get user memory context"""
     user_id = state["user_id"]
 
-    # Get memory context
-    memory = await get_memory_context(user_id)
-    state["memory_context"] = memory
+    # Callers may prefetch it (the research cache keys on it)
+    if state.get("memory_context") is None:
+        state["memory_context"] = await get_memory_context(user_id, state["query"])
+
+    # Pick the thinking level locally unless the request overrides it
+    if not state.get("thinking_level"):
+        state["thinking_level"] = classify_query(state["query"])
+    print(f"\n🧠 Thinking level: {state['thinking_level']}")
+
+    event_queue = state.get("event_queue")
+    state["grounded_stream"] = GroundedAnswerStream(event_queue) if event_queue else None
 
     return state
 
@@ -64,9 +116,6 @@ async def search_google(state: AgentState) -> dict:
     if event_queue:
         await event_queue.put({"type": "tool_start", "tool": "google_search"})
 
-    # Create Gemini client
-    client = create_gemini_client()
-
     # Build prompt with memory context
     prompt = f"""You are a helpful research assistant. Answer the user's question using your knowledge and Google Search.
 
@@ -85,19 +134,34 @@ Provide a comprehensive, well-structured answer. Include relevant sources from y
     # Enable Google Search tool
     tools = [types.Tool(googleSearch=types.GoogleSearch())]
 
-    # Configure with thinking mode
+    # Configure with a thinking budget sized to the query
+    thinking_level = state.get("thinking_level") or "small"
     config = types.GenerateContentConfig(
-        thinking_config=types.ThinkingConfig(thinking_budget=-1),
+        thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget(thinking_level)),
         tools=tools,
     )
 
-    # Stream response
-    response_text = ""
-    for chunk in client.models.generate_content_stream(
-        model=settings.GEMINI_MODEL, contents=contents, config=config
-    ):
-        if chunk.text:
-            response_text += chunk.text
+    # Stream response (async, so the parallel arXiv branch keeps running); chunks are
+    # held until the route is known, then become the answer on the fast path
+    grounded_stream = state.get("grounded_stream")
+    deadline = settings.GOOGLE_SEARCH_DEADLINE_SECONDS
+    try:
+        response_text = await asyncio.wait_for(
+            stream_generate(
+                contents,
+                config,
+                on_chunk=grounded_stream.add if grounded_stream else None,
+                metric_name=f"search_google.{thinking_level}",
+            ),
+            timeout=deadline,
+        )
+    except asyncio.TimeoutError:
+        print(f"🌐 Google Search timed out after {deadline}s")
+        await emit_tool_timeout(event_queue, "google_search", deadline)
+        return {
+            "gemini_response": f"Web search timed out after {deadline:g}s; web results unavailable.",
+            "timed_out_tools": ["google_search"],
+        }
 
     print(f"🌐 Google Response Length: {len(response_text)}")
 
@@ -109,6 +173,9 @@ Provide a comprehensive, well-structured answer. Include relevant sources from y
     return {"gemini_response": response_text}
 
 
+ARXIV_RESULTS_PREFIX = "arXiv Search Results:"
+
+
 async def search_arxiv(state: AgentState) -> dict:
     """Search arXiv for academic papers related to the query"""
     query = state["query"]
@@ -121,22 +188,29 @@ async def search_arxiv(state: AgentState) -> dict:
     if event_queue:
         await event_queue.put({"type": "tool_start", "tool": "arxiv_search"})
 
+    deadline = settings.ARXIV_SEARCH_DEADLINE_SECONDS
     try:
-        # Initialize arXiv search wrapper
-        arxiv = ArxivAPIWrapper(top_k_results=3, doc_content_chars_max=2000)
-
-        # Search arXiv
-        arxiv_results = arxiv.run(query)
+        # Search arXiv (async, pooled connections, cached per query)
+        arxiv_results = await asyncio.wait_for(search_papers(query), timeout=deadline)
 
         print(f"📚 ArXiv Results Length: {len(arxiv_results) if arxiv_results else 0}")
         print(f"📚 ArXiv Results Preview: {arxiv_results[:200] if arxiv_results else 'EMPTY'}")
 
         if arxiv_results and arxiv_results.strip():
-            arxiv_response = f"arXiv Search Results:\n\n{arxiv_results}"
+            arxiv_response = f"{ARXIV_RESULTS_PREFIX}\n\n{arxiv_results}"
         else:
             arxiv_response = "No relevant academic papers found on arXiv."
 
         print(f"📚 Final Response: {arxiv_response[:200]}")
+    except asyncio.TimeoutError:
+        print(f"📚 ArXiv Search timed out after {deadline}s")
+        await emit_tool_timeout(event_queue, "arxiv_search", deadline)
+        if state.get("grounded_stream"):
+            await state["grounded_stream"].release()
+        return {
+            "arxiv_response": f"arXiv search timed out after {deadline:g}s; academic results unavailable.",
+            "timed_out_tools": ["arxiv_search"],
+        }
     except Exception as e:
         print(f"📚 ArXiv Error: {str(e)}")
         arxiv_response = f"arXiv search unavailable: {str(e)}"
@@ -145,8 +219,15 @@ async def search_arxiv(state: AgentState) -> dict:
     if event_queue:
         await event_queue.put({"type": "tool_complete", "tool": "arxiv_search"})
 
-    # Return only the field we're updating
-    return {"arxiv_response": arxiv_response}
+    # arXiv usually beats Gemini: once it is known to add nothing, start streaming
+    # the grounded answer instead of waiting for Google to finish
+    score = arxiv_relevance(query, arxiv_response)
+    grounded_stream = state.get("grounded_stream")
+    if grounded_stream and score < settings.SYNTHESIS_MIN_ARXIV_RELEVANCE:
+        await grounded_stream.release()
+
+    # Return only the fields we're updating
+    return {"arxiv_response": arxiv_response, "arxiv_relevance": score}
 
 
 async def combine_results(state: AgentState) -> AgentState:
@@ -154,14 +235,18 @@ async def combine_results(state: AgentState) -> AgentState:
     gemini_response = state["gemini_response"]
     arxiv_response = state["arxiv_response"]
     query = state["query"]
+    event_queue = state.get("event_queue")
+
+    if state.get("grounded_stream"):
+        state["grounded_stream"].discard()
 
     print(f"\n🔄 Combining Results...")
     print(f"🔄 Google Data Length: {len(gemini_response)}")
     print(f"🔄 ArXiv Data Length: {len(arxiv_response)}")
     print(f"🔄 ArXiv Data Preview: {arxiv_response[:300]}")
 
-    # Create Gemini client
-    client = create_gemini_client()
+    # Dedupe and trim both sources to their token budgets
+    web_context, arxiv_context = pack_context(query, gemini_response, arxiv_response)
 
     # Build synthesis prompt
     prompt = f"""You are a research assistant. Synthesize the following information to provide a comprehensive answer to the user's question.
@@ -169,12 +254,12 @@ async def combine_results(state: AgentState) -> AgentState:
 User Question: {query}
 
 Web Search Results (via Google):
-{gemini_response}
+{web_context}
 
 Academic Papers (via arXiv):
-{arxiv_response}
+{arxiv_context}
 
-Provide a unified, well-structured answer that combines insights from both sources. Clearly indicate when information comes from web sources vs academic papers."""
+Provide a unified, well-structured answer that combines insights from both sources. Clearly indicate when information comes from web sources vs academic papers.{" If a source is marked as timed out or unavailable, answer from the remaining source and briefly note the gap." if state.get("timed_out_tools") else ""}"""
 
     # Generate synthesis
     contents = [
@@ -184,17 +269,23 @@ Provide a unified, well-structured answer that combines insights from both sourc
         )
     ]
 
+    # Synthesis gets a smaller thinking budget than search
+    thinking_level = synthesis_level(state.get("thinking_level") or "small")
     config = types.GenerateContentConfig(
-        thinking_config=types.ThinkingConfig(thinking_budget=-1),
+        thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget(thinking_level)),
     )
 
-    # Stream response
-    response_text = ""
-    for chunk in client.models.generate_content_stream(
-        model=settings.GEMINI_MODEL, contents=contents, config=config
-    ):
-        if chunk.text:
-            response_text += chunk.text
+    async def emit_delta(text: str):
+        """Forward each synthesized chunk to the frontend as it is generated"""
+        await event_queue.put({"type": "response_delta", "delta": text})
+
+    # Stream response, pushing tokens to the SSE stream when one is attached
+    response_text = await stream_generate(
+        contents,
+        config,
+        on_chunk=emit_delta if event_queue else None,
+        metric_name=f"combine_results.{thinking_level}",
+    )
 
     print(f"🔄 Final Combined Response Length: {len(response_text)}")
 
@@ -202,11 +293,50 @@ Provide a unified, well-structured answer that combines insights from both sourc
     return state
 
 
+def arxiv_relevance(query: str, arxiv_response: str) -> float:
+    """Score how much the arXiv results add to the query"""
+    # Empty, failed and timed-out searches carry no papers at all
+    if not arxiv_response.startswith(ARXIV_RESULTS_PREFIX):
+        return 0.0
+    return relevance_score(query, arxiv_response)
+
+
+async def score_arxiv_relevance(state: AgentState) -> dict:
+    """Join point after both searches: report the arXiv relevance score"""
+    print(f"\n🎯 ArXiv Relevance: {state.get('arxiv_relevance', 0.0):.2f}")
+    return {}
+
+
+def choose_synthesis(state: AgentState) -> str:
+    """Skip the synthesis LLM call when arXiv has nothing relevant to add"""
+    google_ok = "google_search" not in (state.get("timed_out_tools") or [])
+    if google_ok and state.get("arxiv_relevance", 0.0) < settings.SYNTHESIS_MIN_ARXIV_RELEVANCE:
+        metrics.increment("synthesis_skipped_total")
+        return "use_grounded_answer"
+
+    metrics.increment("synthesis_run_total")
+    return "combine_results"
+
+
+async def use_grounded_answer(state: AgentState) -> dict:
+    """Fast path: use the grounded Google answer as the final response"""
+    response_text = state["gemini_response"]
+
+    print(f"\n⚡ Skipping synthesis, using grounded answer ({len(response_text)} chars)")
+
+    # Usually already streaming since arXiv finished; flushes the buffer otherwise
+    if state.get("grounded_stream"):
+        await state["grounded_stream"].release()
+
+    return {"final_response": response_text}
+
+
 # Build the graph
 def create_research_graph():
     """Create the research agent workflow graph with parallel execution
 
-    Flow: User → Get Context → [Google Search || arXiv Search] (parallel) → Combine → Response
+    Flow: User → Get Context → [Google Search || arXiv Search] (parallel) → Score arXiv
+          → Combine (arXiv relevant) | Grounded answer (arXiv empty/irrelevant) → Response
     """
     workflow = StateGraph(AgentState)
 
@@ -214,7 +344,9 @@ def create_research_graph():
     workflow.add_node("get_context", get_context)
     workflow.add_node("search_google", search_google)
     workflow.add_node("search_arxiv", search_arxiv)
+    workflow.add_node("score_arxiv_relevance", score_arxiv_relevance)
     workflow.add_node("combine_results", combine_results)
+    workflow.add_node("use_grounded_answer", use_grounded_answer)
 
     # Add edges for parallel execution
     workflow.set_entry_point("get_context")
@@ -223,12 +355,20 @@ def create_research_graph():
     workflow.add_edge("get_context", "search_google")
     workflow.add_edge("get_context", "search_arxiv")
 
-    # Both converge to combine_results
-    workflow.add_edge("search_google", "combine_results")
-    workflow.add_edge("search_arxiv", "combine_results")
+    # Both converge to the relevance check
+    workflow.add_edge("search_google", "score_arxiv_relevance")
+    workflow.add_edge("search_arxiv", "score_arxiv_relevance")
+
+    # Synthesize only when arXiv adds something
+    workflow.add_conditional_edges(
+        "score_arxiv_relevance",
+        choose_synthesis,
+        {"combine_results": "combine_results", "use_grounded_answer": "use_grounded_answer"},
+    )
 
-    # Final edge to END
+    # Final edges to END
     workflow.add_edge("combine_results", END)
+    workflow.add_edge("use_grounded_answer", END)
 
     return workflow.compile()
 
@@ -3,22 +3,16 @@ LinkedIn Post Generator
 Uses Gemini AI to transform research content into engaging LinkedIn posts
 """
 
-from google import genai
 from google.genai import types
 import json
 import re
 
 from app.config import get_settings
+from app.agent.gemini import stream_generate, Priority
 
 settings = get_settings()
 
 
-def create_gemini_client():
-    """Create Gemini client"""
-    client = genai.Client(api_key=settings.GEMINI_API_KEY)
-    return client
-
-
 async def generate_linkedin_post(
     content: str,
     style: str = "professional",
@@ -37,8 +31,6 @@ async def generate_linkedin_post(
     Returns:
         dict with keys: hook, content, hashtags, emojis_used, character_count, full_post
     """
-    client = create_gemini_client()
-
     # Define style-specific instructions
     style_instructions = {
         "professional": "Use data-driven language, formal tone, and industry-specific terms. Focus on facts and insights.",
@@ -119,12 +111,7 @@ Here's what this transformation means for software professionals:
     )
 
     # Get response
-    response_text = ""
-    for chunk in client.models.generate_content_stream(
-        model=settings.GEMINI_MODEL, contents=contents, config=config
-    ):
-        if chunk.text:
-            response_text += chunk.text
+    response_text = await stream_generate(contents, config, priority=Priority.STANDARD)
 
     # Parse the JSON response
     try:
@@ -202,8 +189,6 @@ async def generate_hashtags_from_content(content: str, count: int = 5) -> list[s
     Returns:
         List of hashtag strings (without # symbol)
     """
-    client = create_gemini_client()
-
     prompt = f"""Analyze the following content and generate {count} relevant, specific hashtags for LinkedIn.
 
 Content:
@@ -228,12 +213,7 @@ Return format: ["Hashtag1", "Hashtag2", "Hashtag3"]"""
     ]
 
     # Get response
-    response_text = ""
-    for chunk in client.models.generate_content_stream(
-        model=settings.GEMINI_MODEL, contents=contents
-    ):
-        if chunk.text:
-            response_text += chunk.text
+    response_text = await stream_generate(contents, priority=Priority.BATCH)
 
     try:
         # Clean and parse response
@@ -0,0 +1,66 @@
+"""
+Lightweight local query classifier
+Picks a Gemini thinking budget per graph node without an extra LLM call
+"""
+
+from typing import Literal
+import re
+
+from app.config import get_settings
+
+settings = get_settings()
+
+ThinkingLevel = Literal["none", "small", "large"]
+
+THINKING_LEVELS: list[ThinkingLevel] = ["none", "small", "large"]
+
+# Phrases that usually mean a quick factual lookup
+SIMPLE_PATTERNS = re.compile(
+    r"^(what|who|when|where|which) (is|are|was|were|did)\b|^(define|definition of)\b",
+    re.IGNORECASE,
+)
+
+# Words that usually mean multi-step reasoning or synthesis
+COMPLEX_MARKERS = re.compile(
+    r"\b(compare|comparison|versus|vs\.?|trade-?offs?|analy[sz]e|analysis|evaluate|"
+    r"implications?|pros and cons|why|how (does|do|can|would|should)|design|"
+    r"strateg(y|ies)|impact|survey|state of the art|limitations?)\b",
+    re.IGNORECASE,
+)
+
+
+def classify_query(query: str) -> ThinkingLevel:
+    """
+    Classify a query into a thinking level
+
+    Args:
+        query: User's research query
+
+    Returns:
+        "none" for short factual lookups, "large" for analytical questions,
+        "small" otherwise
+    """
+    text = query.strip()
+    word_count = len(text.split())
+    complex_hits = len(COMPLEX_MARKERS.findall(text))
+    clauses = text.count("?") + text.count(";") + len(re.findall(r"\band\b", text, re.IGNORECASE))
+
+    if complex_hits >= 2 or (complex_hits and word_count > 15) or word_count > 40:
+        return "large"
+    if complex_hits == 0 and word_count <= 12 and clauses <= 1 and SIMPLE_PATTERNS.search(text):
+        return "none"
+    return "small"
+
+
+def synthesis_level(level: ThinkingLevel) -> ThinkingLevel:
+    """Synthesis only rewrites gathered material, so it thinks one level less than search"""
+    return THINKING_LEVELS[max(0, THINKING_LEVELS.index(level) - 1)]
+
+
+def thinking_budget(level: ThinkingLevel) -> int:
+    """Map a thinking level to a Gemini thinking_budget (0 disables thinking)"""
+    return {
+        "none": 0,
+        "small": settings.THINKING_BUDGET_SMALL,
+        "large": settings.THINKING_BUDGET_LARGE,
+    }[level]
@@ -2,61 +2,292 @@
 Tools for the research agent
 """
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Optional
+import asyncio
+
+from sqlalchemy.engine import Row
 
 from app.config import get_settings
 from app.database.connection import AsyncSessionLocal
-from app.database.models import ResearchMemory
+from app.database.research_crud import (
+    get_memory_snippets,
+    get_memory_summary,
+    insert_research_memories,
+    RESPONSE_PREVIEW_CHARS,
+)
+from app.database.conversation_crud import get_session_messages, insert_conversation_turns
+from app.database.memory_index import get_memory_index
+from app.agent.gemini import embed_text, Priority
+from app.services.memory_cache import (
+    append_cached_turns,
+    context_entry,
+    context_field,
+    drop_semantic_context,
+    get_cached_context,
+    get_context_generation,
+    set_cached_context,
+    MEMORY_KIND,
+    SESSION_KIND,
+)
+from app.services.write_behind import WriteBehindQueue
 
 settings = get_settings()
 
+# Keep references to background indexing tasks so they aren't garbage collected
+_indexing_tasks: set[asyncio.Task] = set()
+
+
+# Characters of each past response included in the memory context
+MEMORY_SNIPPET_CHARS = 200
+
+
+def memory_turns(memories: list[Row]) -> list[list[Optional[str]]]:
+    """(query, response) turns of memory snippets"""
+    return [[memory.query, memory.response] for memory in memories]
+
+
+def session_turns(messages: list[Row]) -> list[list[Optional[str]]]:
+    """(query, response) turns of a session's messages; a query may lack its response"""
+    turns = []
+    for message in messages:
+        if message.role == "user":
+            turns.append([message.content, None])
+        elif turns:
+            turns[-1][1] = message.content
+    return turns
+
+
+def format_memory_context(turns: list[list[Optional[str]]], summary: str = "") -> str:
+    """Format the rolling summary and (query, response) turns (oldest first) as prompt context"""
+    context_parts = []
+    if summary:
+        context_parts.append(f"Summary of earlier research:\n{summary}")
+    for query, response in turns:
+        part = f"Previous Query: {query}"
+        if response is not None:
+            part += f"\nResponse: {response}..."
+        context_parts.append(part)
+    return "\n\n".join(context_parts)
+
+
+async def get_summary_text(user_id: str) -> str:
+    """The user's rolling memory summary, or an empty string if none exists yet"""
+    async with AsyncSessionLocal() as session:
+        summary = await get_memory_summary(session, user_id)
+        return summary.summary if summary else ""
+
+
+async def get_recent_memories(user_id: str, limit: int) -> list[Row]:
+    """Most recent memory snippets for a user, in chronological order"""
+    async with AsyncSessionLocal() as session:
+        rows = await get_memory_snippets(session, user_id, limit, MEMORY_SNIPPET_CHARS)
+        return list(reversed(rows))
+
+
+async def get_recent_session_messages(user_id: str, session_id: str, limit: int) -> list[Row]:
+    """Latest `limit` turns (query + response) of one session, in chronological order"""
+    async with AsyncSessionLocal() as session:
+        return await get_session_messages(
+            session, user_id, session_id, limit * 2, MEMORY_SNIPPET_CHARS
+        )
+
+
+async def get_similar_memories(user_id: str, query: str, limit: int) -> Optional[list[Row]]:
+    """Past interactions most similar to the query, above the similarity threshold
+
+    Returns None when the user has nothing indexed yet, and an empty list when
+    nothing is similar enough.
+    """
+    query_embedding = await embed_text(
+        query, task_type="RETRIEVAL_QUERY", priority=Priority.INTERACTIVE
+    )
+    matches = await get_memory_index().search(user_id, query_embedding, limit)
+    if not matches:
+        return None
+    memory_ids = [
+        memory_id
+        for memory_id, similarity in matches
+        if similarity >= settings.MEMORY_SIMILARITY_THRESHOLD
+    ]
+    if not memory_ids:
+        return []
+
+    async with AsyncSessionLocal() as session:
+        rows = await get_memory_snippets(
+            session, user_id, len(memory_ids), MEMORY_SNIPPET_CHARS, memory_ids
+        )
+        return list(reversed(rows))
+
+
+async def select_context_turns(
+    user_id: str, query: Optional[str], limit: int, session_id: Optional[str]
+) -> tuple[str, list[list[Optional[str]]]]:
+    """Pick the turns for a context: the session's latest, similar, or recent memories
+
+    Returns:
+        Entry kind (SESSION_KIND or MEMORY_KIND) and the turns, oldest first
+    """
+    if session_id:
+        messages = await get_recent_session_messages(user_id, session_id, limit)
+        if messages:
+            return SESSION_KIND, session_turns(messages)
+
+    memories = None
+    if query and settings.MEMORY_RETRIEVAL_MODE == "semantic":
+        try:
+            memories = await get_similar_memories(
+                user_id, query, min(limit, settings.MEMORY_TOP_K)
+            )
+        except Exception as e:
+            print(f"Semantic memory retrieval error, using recent memory: {str(e)}")
+
+    # No embeddings yet (or retrieval failed): recent history is better than none.
+    # Unrelated past queries are not: below the threshold only the summary is used
+    if memories is None:
+        memories = await get_recent_memories(user_id, limit)
+
+    return MEMORY_KIND, memory_turns(memories)
 
-async def get_memory_context(user_id: str, limit: int = 5) -> str:
+
+async def get_memory_context(
+    user_id: str,
+    query: Optional[str] = None,
+    limit: int = 5,
+    session_id: Optional[str] = None,
+) -> str:
     """
     Retrieve user's past research queries for context
 
     Args:
         user_id: User ID from Clerk
-        limit: Number of recent queries to retrieve
+        query: Current query; with semantic retrieval only similar past
+            interactions are returned (the most recent ones only if the user
+            has no embeddings yet or retrieval fails)
+        limit: Maximum number of past interactions to retrieve
+        session_id: Current conversation session; follow-ups in a session
+            use that session's latest turns instead of user-wide retrieval
 
     Returns:
-        Formatted string of past research context
+        Formatted string of past research context (rolling summary of older
+        history plus the selected recent or similar interactions)
     """
-    try:
-        async with AsyncSessionLocal() as session:
-            # Query recent research memory
-            stmt = (
-                select(ResearchMemory)
-                .where(ResearchMemory.user_id == user_id)
-                .order_by(ResearchMemory.created_at.desc())
-                .limit(limit)
-            )
-            result = await session.execute(stmt)
-            memories = result.scalars().all()
-
-            if not memories:
-                return ""
+    # Warm requests skip the database entirely; saves append to the user's entries
+    field = context_field(query, limit, session_id)
+    cached = await get_cached_context(user_id, field)
+    if cached is not None:
+        return format_memory_context(cached["turns"], cached["summary"])
+    # Captured before the reads so a save landing meanwhile keeps this result uncached
+    generation = await get_context_generation(user_id)
 
-            # Format memory context
-            context_parts = []
-            for memory in reversed(memories):  # Chronological order
-                context_parts.append(
-                    f"Previous Query: {memory.query}\nResponse: {memory.response[:200]}..."
-                )
+    try:
+        # Older history is folded into one summary, so context size stays bounded.
+        # It loads concurrently with turn selection (and the query embedding)
+        summary, (kind, turns) = await asyncio.gather(
+            get_summary_text(user_id)
+            if settings.MEMORY_SUMMARY_ENABLED
+            else asyncio.sleep(0, result=""),
+            select_context_turns(user_id, query, limit, session_id),
+        )
 
-            return "\n\n".join(context_parts)
+        await set_cached_context(
+            user_id, field, context_entry(kind, summary, turns), generation
+        )
+        return format_memory_context(turns, summary)
     except Exception as e:
         print(f"Memory retrieval error: {str(e)}")
         return ""
 
 
+def memory_embedding_text(query: str, response: str) -> str:
+    """Text embedded for a saved interaction"""
+    return f"{query}\n\n{response[:2000]}"
+
+
+async def index_research_memory(user_id: str, memory_id: int, query: str, response: str):
+    """Embed a saved interaction and add it to the vector index"""
+    try:
+        embedding = await embed_text(memory_embedding_text(query, response))
+        await get_memory_index().add(user_id, memory_id, embedding)
+        # The new memory is now searchable, so cached semantic lookups are stale
+        await drop_semantic_context(user_id)
+    except Exception as e:
+        print(f"Memory indexing error: {str(e)}")
+
+
+async def persist_research_memories(memories: list[dict[str, Any]]) -> None:
+    """Write a batch of queued interactions, then refresh caches and the vector index"""
+    async with AsyncSessionLocal() as session:
+        memory_ids = await insert_research_memories(session, memories)
+
+        # Sessioned turns also go to conversation_history for session lookups.
+        # Assistant turns keep only a preview (enough for session context); the
+        # full body lives in research_memory, referenced by research_memory_id
+        turns = []
+        for memory_id, memory in zip(memory_ids, memories):
+            session_id = memory["extra_data"].get("session_id")
+            if not session_id:
+                continue
+            for role, content, extra_data in (
+                ("user", memory["query"], {}),
+                (
+                    "assistant",
+                    memory["response"][:RESPONSE_PREVIEW_CHARS],
+                    {"research_memory_id": memory_id},
+                ),
+            ):
+                turns.append(
+                    {
+                        "user_id": memory["user_id"],
+                        "session_id": session_id,
+                        "role": role,
+                        "content": content,
+                        "extra_data": extra_data,
+                        "created_at": memory["created_at"],
+                    }
+                )
+        await insert_conversation_turns(session, turns)
+        await session.commit()
+
+    # Cached recent and session context gains the new turns instead of being flushed
+    for user_id in {memory["user_id"] for memory in memories}:
+        saved = [memory for memory in memories if memory["user_id"] == user_id]
+        await append_cached_turns(user_id, saved, MEMORY_SNIPPET_CHARS)
+
+    # Embed in the background so the flusher doesn't wait on embedding calls
+    if settings.MEMORY_RETRIEVAL_MODE == "semantic":
+        for memory_id, memory in zip(memory_ids, memories):
+            task = asyncio.create_task(
+                index_research_memory(
+                    memory["user_id"], memory_id, memory["query"], memory["response"]
+                )
+            )
+            _indexing_tasks.add(task)
+            task.add_done_callback(_indexing_tasks.discard)
+
+
+@lru_cache()
+def get_memory_writer() -> WriteBehindQueue[dict[str, Any]]:
+    """Write-behind queue for research memory (started and flushed in the app lifespan)"""
+    return WriteBehindQueue(
+        name="memory_writes",
+        flush=persist_research_memories,
+        max_size=settings.MEMORY_WRITE_QUEUE_MAX_SIZE,
+        batch_size=settings.MEMORY_WRITE_BATCH_SIZE,
+        flush_interval=settings.MEMORY_WRITE_FLUSH_INTERVAL_SECONDS,
+    )
+
+
 async def save_research_memory(
     user_id: str, query: str, response: str, sources: list[str], session_id: str = None
 ) -> bool:
     """
     Save research interaction to memory
 
+    The row is queued and written by the background flusher, so this only
+    waits if the queue is full.
+
     Args:
         user_id: User ID from Clerk
         query: User's research query
@@ -65,24 +296,25 @@ async def save_research_memory(
         session_id: Optional session ID for grouping conversations
 
     Returns:
-        True if saved successfully
+        True if queued successfully
     """
     try:
-        async with AsyncSessionLocal() as session:
-            extra_data = {}
-            if session_id:
-                extra_data["session_id"] = session_id
-
-            memory = ResearchMemory(
-                user_id=user_id,
-                query=query,
-                response=response,
-                sources=sources,
-                extra_data=extra_data,
-            )
-            session.add(memory)
-            await session.commit()
-            return True
+        extra_data = {}
+        if session_id:
+            extra_data["session_id"] = session_id
+
+        await get_memory_writer().put(
+            {
+                "user_id": user_id,
+                "query": query,
+                "response": response,
+                "sources": sources,
+                "extra_data": extra_data,
+                # Timestamp the interaction, not the flush
+                "created_at": datetime.now(timezone.utc),
+            }
+        )
+        return True
     except Exception as e:
         print(f"Memory save error: {str(e)}")
         return False
@@ -2,21 +2,29 @@
 API routes for research agent
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
-from sqlalchemy import select
 import asyncio
 import json
 
 from app.middleware.auth import get_current_user, get_user_id, ClerkUserData
-from app.agent.graph import research_graph
 from app.agent.tools import save_research_memory
+from app.agent.gemini import GeminiUnavailableError
+from app.services.research_service import run_research
+from app.services.research_cache import cache_stats
 from app.database.connection import AsyncSessionLocal
-from app.services.user_sync import get_or_create_user
-from app.database.models import ResearchMemory
+from app.services.user_sync import ensure_user_synced
+from app.database.research_crud import (
+    get_research_history as fetch_research_history,
+    get_research_memory_by_id,
+    get_full_responses,
+    search_research_memories,
+    RESPONSE_PREVIEW_CHARS,
+)
+from app.database.conversation_crud import get_session_messages
 
 router = APIRouter()
 
@@ -27,6 +35,7 @@ class ResearchQuery(BaseModel):
 
     query: str
     session_id: Optional[str] = None
+    thinking_level: Optional[Literal["none", "small", "large"]] = None  # Overrides the query classifier
 
 
 class ResearchResponse(BaseModel):
@@ -45,6 +54,7 @@ class ResearchHistoryItem(BaseModel):
     sources: List[str]
     session_id: Optional[str] = None
     created_at: datetime
+    is_truncated: bool = False  # Summary mode: fetch the full body from /research/history/{id}
 
     class Config:
         from_attributes = True
@@ -54,6 +64,41 @@ class ResearchHistoryResponse(BaseModel):
     """Research history response"""
 
     history: List[ResearchHistoryItem]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next (older) page
+
+
+class ResearchSearchItem(BaseModel):
+    """Single search hit; query and snippet contain <mark> highlights"""
+
+    id: int
+    query: str
+    snippet: str
+    rank: float
+    session_id: Optional[str] = None
+    created_at: datetime
+
+
+class ResearchSearchResponse(BaseModel):
+    """Research search response"""
+
+    results: List[ResearchSearchItem]
+
+
+class SessionMessage(BaseModel):
+    """Single message of a conversation session"""
+
+    id: int
+    role: str  # 'user' or 'assistant'
+    content: str
+    research_memory_id: Optional[int] = None
+    created_at: datetime
+
+
+class SessionResponse(BaseModel):
+    """One conversation session"""
+
+    session_id: str
+    messages: List[SessionMessage]
 
 
 # Routes
@@ -78,27 +123,15 @@ async def research(
             "username": current_user.username,
         }
 
-        # Get or create user in database
-        async with AsyncSessionLocal() as session:
-            user = await get_or_create_user(session, clerk_data)
-            user_id = user.clerk_user_id  # Use Clerk ID for memory
-
-        # Run the research graph
-        result = await research_graph.ainvoke(
-            {
-                "user_id": user_id,
-                "query": query.query,
-                "memory_context": "",
-                "gemini_response": "",
-                "arxiv_response": "",
-                "final_response": "",
-            }
-        )
+        # Get or create user in database (skipped when recently synced unchanged)
+        user_id = await ensure_user_synced(clerk_data)  # Use Clerk ID for memory
 
-        # Extract response
-        response_text = result.get("final_response", "")
+        # Run the research graph (served from cache for identical queries)
+        response_text = await run_research(
+            user_id, query.query, thinking_level=query.thinking_level, session_id=query.session_id
+        )
 
-        # Save to memory (sources are embedded in Gemini's response)
+        # Queue for memory (written in the background; sources are embedded in Gemini's response)
         await save_research_memory(user_id, query.query, response_text, [], query.session_id)
 
         return ResearchResponse(
@@ -111,6 +144,11 @@ async def research(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid user data: {str(e)}",
         )
+    except GeminiUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Research service is busy, please retry: {str(e)}",
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -143,39 +181,31 @@ async def research_stream(
                 "username": current_user.username,
             }
 
-            # Get or create user in database
-            async with AsyncSessionLocal() as session:
-                user = await get_or_create_user(session, clerk_data)
-                user_id = user.clerk_user_id
+            # Get or create user in database (skipped when recently synced unchanged)
+            user_id = await ensure_user_synced(clerk_data)
 
-            # Create a task to run the research graph
+            # Create a task to run the research graph (or replay a cached result)
             graph_task = asyncio.create_task(
-                research_graph.ainvoke(
-                    {
-                        "user_id": user_id,
-                        "query": query.query,
-                        "memory_context": "",
-                        "gemini_response": "",
-                        "arxiv_response": "",
-                        "final_response": "",
-                        "event_queue": event_queue,
-                    }
+                run_research(
+                    user_id, query.query, event_queue, query.thinking_level, query.session_id
                 )
             )
 
-            # Stream events as they come in
+            # Stream events as they come in (tool events and response_delta tokens)
             while not graph_task.done():
-                try:
-                    # Wait for events with a timeout
-                    event = await asyncio.wait_for(event_queue.get(), timeout=0.1)
-                    event_data = json.dumps(event)
+                get_event = asyncio.ensure_future(event_queue.get())
+                done, _ = await asyncio.wait(
+                    {get_event, graph_task}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if get_event in done:
+                    event_data = json.dumps(get_event.result())
                     yield f"data: {event_data}\n\n"
-                except asyncio.TimeoutError:
-                    # No event yet, continue waiting
-                    continue
+                else:
+                    # Graph finished first, remaining events are drained below
+                    get_event.cancel()
 
             # Get the result
-            result = await graph_task
+            response_text = await graph_task
 
             # Drain any remaining events
             while not event_queue.empty():
@@ -183,8 +213,7 @@ async def research_stream(
                 event_data = json.dumps(event)
                 yield f"data: {event_data}\n\n"
 
-            # Send final response
-            response_text = result.get("final_response", "")
+            # Send final response (complete text, already streamed as deltas)
             final_event = {
                 "type": "final_response",
                 "response": response_text,
@@ -192,7 +221,7 @@ async def research_stream(
             }
             yield f"data: {json.dumps(final_event)}\n\n"
 
-            # Save to memory
+            # Queue for memory (written in the background)
             await save_research_memory(user_id, query.query, response_text, [], query.session_id)
 
             # Send completion event
@@ -218,40 +247,50 @@ async def research_stream(
 
 @router.get("/research/history", response_model=ResearchHistoryResponse)
 async def get_research_history(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    summary: bool = False,
+    snippet_chars: int = Query(300, ge=1, le=RESPONSE_PREVIEW_CHARS),
     current_user: ClerkUserData = Depends(get_current_user),
 ):
     """
     Get research history for the authenticated user
 
-    Returns all past research queries and responses from the database
+    Returns past research queries and responses, newest first, one page at a
+    time (keyset pagination: pass next_cursor back as cursor).
+    With summary=true each response is truncated to snippet_chars in SQL;
+    full bodies can then be loaded per item from /research/history/{id}.
     """
     try:
         user_id = current_user.id
 
         async with AsyncSessionLocal() as session:
-            # Query research memories for this user, ordered by most recent
-            result = await session.execute(
-                select(ResearchMemory)
-                .where(ResearchMemory.user_id == user_id)
-                .order_by(ResearchMemory.created_at.desc())
+            # Query only the needed columns, ordered by most recent
+            rows, next_cursor = await fetch_research_history(
+                session, user_id, limit, cursor, snippet_chars if summary else None
             )
-            memories = result.scalars().all()
 
             # Convert to response format
             history_items = [
                 ResearchHistoryItem(
-                    id=memory.id,
-                    query=memory.query,
-                    response=memory.response,
-                    sources=memory.sources or [],
-                    session_id=memory.extra_data.get("session_id") if memory.extra_data else None,
-                    created_at=memory.created_at,
+                    id=row.id,
+                    query=row.query,
+                    response=row.response,
+                    sources=row.sources or [],
+                    session_id=row.extra_data.get("session_id") if row.extra_data else None,
+                    created_at=row.created_at,
+                    is_truncated=(row.response_length or 0) > len(row.response),
                 )
-                for memory in memories
+                for row in rows
             ]
 
-            return ResearchHistoryResponse(history=history_items)
+            return ResearchHistoryResponse(history=history_items, next_cursor=next_cursor)
 
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -259,6 +298,143 @@ async def get_research_history(
         )
 
 
+@router.get("/research/search", response_model=ResearchSearchResponse)
+async def search_research(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: ClerkUserData = Depends(get_current_user),
+):
+    """
+    Full-text search over the authenticated user's research history
+
+    Ranked best match first; supports web search syntax ("quoted phrases",
+    OR, -excluded). Query and snippet are HTML-escaped with <mark> around
+    matches. Full bodies can be loaded from /research/history/{id}.
+    """
+    try:
+        async with AsyncSessionLocal() as session:
+            rows = await search_research_memories(session, current_user.id, q, limit)
+
+        return ResearchSearchResponse(
+            results=[
+                ResearchSearchItem(
+                    id=row.id,
+                    query=row.query,
+                    snippet=row.snippet,
+                    rank=row.rank,
+                    session_id=row.extra_data.get("session_id") if row.extra_data else None,
+                    created_at=row.created_at,
+                )
+                for row in rows
+            ]
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search research history: {str(e)}",
+        )
+
+
+@router.get("/research/history/{memory_id}", response_model=ResearchHistoryItem)
+async def get_research_history_item(
+    memory_id: int,
+    current_user: ClerkUserData = Depends(get_current_user),
+):
+    """
+    Get a single research history item with its full response
+    """
+    try:
+        async with AsyncSessionLocal() as session:
+            memory = await get_research_memory_by_id(session, memory_id, current_user.id)
+
+            if not memory:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Research item not found",
+                )
+
+            return ResearchHistoryItem(
+                id=memory.id,
+                query=memory.query,
+                response=memory.response,
+                sources=memory.sources or [],
+                session_id=memory.extra_data.get("session_id") if memory.extra_data else None,
+                created_at=memory.created_at,
+            )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch research item: {str(e)}",
+        )
+
+
+@router.get("/research/sessions/{session_id}", response_model=SessionResponse)
+async def get_research_session(
+    session_id: str,
+    limit: int = Query(200, ge=1, le=1000),
+    current_user: ClerkUserData = Depends(get_current_user),
+):
+    """
+    Get the messages of one conversation session, oldest first
+
+    A single indexed (user_id, session_id, created_at) lookup; at most the
+    latest `limit` messages are returned. Assistant messages store a preview,
+    so their full text is loaded from research memory in one extra query.
+    """
+    try:
+        async with AsyncSessionLocal() as session:
+            rows = await get_session_messages(session, current_user.id, session_id, limit)
+            responses = await get_full_responses(
+                session,
+                current_user.id,
+                [
+                    row.extra_data["research_memory_id"]
+                    for row in rows
+                    if (row.extra_data or {}).get("research_memory_id")
+                ],
+            )
+
+        if not rows:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found",
+            )
+
+        return SessionResponse(
+            session_id=session_id,
+            messages=[
+                SessionMessage(
+                    id=row.id,
+                    role=row.role,
+                    content=responses.get(
+                        (row.extra_data or {}).get("research_memory_id"), row.content
+                    ),
+                    research_memory_id=(row.extra_data or {}).get("research_memory_id"),
+                    created_at=row.created_at,
+                )
+                for row in rows
+            ],
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch session: {str(e)}",
+        )
+
+
+@router.get("/research/cache/stats")
+async def research_cache_stats():
+    """Hit/miss counters for the research result cache"""
+    return cache_stats()
+
+
 @router.get("/health")
 async def agent_health():
     """Health check for agent service"""
@@ -276,26 +452,19 @@ async def research_public(query: ResearchQuery):
         # Use a default user ID for public queries
         user_id = "public_user"
 
-        # Run the research graph
-        result = await research_graph.ainvoke(
-            {
-                "user_id": user_id,
-                "query": query.query,
-                "memory_context": "",
-                "gemini_response": "",
-                "arxiv_response": "",
-                "final_response": "",
-            }
-        )
-
-        # Extract response (sources embedded in Gemini's response)
-        response_text = result.get("final_response", "")
+        # Run the research graph (sources embedded in Gemini's response)
+        response_text = await run_research(user_id, query.query, thinking_level=query.thinking_level)
 
         return ResearchResponse(
             response=response_text,
             session_id=query.session_id,
         )
 
+    except GeminiUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Research service is busy, please retry: {str(e)}",
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
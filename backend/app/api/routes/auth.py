@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from typing import Optional
 
-from app.middleware.auth import get_current_user, ClerkUserData
+from app.middleware.auth import get_current_user, get_current_user_fresh, ClerkUserData
 from app.database.connection import AsyncSessionLocal
 from app.services.user_sync import get_or_create_user
 
@@ -29,13 +29,15 @@ class UserSyncResponse(BaseModel):
 # Routes
 @router.post("/sync-user", response_model=UserSyncResponse)
 async def sync_user(
-    current_user: ClerkUserData = Depends(get_current_user),
+    current_user: ClerkUserData = Depends(get_current_user_fresh),
 ):
     """
     Sync authenticated Clerk user to Neon database
 
     This endpoint is called when a user logs in to ensure their
     data is synced to the user_preferences table in PostgreSQL.
+    The Clerk profile is refetched rather than read from the profile cache,
+    so edits made in Clerk are picked up on the next login.
 
     Requires authentication via Clerk token.
     """
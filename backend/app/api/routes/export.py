@@ -0,0 +1,42 @@
+"""
+API routes for exporting a user's archive
+"""
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timezone
+
+from app.middleware.auth import get_current_user, ClerkUserData
+from app.services.export import export_ndjson, gzip_stream
+
+router = APIRouter()
+
+
+@router.get("")
+async def export_archive(
+    gzip: bool = False,
+    current_user: ClerkUserData = Depends(get_current_user),
+):
+    """
+    Stream the user's full research and LinkedIn post history as NDJSON
+
+    One JSON object per line ("type": "research" or "linkedin_post"), oldest
+    first. With gzip=true the stream is gzip-compressed as it is produced.
+    """
+    filename = f"research-export-{datetime.now(timezone.utc):%Y%m%d}.ndjson"
+    body = export_ndjson(current_user.id)
+    media_type = "application/x-ndjson"
+
+    if gzip:
+        body = gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Accel-Buffering": "no",  # Disable nginx buffering
+        },
+    )
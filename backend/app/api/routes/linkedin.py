@@ -2,13 +2,14 @@
 API routes for LinkedIn post generation
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
 from app.middleware.auth import get_current_user, ClerkUserData
 from app.agent.linkedin_generator import generate_linkedin_post, generate_hashtags_from_content
+from app.agent.gemini import GeminiUnavailableError
 from app.database.connection import AsyncSessionLocal
 from app.database.linkedin_crud import (
     save_linkedin_post,
@@ -91,6 +92,7 @@ class LinkedInPostHistoryResponse(BaseModel):
     """LinkedIn post history response"""
 
     posts: List[LinkedInPostSavedResponse]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next (older) page
 
 
 # Routes
@@ -124,6 +126,11 @@ async def generate_linkedin_post_endpoint(
             character_count=post_data["character_count"],
         )
 
+    except GeminiUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Generation service is busy, please retry: {str(e)}",
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -146,6 +153,11 @@ async def generate_hashtags_endpoint(
 
         return HashtagsResponse(hashtags=hashtags)
 
+    except GeminiUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Generation service is busy, please retry: {str(e)}",
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -199,22 +211,23 @@ async def save_generated_post(
 
 @router.get("/history", response_model=LinkedInPostHistoryResponse)
 async def get_post_history(
-    limit: int = 50,
-    offset: int = 0,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     current_user: ClerkUserData = Depends(get_current_user),
 ):
     """
     Get LinkedIn post history for the authenticated user
 
+    Newest first, one page at a time (pass next_cursor back as cursor)
     Requires authentication via Clerk token
     """
     try:
         async with AsyncSessionLocal() as session:
-            posts = await get_user_linkedin_posts(
+            posts, next_cursor = await get_user_linkedin_posts(
                 session=session,
                 user_id=current_user.id,
                 limit=limit,
-                offset=offset,
+                cursor=cursor,
             )
 
             post_responses = [
@@ -228,8 +241,13 @@ async def get_post_history(
                 for post in posts
             ]
 
-            return LinkedInPostHistoryResponse(posts=post_responses)
+            return LinkedInPostHistoryResponse(posts=post_responses, next_cursor=next_cursor)
 
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
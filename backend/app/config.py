@@ -4,6 +4,7 @@ Application configuration and environment variables
 
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -18,14 +19,109 @@ class Settings(BaseSettings):
     # Authentication - Clerk
     CLERK_SECRET_KEY: str
     CLERK_PUBLISHABLE_KEY: str = ""
+    CLERK_API_URL: str = "https://api.clerk.com/v1"  # Point at a local stand-in for tests
+    # "api": user profile from the Clerk Backend API; "claims": from session token
+    # claims (email, first_name, last_name, username), API only if claims are missing
+    CLERK_AUTH_MODE: Literal["api", "claims"] = "api"
+    CLERK_JWKS_URL: str = ""  # Empty: derived from the publishable key
+    CLERK_JWKS_REFRESH_SECONDS: int = 3600
+
+    # Clerk user profiles: served fresh for TTL seconds, then served stale
+    # (while refreshing in the background) until STALE seconds
+    CLERK_PROFILE_CACHE_ENABLED: bool = True
+    CLERK_PROFILE_CACHE_TTL_SECONDS: int = 300
+    CLERK_PROFILE_CACHE_STALE_SECONDS: int = 3600
+    CLERK_PROFILE_CACHE_MAX_ENTRIES: int = 10000
+
+    # Users whose Clerk profile was written recently (and unchanged) skip the DB sync
+    USER_SYNC_CACHE_TTL_SECONDS: int = 600
+    USER_SYNC_CACHE_MAX_ENTRIES: int = 10000
+
+    # Verified JWTs are cached in-process until their exp
+    AUTH_TOKEN_CACHE_ENABLED: bool = True
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000
 
     # AI - Google Gemini
     GEMINI_API_KEY: str
     GEMINI_MODEL: str = "gemini-2.5-flash"
 
+    # Thinking budgets for the "small" and "large" levels picked per query
+    THINKING_BUDGET_SMALL: int = 1024
+    THINKING_BUDGET_LARGE: int = 8192
+
+    # Gemini admission control (rate limits of 0 disable that bucket)
+    GEMINI_MAX_IN_FLIGHT: int = 8
+    GEMINI_RPM_LIMIT: int = 1000
+    GEMINI_TPM_LIMIT: int = 1000000
+    GEMINI_MAX_RETRIES: int = 4
+    GEMINI_BACKOFF_BASE_SECONDS: float = 1.0
+    GEMINI_BACKOFF_MAX_SECONDS: float = 20.0
+
     # Database - Neon PostgreSQL
     DATABASE_URL: str
 
+    # Long-term memory retrieval: "semantic" (vector search) or "recent" (last N rows)
+    MEMORY_RETRIEVAL_MODE: str = "semantic"
+    MEMORY_VECTOR_BACKEND: str = "postgres"  # "postgres" (pgvector) or "memory" (NumPy, tests)
+    MEMORY_TOP_K: int = 5
+    MEMORY_SIMILARITY_THRESHOLD: float = 0.6
+    EMBEDDING_MODEL: str = "gemini-embedding-001"
+    EMBEDDING_DIMENSIONS: int = 768
+
+    # Rows fetched per server-side cursor round trip when exporting a user's archive
+    EXPORT_BATCH_SIZE: int = 500
+
+    # Codec for content_blobs: "zlib" (stdlib) or "zstd" (pip install zstandard)
+    CONTENT_BLOB_CODEC: str = "zlib"
+
+    # Per-user memory context cache ("memory" in-process, or "redis" shared across workers)
+    MEMORY_CONTEXT_CACHE_ENABLED: bool = True
+    MEMORY_CONTEXT_CACHE_BACKEND: str = "memory"
+    MEMORY_CONTEXT_CACHE_TTL_SECONDS: int = 900
+    MEMORY_CONTEXT_CACHE_MAX_USERS: int = 10000
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Write-behind persistence of research memory (batched multi-row inserts)
+    MEMORY_WRITE_QUEUE_MAX_SIZE: int = 1000
+    MEMORY_WRITE_BATCH_SIZE: int = 100
+    MEMORY_WRITE_FLUSH_INTERVAL_SECONDS: float = 0.5
+
+    # Rolling per-user memory summary: memories older than the newest
+    # MEMORY_SUMMARY_KEEP_RECENT are periodically folded into one summary
+    MEMORY_SUMMARY_ENABLED: bool = True
+    MEMORY_SUMMARY_KEEP_RECENT: int = 5
+    MEMORY_SUMMARY_MIN_BATCH: int = 10
+    MEMORY_SUMMARY_MAX_BATCH: int = 50
+    MEMORY_SUMMARY_MAX_WORDS: int = 250
+    MEMORY_COMPACTION_INTERVAL_SECONDS: int = 600
+
+    # Research graph per-tool deadlines; a branch that misses its deadline is
+    # marked unavailable and synthesis continues with the remaining results
+    GOOGLE_SEARCH_DEADLINE_SECONDS: float = 30.0
+    ARXIV_SEARCH_DEADLINE_SECONDS: float = 8.0
+
+    # Synthesis prompt token budgets per source (see app/agent/context_packer.py)
+    CONTEXT_WEB_TOKEN_BUDGET: int = 2000
+    CONTEXT_ARXIV_TOKEN_BUDGET: int = 800
+
+    # Skip the synthesis call when arXiv results cover less than this fraction
+    # of the query's content words (the grounded answer is streamed directly)
+    SYNTHESIS_MIN_ARXIV_RELEVANCE: float = 0.34
+
+    # arXiv retrieval (endpoint is configurable so tests can use a local stand-in)
+    ARXIV_API_URL: str = "https://export.arxiv.org/api/query"
+    ARXIV_MAX_RESULTS: int = 3
+    ARXIV_DOC_CHARS_MAX: int = 2000
+    ARXIV_TIMEOUT_SECONDS: float = 10.0
+    ARXIV_CACHE_TTL_SECONDS: int = 86400
+    ARXIV_CACHE_MAX_ENTRIES: int = 2048
+
+    # Research result cache (exact match on normalized query + memory context)
+    RESEARCH_CACHE_ENABLED: bool = True
+    RESEARCH_CACHE_TTL_SECONDS: int = 3600
+    RESEARCH_CACHE_MAX_ENTRIES: int = 1024
+    RESEARCH_CACHE_CLEANUP_INTERVAL_SECONDS: int = 3600  # Expired rows are deleted this often
+
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:3000"
 
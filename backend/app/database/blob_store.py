@@ -0,0 +1,133 @@
+"""
+Content-addressed, compressed storage for large text bodies
+Blobs are keyed by the sha256 of their text, so identical bodies (e.g. the same
+research text behind several LinkedIn variants) are stored once. zlib is the
+default codec; zstd requires the optional `zstandard` package.
+"""
+
+from typing import Dict, Iterable, List
+import hashlib
+import zlib
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database.models import ContentBlob, LinkedInPost, ResearchMemory
+
+settings = get_settings()
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+def content_hash(text: str) -> str:
+    """Blob key for a text body"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compress_text(text: str, codec: str) -> bytes:
+    """Compress text with the given codec ("zlib" or "zstd")"""
+    raw = text.encode("utf-8")
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return zlib.compress(raw, ZLIB_LEVEL)
+
+
+def decompress_text(data: bytes, codec: str) -> str:
+    """Inverse of compress_text (the codec is stored per blob)"""
+    if codec == "zstd":
+        import zstandard
+
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        raw = zlib.decompress(data)
+    return raw.decode("utf-8")
+
+
+async def put_blobs(session: AsyncSession, texts: Iterable[str]) -> List[str]:
+    """
+    Store text bodies, skipping any that already exist
+
+    Args:
+        session: Database session (caller commits)
+        texts: Text bodies
+
+    Returns:
+        Blob hash of each text, in input order
+    """
+    texts = list(texts)
+    hashes = [content_hash(text) for text in texts]
+
+    # One multi-row INSERT; existing blobs are left untouched
+    values = {
+        blob_hash: {
+            "hash": blob_hash,
+            "codec": settings.CONTENT_BLOB_CODEC,
+            "data": compress_text(text, settings.CONTENT_BLOB_CODEC),
+            "size": len(text),
+        }
+        for blob_hash, text in zip(hashes, texts)
+    }
+    if values:
+        dialect = postgresql if session.bind.dialect.name == "postgresql" else sqlite
+        await session.execute(
+            dialect.insert(ContentBlob).values(list(values.values())).on_conflict_do_nothing()
+        )
+    return hashes
+
+
+async def delete_orphaned_blobs(session: AsyncSession, hashes: Iterable[str]) -> int:
+    """
+    Delete blobs that no research memory or LinkedIn post references anymore
+
+    Args:
+        session: Database session (caller commits)
+        hashes: Candidate blob hashes (e.g. those of rows just deleted)
+
+    Returns:
+        Number of blobs deleted
+    """
+    candidates = {blob_hash for blob_hash in hashes if blob_hash}
+    if not candidates:
+        return 0
+
+    referenced_by_memory = select(ResearchMemory.id).where(
+        ResearchMemory.response_hash == ContentBlob.hash
+    )
+    referenced_by_post = select(LinkedInPost.id).where(
+        LinkedInPost.original_content_hash == ContentBlob.hash
+    )
+    result = await session.execute(
+        delete(ContentBlob)
+        .where(ContentBlob.hash.in_(candidates))
+        .where(~referenced_by_memory.exists())
+        .where(~referenced_by_post.exists())
+    )
+    return result.rowcount
+
+
+async def get_blob_texts(session: AsyncSession, hashes: Iterable[str]) -> Dict[str, str]:
+    """
+    Load and decompress blobs
+
+    Args:
+        session: Database session
+        hashes: Blob hashes (duplicates and None are ignored)
+
+    Returns:
+        Mapping of blob hash to text
+    """
+    wanted = {blob_hash for blob_hash in hashes if blob_hash}
+    if not wanted:
+        return {}
+
+    result = await session.execute(
+        select(ContentBlob.hash, ContentBlob.codec, ContentBlob.data).where(
+            ContentBlob.hash.in_(wanted)
+        )
+    )
+    return {row.hash: decompress_text(row.data, row.codec) for row in result}
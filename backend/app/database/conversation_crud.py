@@ -0,0 +1,68 @@
+"""
+CRUD operations for session-scoped conversation history
+Reads go through the (user_id, session_id, created_at) index
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, desc, func, insert
+from sqlalchemy.engine import Row
+from typing import Any, Dict, List, Optional
+
+from app.database.models import ConversationHistory
+
+
+async def insert_conversation_turns(
+    session: AsyncSession,
+    turns: List[Dict[str, Any]],
+) -> None:
+    """
+    Insert many conversation messages in one multi-row INSERT
+
+    Args:
+        session: Database session (caller commits)
+        turns: Column values for each message (user_id, session_id, role,
+            content, extra_data, created_at)
+    """
+    if turns:
+        await session.execute(insert(ConversationHistory), turns)
+
+
+async def get_session_messages(
+    session: AsyncSession,
+    user_id: str,
+    session_id: str,
+    limit: int,
+    snippet_chars: Optional[int] = None,
+) -> List[Row]:
+    """
+    Get the latest messages of one session, in chronological order
+
+    Args:
+        session: Database session
+        user_id: Clerk user ID (for security)
+        session_id: Conversation session ID
+        limit: Maximum number of messages (the most recent are kept)
+        snippet_chars: If set, return only this many characters of each message
+
+    Returns:
+        Rows with id, role, content, extra_data and created_at
+    """
+    content_column = (
+        ConversationHistory.content
+        if snippet_chars is None
+        else func.substr(ConversationHistory.content, 1, snippet_chars)
+    )
+    result = await session.execute(
+        select(
+            ConversationHistory.id,
+            ConversationHistory.role,
+            content_column.label("content"),
+            ConversationHistory.extra_data,
+            ConversationHistory.created_at,
+        )
+        .where(ConversationHistory.user_id == user_id)
+        .where(ConversationHistory.session_id == session_id)
+        .order_by(desc(ConversationHistory.created_at), desc(ConversationHistory.id))
+        .limit(limit)
+    )
+    return list(reversed(result.all()))
@@ -1,13 +1,19 @@
 """
 CRUD operations for LinkedIn posts
+original_content is stored once per distinct text in content_blobs
 """
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
-from typing import List, Optional
+from sqlalchemy import bindparam, select, desc, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import defer
+from typing import AsyncIterator, List, Optional, Tuple
 from datetime import datetime
 
+from app.database.connection import AsyncSessionLocal
 from app.database.models import LinkedInPost
+from app.database.pagination import paginate_newest_first, split_page
+from app.database.blob_store import delete_orphaned_blobs, put_blobs, get_blob_texts
 
 
 async def save_linkedin_post(
@@ -50,11 +56,14 @@ async def save_linkedin_post(
     Returns:
         Created LinkedInPost instance
     """
+    # Variants of the same research share one compressed copy of the source text
+    (original_content_hash,) = await put_blobs(session, [original_content])
+
     linkedin_post = LinkedInPost(
         user_id=user_id,
         session_id=session_id,
         research_memory_id=research_memory_id,
-        original_content=original_content,
+        original_content_hash=original_content_hash,
         hook=hook,
         main_content=main_content,
         cta=cta,
@@ -80,29 +89,69 @@ async def get_user_linkedin_posts(
     session: AsyncSession,
     user_id: str,
     limit: int = 50,
-    offset: int = 0,
-) -> List[LinkedInPost]:
+    cursor: Optional[str] = None,
+) -> Tuple[List[LinkedInPost], Optional[str]]:
     """
-    Get all LinkedIn posts for a user
+    Get one page of LinkedIn posts for a user, newest first
 
     Args:
         session: Database session
         user_id: Clerk user ID
         limit: Maximum number of posts to return
-        offset: Offset for pagination
+        cursor: Cursor returned with the previous page (None for the first page)
 
     Returns:
-        List of LinkedInPost instances
+        Tuple of (LinkedInPost instances, cursor for the next page or None)
+
+    Raises:
+        ValueError: If the cursor is malformed
     """
-    result = await session.execute(
+    # The source text isn't part of the history response, so legacy inline copies aren't loaded
+    stmt = (
         select(LinkedInPost)
+        .options(defer(LinkedInPost.original_content))
         .where(LinkedInPost.user_id == user_id)
-        .order_by(desc(LinkedInPost.created_at))
-        .limit(limit)
-        .offset(offset)
     )
+    result = await session.execute(paginate_newest_first(stmt, LinkedInPost, cursor, limit))
 
-    return result.scalars().all()
+    return split_page(result.scalars().all(), limit)
+
+
+async def stream_user_linkedin_posts(
+    session: AsyncSession,
+    user_id: str,
+    batch_size: int = 500,
+) -> AsyncIterator[List[Tuple[LinkedInPost, str]]]:
+    """
+    Stream all of a user's LinkedIn posts, oldest first, in batches
+
+    Uses a server-side cursor (stream_scalars with yield_per), so memory use
+    is bounded by batch_size regardless of history length.
+
+    Args:
+        session: Database session (must stay open while iterating)
+        user_id: Clerk user ID
+        batch_size: Rows fetched per round trip
+
+    Yields:
+        Batches of (LinkedInPost, original content) pairs
+    """
+    result = await session.stream_scalars(
+        select(LinkedInPost)
+        .where(LinkedInPost.user_id == user_id)
+        .order_by(LinkedInPost.created_at, LinkedInPost.id)
+        .execution_options(yield_per=batch_size)
+    )
+    # Blobs are resolved on a second connection while the cursor stays open
+    async with AsyncSessionLocal() as blob_session:
+        async for partition in result.partitions():
+            texts = await get_blob_texts(
+                blob_session, (post.original_content_hash for post in partition)
+            )
+            yield [
+                (post, texts.get(post.original_content_hash, post.original_content or ""))
+                for post in partition
+            ]
 
 
 async def get_linkedin_post_by_id(
@@ -215,7 +264,11 @@ async def delete_linkedin_post(
     if not post:
         return False
 
+    original_content_hash = post.original_content_hash
     await session.delete(post)
+    await session.flush()
+    # Drop the source text too unless another post or memory shares it
+    await delete_orphaned_blobs(session, [original_content_hash])
     await session.commit()
 
     return True
@@ -245,3 +298,48 @@ async def get_posts_by_session(
     )
 
     return result.scalars().all()
+
+
+async def get_inline_posts(
+    session: AsyncSession,
+    after_id: int,
+    limit: int,
+) -> List[Row]:
+    """
+    Posts (any user) whose original content is still stored inline, in ID order
+
+    Args:
+        session: Database session
+        after_id: Only rows with a higher ID (keyset position)
+        limit: Maximum number of rows
+
+    Returns:
+        Rows with id and original_content
+    """
+    result = await session.execute(
+        select(LinkedInPost.id, LinkedInPost.original_content)
+        .where(LinkedInPost.id > after_id)
+        .where(LinkedInPost.original_content.is_not(None))
+        .where(LinkedInPost.original_content_hash.is_(None))
+        .order_by(LinkedInPost.id)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def move_original_content_to_blobs(session: AsyncSession, rows: List[Row]) -> None:
+    """
+    Move inline original content into content_blobs
+
+    Args:
+        session: Database session (caller commits)
+        rows: Rows from get_inline_posts
+    """
+    hashes = await put_blobs(session, (row.original_content for row in rows))
+    table = LinkedInPost.__table__
+    await session.execute(
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(original_content_hash=bindparam("blob_hash"), original_content=None),
+        [{"row_id": row.id, "blob_hash": blob_hash} for row, blob_hash in zip(rows, hashes)],
+    )
@@ -0,0 +1,105 @@
+"""
+Vector index over research memory for semantic retrieval
+Postgres (pgvector) in production, pure NumPy in-process for tests
+"""
+
+from functools import lru_cache
+from typing import Protocol
+
+import numpy as np
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.database.connection import AsyncSessionLocal
+from app.database.models import ResearchMemoryEmbedding
+
+settings = get_settings()
+
+
+class MemoryIndex(Protocol):
+    """Per-user nearest-neighbour index of research memory embeddings"""
+
+    async def add(self, user_id: str, memory_id: int, embedding: list[float]) -> None: ...
+
+    async def search(
+        self, user_id: str, embedding: list[float], top_k: int
+    ) -> list[tuple[int, float]]: ...
+
+
+class PostgresMemoryIndex:
+    """pgvector-backed index (cosine distance, exact per-user scan)"""
+
+    async def add(self, user_id: str, memory_id: int, embedding: list[float]) -> None:
+        async with AsyncSessionLocal() as session:
+            session.add(
+                ResearchMemoryEmbedding(
+                    research_memory_id=memory_id,
+                    user_id=user_id,
+                    embedding=embedding,
+                )
+            )
+            await session.commit()
+
+    async def search(
+        self, user_id: str, embedding: list[float], top_k: int
+    ) -> list[tuple[int, float]]:
+        # The shared HNSW index applies the user_id filter after its candidate list,
+        # so a small user's matches can be missed entirely. Each user has few
+        # embeddings: read them through the user_id btree and rank them exactly.
+        candidates = (
+            select(
+                ResearchMemoryEmbedding.research_memory_id,
+                ResearchMemoryEmbedding.embedding.cosine_distance(embedding).label("distance"),
+            )
+            .where(ResearchMemoryEmbedding.user_id == user_id)
+            .cte("candidates")
+            .prefix_with("MATERIALIZED")
+        )
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(candidates.c.research_memory_id, candidates.c.distance)
+                .order_by(candidates.c.distance)
+                .limit(top_k)
+            )
+            return [(row.research_memory_id, 1.0 - row.distance) for row in result]
+
+
+class NumpyMemoryIndex:
+    """In-process brute-force cosine index (tests and single-worker development)"""
+
+    def __init__(self):
+        self._ids: dict[str, list[int]] = {}
+        self._vectors: dict[str, np.ndarray] = {}
+
+    async def add(self, user_id: str, memory_id: int, embedding: list[float]) -> None:
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+
+        self._ids.setdefault(user_id, []).append(memory_id)
+        existing = self._vectors.get(user_id)
+        self._vectors[user_id] = (
+            vector[np.newaxis, :] if existing is None else np.vstack([existing, vector])
+        )
+
+    async def search(
+        self, user_id: str, embedding: list[float], top_k: int
+    ) -> list[tuple[int, float]]:
+        vectors = self._vectors.get(user_id)
+        if vectors is None:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+
+        similarities = vectors @ query
+        best = np.argsort(-similarities)[:top_k]
+        ids = self._ids[user_id]
+        return [(ids[i], float(similarities[i])) for i in best]
+
+
+@lru_cache()
+def get_memory_index() -> MemoryIndex:
+    """Get the configured memory index backend"""
+    if settings.MEMORY_VECTOR_BACKEND == "memory":
+        return NumpyMemoryIndex()
+    return PostgresMemoryIndex()
@@ -2,12 +2,32 @@
 Database models for long-term memory storage
 """
 
-from sqlalchemy import Column, String, Text, DateTime, Integer, JSON, Boolean, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, Integer, JSON, Boolean, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from pgvector.sqlalchemy import Vector
 from sqlalchemy.sql import func
 from datetime import datetime
 
 from app.database.connection import Base
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class ContentBlob(Base):
+    """Compressed, content-addressed text body shared by every row that stores it"""
+
+    __tablename__ = "content_blobs"
+
+    hash = Column(String(64), primary_key=True)  # sha256 of the uncompressed text
+    codec = Column(String(16), nullable=False)  # "zlib" or "zstd"
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)  # Uncompressed length in characters
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<ContentBlob(hash={self.hash}, codec={self.codec}, size={self.size})>"
 
 
 class ResearchMemory(Base):
@@ -18,7 +38,13 @@ class ResearchMemory(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String, nullable=False, index=True)
     query = Column(Text, nullable=False)
-    response = Column(Text, nullable=False)
+    # Full body lives in content_blobs; `response` is only set on legacy rows
+    response = Column(Text, nullable=True)
+    response_hash = Column(String(64), ForeignKey("content_blobs.hash"), nullable=True)
+    response_preview = Column(Text, nullable=True)  # First RESPONSE_PREVIEW_CHARS characters
+    response_length = Column(Integer, nullable=True)
+    # Weighted query (A) + full response (B) lexemes, written with the row
+    search_vector = Column(TSVECTOR().with_variant(Text(), "sqlite"), nullable=True)
     sources = Column(JSON, default=list)  # List of URLs/sources used
     extra_data = Column(JSON, default=dict)  # Additional metadata (renamed from metadata)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -26,6 +52,13 @@ class ResearchMemory(Base):
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
+    __table_args__ = (
+        # Keyset pagination and recent-memory lookups
+        Index("ix_research_memory_user_created_id", "user_id", created_at.desc(), id.desc()),
+        # Full-text search
+        Index("ix_research_memory_search_vector", search_vector, postgresql_using="gin"),
+    )
+
     def __repr__(self):
         return f"<ResearchMemory(id={self.id}, user_id={self.user_id}, query={self.query[:50]}...)>"
 
@@ -75,6 +108,11 @@ class ConversationHistory(Base):
     extra_data = Column(JSON, default=dict)  # Additional data (renamed from metadata)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Session context and session loads
+        Index("ix_conversation_history_user_session_created", "user_id", "session_id", "created_at"),
+    )
+
     def __repr__(self):
         return f"<ConversationHistory(id={self.id}, user_id={self.user_id}, role={self.role})>"
 
@@ -93,7 +131,9 @@ class LinkedInPost(Base):
 
     # Link to original research (optional FK)
     research_memory_id = Column(Integer, nullable=True)
-    original_content = Column(Text, nullable=False)
+    # Stored once per distinct text in content_blobs; inline column is legacy only
+    original_content = Column(Text, nullable=True)
+    original_content_hash = Column(String(64), ForeignKey("content_blobs.hash"), nullable=True)
 
     # Generated LinkedIn post components
     hook = Column(Text, nullable=False)
@@ -123,5 +163,70 @@ class LinkedInPost(Base):
     # Relationship to UserPreferences
     user_preferences = relationship("UserPreferences", back_populates="linkedin_posts")
 
+    __table_args__ = (
+        # Keyset pagination of post history
+        Index("ix_linkedin_posts_user_created_id", "user_id", created_at.desc(), id.desc()),
+    )
+
     def __repr__(self):
         return f"<LinkedInPost(id={self.id}, user_id={self.user_id}, character_count={self.character_count})>"
+
+
+class ResearchCache(Base):
+    """Persistent tier of the exact-match research result cache"""
+
+    __tablename__ = "research_cache"
+
+    # sha256 of normalized query + memory context fingerprint
+    cache_key = Column(String(64), primary_key=True)
+    query = Column(Text, nullable=False)
+    response = Column(Text, nullable=False)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<ResearchCache(cache_key={self.cache_key}, query={self.query[:50]}...)>"
+
+
+class ResearchMemoryEmbedding(Base):
+    """Vector index entry for semantic memory retrieval (pgvector)"""
+
+    __tablename__ = "research_memory_embeddings"
+
+    research_memory_id = Column(
+        Integer, ForeignKey("research_memory.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id = Column(String, nullable=False, index=True)
+    embedding = Column(Vector(settings.EMBEDDING_DIMENSIONS), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Approximate nearest-neighbour index for cosine distance
+        Index(
+            "ix_research_memory_embeddings_embedding_hnsw",
+            embedding,
+            postgresql_using="hnsw",
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
+
+    def __repr__(self):
+        return f"<ResearchMemoryEmbedding(research_memory_id={self.research_memory_id}, user_id={self.user_id})>"
+
+
+
+class UserMemorySummary(Base):
+    """Rolling summary of a user's older research memory (built by background compaction)"""
+
+    __tablename__ = "user_memory_summaries"
+
+    user_id = Column(String, primary_key=True)
+    summary = Column(Text, nullable=False)
+    # Highest research_memory.id folded into the summary; newer rows are still raw
+    summarized_through_id = Column(Integer, nullable=False)
+    memory_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<UserMemorySummary(user_id={self.user_id}, summarized_through_id={self.summarized_through_id})>"
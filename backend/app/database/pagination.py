@@ -0,0 +1,56 @@
+"""
+Keyset (cursor) pagination on (created_at, id)
+Cursors are opaque URL-safe strings; pages are read newest first and each page
+continues strictly after the last row of the previous one, so deep pages cost
+the same as the first (served by the (user_id, created_at DESC, id DESC) indexes).
+"""
+
+from datetime import datetime
+from typing import Optional
+import base64
+import json
+
+from sqlalchemy import Select, desc, tuple_
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode the position of a row as an opaque cursor"""
+    payload = json.dumps({"c": created_at.isoformat(), "i": row_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def paginate_newest_first(stmt: Select, model, cursor: Optional[str], limit: int) -> Select:
+    """
+    Order a statement newest first and start it after `cursor`
+
+    Fetches limit + 1 rows so the caller can tell whether another page exists.
+    """
+    stmt = stmt.order_by(desc(model.created_at), desc(model.id)).limit(limit + 1)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    return stmt
+
+
+def split_page(rows: list, limit: int) -> tuple[list, Optional[str]]:
+    """Trim the extra row fetched by paginate_newest_first and build the next cursor"""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last.created_at, last.id)
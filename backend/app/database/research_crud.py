@@ -0,0 +1,741 @@
+"""
+CRUD operations for research memory
+Read paths select only the columns they need and truncate responses in SQL.
+Full responses are stored compressed in content_blobs and decompressed here,
+so callers always see plain text.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (
+    Integer,
+    Text,
+    and_,
+    bindparam,
+    column,
+    desc,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from datetime import datetime
+import html
+import re
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from app.database.models import ResearchMemory, ResearchMemoryEmbedding, UserMemorySummary
+from app.database.pagination import paginate_newest_first, split_page
+from app.database.connection import AsyncSessionLocal
+from app.database.blob_store import put_blobs, get_blob_texts
+
+# Characters of each response kept inline for SQL-side snippets
+RESPONSE_PREVIEW_CHARS = 1000
+
+# Text search configuration and ts_headline options for search results
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+HIGHLIGHT_START, HIGHLIGHT_STOP = "<mark>", "</mark>"
+# ts_headline passes markup in the text through untouched, so it marks matches
+# with private-use sentinels and the text is HTML-escaped before they become tags
+HEADLINE_START, HEADLINE_STOP = "\ue000", "\ue001"
+HEADLINE_OPTIONS = (
+    f"StartSel={HEADLINE_START}, StopSel={HEADLINE_STOP}, MaxFragments=2, MaxWords=35, MinWords=15"
+)
+
+
+class SearchResultRow(NamedTuple):
+    """A ranked search hit with highlighted query and response snippet
+
+    query and snippet are HTML-escaped text with <mark> around matches.
+    """
+
+    id: int
+    query: str
+    snippet: str
+    rank: float
+    extra_data: Optional[dict]
+    created_at: datetime
+
+
+class ResearchMemoryRow(NamedTuple):
+    """A research memory with its response resolved to text"""
+
+    id: int
+    query: str
+    response: str
+    response_length: int
+    sources: Optional[list]
+    extra_data: Optional[dict]
+    created_at: datetime
+
+
+def response_snippet(length: int):
+    """SQL expression for the first `length` characters of the response
+
+    Reads the inline preview (or the full text on legacy rows), so `length`
+    should not exceed RESPONSE_PREVIEW_CHARS.
+    substr(text, 1, N) is equivalent to Postgres left(text, N) and also runs
+    on SQLite.
+    """
+    inline_text = func.coalesce(ResearchMemory.response, ResearchMemory.response_preview)
+    return func.substr(inline_text, 1, length)
+
+
+def response_length():
+    """SQL expression for the full response length in characters"""
+    return func.coalesce(ResearchMemory.response_length, func.length(ResearchMemory.response))
+
+
+def is_postgres(session: AsyncSession) -> bool:
+    """Whether the session is bound to Postgres (SQLite is used in tests)"""
+    return session.bind.dialect.name == "postgresql"
+
+
+def search_document(query, response):
+    """SQL expression for the weighted search vector: query (A) + response (B)"""
+    # Weights are inlined: a bound parameter is typed varchar, and setweight takes "char"
+    return func.setweight(func.to_tsvector(SEARCH_CONFIG, query), literal_column("'A'")).op("||")(
+        func.setweight(func.to_tsvector(SEARCH_CONFIG, response), literal_column("'B'"))
+    )
+
+
+async def resolve_responses(session: AsyncSession, rows: List[Row]) -> List[ResearchMemoryRow]:
+    """Replace blob references with full response text (one query for all rows)"""
+    texts = await get_blob_texts(session, (row.response_hash for row in rows))
+    return [
+        ResearchMemoryRow(
+            id=row.id,
+            query=row.query,
+            response=texts[row.response_hash] if row.response_hash else row.response,
+            response_length=row.response_length,
+            sources=row.sources,
+            extra_data=row.extra_data,
+            created_at=row.created_at,
+        )
+        for row in rows
+    ]
+
+
+async def get_memory_snippets(
+    session: AsyncSession,
+    user_id: str,
+    limit: int,
+    snippet_chars: int = 200,
+    memory_ids: Optional[List[int]] = None,
+) -> List[Row]:
+    """
+    Get query and truncated response for a user's memories, newest first
+
+    Args:
+        session: Database session
+        user_id: Clerk user ID
+        limit: Maximum number of rows
+        snippet_chars: Characters of the response to return
+        memory_ids: Optional set of memory IDs to restrict to
+
+    Returns:
+        Rows with id, query, response (truncated) and created_at
+    """
+    stmt = (
+        select(
+            ResearchMemory.id,
+            ResearchMemory.query,
+            response_snippet(snippet_chars).label("response"),
+            ResearchMemory.created_at,
+        )
+        .where(ResearchMemory.user_id == user_id)
+        # Same order as the (user_id, created_at DESC, id DESC) index
+        .order_by(desc(ResearchMemory.created_at), desc(ResearchMemory.id))
+        .limit(limit)
+    )
+    if memory_ids is not None:
+        stmt = stmt.where(ResearchMemory.id.in_(memory_ids))
+
+    result = await session.execute(stmt)
+    return result.all()
+
+
+async def get_unembedded_memories(
+    session: AsyncSession,
+    after_id: int,
+    limit: int,
+    snippet_chars: int = RESPONSE_PREVIEW_CHARS,
+) -> List[Row]:
+    """
+    Memories (any user) that have no embedding yet, in ID order
+
+    Args:
+        session: Database session
+        after_id: Only rows with a higher ID (keyset position)
+        limit: Maximum number of rows
+        snippet_chars: Characters of each response to return
+
+    Returns:
+        Rows with id, user_id, query and response (truncated)
+    """
+    embedded = select(ResearchMemoryEmbedding.research_memory_id).where(
+        ResearchMemoryEmbedding.research_memory_id == ResearchMemory.id
+    )
+    result = await session.execute(
+        select(
+            ResearchMemory.id,
+            ResearchMemory.user_id,
+            ResearchMemory.query,
+            response_snippet(snippet_chars).label("response"),
+        )
+        .where(ResearchMemory.id > after_id)
+        .where(~embedded.exists())
+        .order_by(ResearchMemory.id)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def get_research_history(
+    session: AsyncSession,
+    user_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    snippet_chars: Optional[int] = None,
+) -> Tuple[List[Row], Optional[str]]:
+    """
+    Get one page of research history rows for a user, newest first
+
+    Args:
+        session: Database session
+        user_id: Clerk user ID
+        limit: Maximum number of rows in the page
+        cursor: Cursor returned with the previous page (None for the first page)
+        snippet_chars: If set, return only this many characters of each response
+            (summary mode); full bodies can then be fetched per item
+
+    Returns:
+        Tuple of (ResearchMemoryRow list; cursor for the next page or None)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    summary = snippet_chars is not None
+    response_column = (
+        response_snippet(snippet_chars) if summary else ResearchMemory.response
+    )
+    columns = [
+        ResearchMemory.id,
+        ResearchMemory.query,
+        response_column.label("response"),
+        response_length().label("response_length"),
+        ResearchMemory.sources,
+        ResearchMemory.extra_data,
+        ResearchMemory.created_at,
+    ]
+    if not summary:
+        columns.append(ResearchMemory.response_hash)
+    stmt = select(*columns).where(ResearchMemory.user_id == user_id)
+
+    result = await session.execute(paginate_newest_first(stmt, ResearchMemory, cursor, limit))
+    rows, next_cursor = split_page(result.all(), limit)
+    if summary:
+        # Snippets come from the inline preview; the blobs aren't loaded
+        return [ResearchMemoryRow(**row._mapping) for row in rows], next_cursor
+    return await resolve_responses(session, rows), next_cursor
+
+
+async def get_inline_memories(
+    session: AsyncSession,
+    after_id: int,
+    limit: int,
+) -> List[Row]:
+    """
+    Memories (any user) whose response is still stored inline, in ID order
+
+    Args:
+        session: Database session
+        after_id: Only rows with a higher ID (keyset position)
+        limit: Maximum number of rows
+
+    Returns:
+        Rows with id and response
+    """
+    result = await session.execute(
+        select(ResearchMemory.id, ResearchMemory.response)
+        .where(ResearchMemory.id > after_id)
+        .where(ResearchMemory.response.is_not(None))
+        .where(ResearchMemory.response_hash.is_(None))
+        .order_by(ResearchMemory.id)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def move_responses_to_blobs(session: AsyncSession, rows: List[Row]) -> None:
+    """
+    Move inline responses into content_blobs, keeping the preview and length
+
+    The search vector was built from the full text at insert and is left as is.
+
+    Args:
+        session: Database session (caller commits)
+        rows: Rows from get_inline_memories
+    """
+    hashes = await put_blobs(session, (row.response for row in rows))
+    table = ResearchMemory.__table__
+    await session.execute(
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(
+            response=None,
+            response_hash=bindparam("blob_hash"),
+            response_preview=bindparam("preview"),
+            response_length=bindparam("length"),
+        ),
+        [
+            {
+                "row_id": row.id,
+                "blob_hash": blob_hash,
+                "preview": row.response[:RESPONSE_PREVIEW_CHARS],
+                "length": len(row.response),
+            }
+            for row, blob_hash in zip(rows, hashes)
+        ],
+    )
+
+
+async def insert_research_memories(
+    session: AsyncSession,
+    memories: List[Dict[str, Any]],
+) -> List[int]:
+    """
+    Insert many research memories in one multi-row INSERT
+
+    Args:
+        session: Database session (caller commits)
+        memories: Column values for each row (user_id, query, response,
+            sources, extra_data)
+
+    Returns:
+        IDs of the new rows, in the same order as `memories`
+    """
+    # Bodies go to content_blobs (deduplicated); rows keep a preview and the hash
+    response_hashes = await put_blobs(session, (memory["response"] for memory in memories))
+    rows = [
+        {
+            **memory,
+            "response": None,
+            "response_hash": response_hash,
+            "response_preview": memory["response"][:RESPONSE_PREVIEW_CHARS],
+            "response_length": len(memory["response"]),
+        }
+        for memory, response_hash in zip(memories, response_hashes)
+    ]
+    table = ResearchMemory.__table__
+    stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    if is_postgres(session):
+        # The search vector is built from the full text, which only the insert sees
+        stmt = stmt.values(
+            search_vector=search_document(bindparam("search_query"), bindparam("search_response"))
+        )
+        for row, memory in zip(rows, memories):
+            row["search_query"] = memory["query"]
+            row["search_response"] = memory["response"]
+
+    result = await session.execute(stmt, rows)
+    return list(result.scalars().all())
+
+
+async def stream_research_memories(
+    session: AsyncSession,
+    user_id: str,
+    batch_size: int = 500,
+) -> AsyncIterator[List[ResearchMemoryRow]]:
+    """
+    Stream all of a user's research memories, oldest first, in batches
+
+    Uses a server-side cursor (yield_per), so memory use is bounded by
+    batch_size regardless of history length.
+
+    Args:
+        session: Database session (must stay open while iterating)
+        user_id: Clerk user ID
+        batch_size: Rows fetched per round trip
+
+    Yields:
+        Batches of ResearchMemoryRow with full responses
+    """
+    result = await session.stream(
+        select(
+            ResearchMemory.id,
+            ResearchMemory.query,
+            ResearchMemory.response,
+            ResearchMemory.response_hash,
+            response_length().label("response_length"),
+            ResearchMemory.sources,
+            ResearchMemory.extra_data,
+            ResearchMemory.created_at,
+        )
+        .where(ResearchMemory.user_id == user_id)
+        .order_by(ResearchMemory.created_at, ResearchMemory.id)
+        .execution_options(yield_per=batch_size)
+    )
+    # Blobs are resolved on a second connection while the cursor stays open
+    async with AsyncSessionLocal() as blob_session:
+        async for partition in result.partitions():
+            yield await resolve_responses(blob_session, partition)
+
+
+async def get_full_responses(
+    session: AsyncSession,
+    user_id: str,
+    memory_ids: List[int],
+) -> Dict[int, str]:
+    """
+    Full response text for several memories (one query plus one blob lookup)
+
+    Args:
+        session: Database session
+        user_id: Clerk user ID (for security)
+        memory_ids: Research memory IDs
+
+    Returns:
+        Mapping of memory ID to full response (missing IDs are left out)
+    """
+    if not memory_ids:
+        return {}
+
+    result = await session.execute(
+        select(ResearchMemory.id, ResearchMemory.response, ResearchMemory.response_hash)
+        .where(ResearchMemory.id.in_(memory_ids))
+        .where(ResearchMemory.user_id == user_id)
+    )
+    rows = result.all()
+    texts = await get_blob_texts(session, (row.response_hash for row in rows))
+    return {
+        row.id: texts[row.response_hash] if row.response_hash else row.response
+        for row in rows
+    }
+
+
+async def get_research_memory_by_id(
+    session: AsyncSession,
+    memory_id: int,
+    user_id: str,
+) -> Optional[ResearchMemoryRow]:
+    """
+    Get a single research memory with its full response
+
+    Args:
+        session: Database session
+        memory_id: Research memory ID
+        user_id: Clerk user ID (for security)
+
+    Returns:
+        ResearchMemoryRow or None
+    """
+    result = await session.execute(
+        select(
+            ResearchMemory.id,
+            ResearchMemory.query,
+            ResearchMemory.response,
+            ResearchMemory.response_hash,
+            response_length().label("response_length"),
+            ResearchMemory.sources,
+            ResearchMemory.extra_data,
+            ResearchMemory.created_at,
+        )
+        .where(ResearchMemory.id == memory_id)
+        .where(ResearchMemory.user_id == user_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    return (await resolve_responses(session, [row]))[0]
+
+
+async def get_memory_summary(
+    session: AsyncSession,
+    user_id: str,
+) -> Optional[UserMemorySummary]:
+    """Get the rolling memory summary for a user, if one has been built"""
+    result = await session.execute(
+        select(UserMemorySummary).where(UserMemorySummary.user_id == user_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_users_pending_compaction(
+    session: AsyncSession,
+    keep_recent: int,
+    min_batch: int,
+    limit: int = 100,
+) -> List[str]:
+    """
+    Users with at least `min_batch` unsummarized memories beyond the recent window
+
+    Args:
+        session: Database session
+        keep_recent: Number of newest memories per user that stay raw
+        min_batch: Minimum number of older unsummarized memories worth a compaction
+        limit: Maximum number of users to return
+
+    Returns:
+        Clerk user IDs
+    """
+    summarized_through = func.coalesce(UserMemorySummary.summarized_through_id, 0)
+    result = await session.execute(
+        select(ResearchMemory.user_id)
+        .outerjoin(UserMemorySummary, UserMemorySummary.user_id == ResearchMemory.user_id)
+        .where(ResearchMemory.id > summarized_through)
+        .group_by(ResearchMemory.user_id)
+        .having(func.count() >= keep_recent + min_batch)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def get_memories_to_compact(
+    session: AsyncSession,
+    user_id: str,
+    after_id: int,
+    keep_recent: int,
+    limit: int,
+    snippet_chars: int,
+) -> List[Row]:
+    """
+    Oldest unsummarized memories for a user, excluding the newest `keep_recent`
+
+    Args:
+        session: Database session
+        user_id: Clerk user ID
+        after_id: Only rows with a higher ID (the summary's watermark)
+        keep_recent: Number of newest rows to leave out
+        limit: Maximum number of rows
+        snippet_chars: Characters of each response to return
+
+    Returns:
+        Rows with id, query and response (truncated), oldest first
+    """
+    recent_ids = (
+        select(ResearchMemory.id)
+        .where(ResearchMemory.user_id == user_id)
+        .order_by(desc(ResearchMemory.id))
+        .limit(keep_recent)
+    )
+    result = await session.execute(
+        select(
+            ResearchMemory.id,
+            ResearchMemory.query,
+            response_snippet(snippet_chars).label("response"),
+        )
+        .where(ResearchMemory.user_id == user_id)
+        .where(ResearchMemory.id > after_id)
+        .where(ResearchMemory.id.not_in(recent_ids.scalar_subquery()))
+        .order_by(ResearchMemory.id)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def save_memory_summary(
+    session: AsyncSession,
+    user_id: str,
+    summary: str,
+    summarized_through_id: int,
+    added_count: int,
+) -> None:
+    """
+    Create or advance a user's memory summary
+
+    The update only applies if it moves the watermark forward, so a concurrent
+    compaction of the same rows (e.g. from another worker) can't roll it back.
+    """
+    stmt = pg_insert(UserMemorySummary).values(
+        user_id=user_id,
+        summary=summary,
+        summarized_through_id=summarized_through_id,
+        memory_count=added_count,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserMemorySummary.user_id],
+        set_={
+            "summary": stmt.excluded.summary,
+            "summarized_through_id": stmt.excluded.summarized_through_id,
+            "memory_count": UserMemorySummary.memory_count + stmt.excluded.memory_count,
+            "updated_at": func.now(),
+        },
+        where=UserMemorySummary.summarized_through_id < stmt.excluded.summarized_through_id,
+    )
+    await session.execute(stmt)
+
+
+async def search_research_memories(
+    session: AsyncSession,
+    user_id: str,
+    text: str,
+    limit: int = 20,
+) -> List[SearchResultRow]:
+    """
+    Full-text search over a user's research history, best matches first
+
+    Args:
+        session: Database session
+        user_id: Clerk user ID
+        text: Search text (web search syntax: quotes, OR, -exclusions)
+        limit: Maximum number of results
+
+    Returns:
+        SearchResultRow list with HTML-escaped, <mark>-highlighted query and
+        snippet. The snippet comes from the response preview, or from the full
+        body when the only matches are past the preview.
+
+    Databases without tsvector (SQLite in tests) use a substring fallback that
+    only searches the query and the first RESPONSE_PREVIEW_CHARS characters
+    of the response; matches further into the body are not found there.
+    """
+    if not is_postgres(session):
+        return await _search_research_memories_fallback(session, user_id, text, limit)
+
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+    rank = func.ts_rank_cd(ResearchMemory.search_vector, ts_query)
+
+    # Rank and limit through the GIN index first, highlight only the page
+    matches = (
+        select(ResearchMemory.id, rank.label("rank"))
+        .where(ResearchMemory.user_id == user_id)
+        .where(ResearchMemory.search_vector.bool_op("@@")(ts_query))
+        .order_by(desc("rank"), desc(ResearchMemory.created_at))
+        .limit(limit)
+        .subquery()
+    )
+    inline_text = func.coalesce(ResearchMemory.response, ResearchMemory.response_preview)
+    result = await session.execute(
+        select(
+            ResearchMemory.id,
+            func.ts_headline(SEARCH_CONFIG, ResearchMemory.query, ts_query, HEADLINE_OPTIONS).label("query"),
+            func.ts_headline(SEARCH_CONFIG, inline_text, ts_query, HEADLINE_OPTIONS).label("snippet"),
+            ResearchMemory.response_hash,
+            matches.c.rank,
+            ResearchMemory.extra_data,
+            ResearchMemory.created_at,
+        )
+        .join(matches, matches.c.id == ResearchMemory.id)
+        .order_by(desc(matches.c.rank), desc(ResearchMemory.created_at))
+    )
+    rows = result.all()
+
+    # Hits whose preview has no match matched further into the body: headline
+    # the full text of just those rows, in one round trip
+    body_snippets = {}
+    unmatched = [row for row in rows if row.response_hash and HEADLINE_START not in row.snippet]
+    if unmatched:
+        texts = await get_blob_texts(session, (row.response_hash for row in unmatched))
+        bodies = values(column("id", Integer), column("body", Text), name="bodies").data(
+            [(row.id, texts[row.response_hash]) for row in unmatched if row.response_hash in texts]
+        )
+        body_result = await session.execute(
+            select(
+                bodies.c.id,
+                func.ts_headline(SEARCH_CONFIG, bodies.c.body, ts_query, HEADLINE_OPTIONS),
+            )
+        )
+        body_snippets = dict(body_result.all())
+
+    return [
+        SearchResultRow(
+            id=row.id,
+            query=_headline_markup(row.query),
+            snippet=_headline_markup(body_snippets.get(row.id, row.snippet)),
+            rank=row.rank,
+            extra_data=row.extra_data,
+            created_at=row.created_at,
+        )
+        for row in rows
+    ]
+
+
+def _headline_markup(headline: str) -> str:
+    """HTML-escape ts_headline output, then turn its sentinels into <mark> tags"""
+    return (
+        html.escape(headline)
+        .replace(HEADLINE_START, HIGHLIGHT_START)
+        .replace(HEADLINE_STOP, HIGHLIGHT_STOP)
+    )
+
+
+def _highlight(text: str, terms: List[str], context_chars: int = 120) -> str:
+    """HTML-escape text and mark every term, trimmed to a window around the first match"""
+    lowered = text.lower()
+    positions = [lowered.find(term) for term in terms if term in lowered]
+    start = max(0, min(positions) - context_chars) if positions else 0
+    window = text[start:start + context_chars * 3]
+    lowered = window.lower()
+
+    # Collect match spans on the plain text first so markers never match terms
+    spans = sorted(
+        (match.start(), match.end())
+        for term in terms
+        for match in re.finditer(re.escape(term), lowered)
+    )
+    parts, cursor = [], 0
+    for span_start, span_end in spans:
+        if span_start < cursor:
+            continue
+        parts.append(html.escape(window[cursor:span_start]))
+        parts.append(f"{HIGHLIGHT_START}{html.escape(window[span_start:span_end])}{HIGHLIGHT_STOP}")
+        cursor = span_end
+    parts.append(html.escape(window[cursor:]))
+    return "".join(parts)
+
+
+async def _search_research_memories_fallback(
+    session: AsyncSession,
+    user_id: str,
+    text: str,
+    limit: int,
+) -> List[SearchResultRow]:
+    """Substring search over query and preview for databases without tsvector (SQLite tests)"""
+    terms = [term.lower() for term in text.split() if term]
+    if not terms:
+        return []
+
+    inline_text = func.coalesce(ResearchMemory.response, ResearchMemory.response_preview)
+    result = await session.execute(
+        select(
+            ResearchMemory.id,
+            ResearchMemory.query,
+            inline_text.label("response"),
+            ResearchMemory.extra_data,
+            ResearchMemory.created_at,
+        )
+        .where(ResearchMemory.user_id == user_id)
+        .where(
+            and_(
+                *(
+                    or_(ResearchMemory.query.ilike(f"%{term}%"), inline_text.ilike(f"%{term}%"))
+                    for term in terms
+                )
+            )
+        )
+        .order_by(desc(ResearchMemory.created_at), desc(ResearchMemory.id))
+        .limit(limit)
+    )
+    hits = [
+        SearchResultRow(
+            id=row.id,
+            query=_highlight(row.query, terms),
+            snippet=_highlight(row.response or "", terms),
+            # Query matches weigh double, like the A/B weights of the search vector
+            rank=float(
+                sum(
+                    2 * row.query.lower().count(term) + (row.response or "").lower().count(term)
+                    for term in terms
+                )
+            ),
+            extra_data=row.extra_data,
+            created_at=row.created_at,
+        )
+        for row in result
+    ]
+    return sorted(hits, key=lambda hit: hit.rank, reverse=True)
@@ -8,7 +8,13 @@ from contextlib import asynccontextmanager
 
 from app.config import get_settings
 from app.database.connection import init_db, close_db
-from app.api.routes import agent, auth, linkedin
+from app.agent.arxiv_client import close_http_client as close_arxiv_client
+from app.middleware.auth import close_clerk_http_client, get_jwks_store
+from app.agent.tools import get_memory_writer
+from app.services.memory_compaction import start_memory_compaction, stop_memory_compaction
+from app.services.research_cache import start_cache_cleanup, stop_cache_cleanup
+from app.api.routes import agent, auth, export, linkedin
+from app.services import metrics
 
 
 settings = get_settings()
@@ -24,8 +30,26 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️ Database connection failed: {e}")
         print("⚠️ App will start without database - please check DATABASE_URL")
+    # Signing keys are in memory before the first request
+    try:
+        await get_jwks_store().start()
+    except ValueError as e:
+        print(f"⚠️ Clerk JWKS not configured: {e}")
+    get_memory_writer().start()
+    start_memory_compaction()
+    start_cache_cleanup()
     yield
     # Shutdown
+    await stop_memory_compaction()
+    await stop_cache_cleanup()
+    # Flush queued memory writes before the engine is disposed
+    await get_memory_writer().close()
+    await close_arxiv_client()
+    await close_clerk_http_client()
+    try:
+        await get_jwks_store().close()
+    except ValueError:
+        pass
     try:
         await close_db()
     except Exception as e:
@@ -54,6 +78,7 @@ app.add_middleware(
 app.include_router(agent.router, prefix="/api", tags=["agent"])
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(linkedin.router, prefix="/api/linkedin", tags=["linkedin"])
+app.include_router(export.router, prefix="/api/export", tags=["export"])
 
 
 @app.get("/")
@@ -72,6 +97,12 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """In-process counters, gauges and timings"""
+    return metrics.snapshot()
+
+
 if __name__ == "__main__":
     import multiprocessing
     multiprocessing.freeze_support()  # Required for Windows multiprocessing
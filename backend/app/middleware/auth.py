@@ -6,17 +6,38 @@ from fastapi import Request, HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import Optional, List, Dict
+import asyncio
+import hashlib
+import time
 import httpx
 import jwt
-from jwt import PyJWKClient
 from functools import lru_cache
 
 from app.config import get_settings
+from app.middleware.jwks import JWKSStore
+from app.services.cache import TTLCache
+from app.services import metrics
 
 settings = get_settings()
 # Set auto_error=False to handle missing auth gracefully
 security = HTTPBearer(auto_error=False)
 
+# Verified tokens: sha256(token) -> decoded claims, each entry expiring at the token's exp
+_verified_tokens = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_MAX_ENTRIES)
+# Key IDs in the current JWKS; a removed key clears the cache
+_active_kids: set[str] = set()
+
+_clerk_http_client: Optional[httpx.AsyncClient] = None
+# Clerk profiles: user_id -> (fetched_at, profile), kept until the stale window ends
+_profile_cache = TTLCache(
+    maxsize=settings.CLERK_PROFILE_CACHE_MAX_ENTRIES,
+    ttl=settings.CLERK_PROFILE_CACHE_STALE_SECONDS,
+)
+_profile_fetches: dict[str, asyncio.Task] = {}
+
+# Claims that must be present in the session token for claims-only auth
+CLAIMS_REQUIRED = ("sub", "email")
+
 
 class ClerkUserData(BaseModel):
     """Structured Clerk user data from JWT token"""
@@ -31,11 +52,13 @@ class ClerkUserData(BaseModel):
     updated_at: Optional[int] = None
 
 
-@lru_cache()
-def get_jwks_client() -> PyJWKClient:
-    """Get cached JWKS client for Clerk public keys"""
+def clerk_jwks_url() -> str:
+    """JWKS URL: CLERK_JWKS_URL if set, otherwise derived from the publishable key"""
     import base64
 
+    if settings.CLERK_JWKS_URL:
+        return settings.CLERK_JWKS_URL
+
     # Extract the Clerk instance domain from the publishable key
     # Format: pk_test_<base64-encoded-domain> or pk_live_<base64-encoded-domain>
     publishable_key = settings.CLERK_PUBLISHABLE_KEY
@@ -62,36 +85,81 @@ def get_jwks_client() -> PyJWKClient:
         clerk_domain = "clerk.accounts.dev"
 
     # Construct JWKS URL
-    jwks_url = f"https://{clerk_domain}/.well-known/jwks.json"
+    return f"https://{clerk_domain}/.well-known/jwks.json"
 
-    return PyJWKClient(jwks_url)
 
+@lru_cache()
+def get_jwks_store() -> JWKSStore:
+    """Get the process-wide async JWKS store for Clerk public keys"""
+    return JWKSStore(
+        clerk_jwks_url(),
+        refresh_interval=settings.CLERK_JWKS_REFRESH_SECONDS,
+        on_keys_changed=sync_active_keys,
+    )
 
-async def verify_clerk_token(token: str) -> str:
+
+def token_cache_key(token: str) -> str:
+    """Cache key for a token (the raw token is never kept in memory)"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def sync_active_keys(kids: set[str]) -> None:
+    """Record the JWKS key IDs after each fetch; if any key was removed, drop every cached token"""
+    global _active_kids
+    if _active_kids - kids:
+        print("🔑 Clerk signing key rotated, clearing verified token cache")
+        _verified_tokens.clear()
+    _active_kids = kids
+
+
+def cache_verified_token(token: str, payload: dict) -> None:
+    """Cache decoded claims until the token's exp"""
+    ttl = payload.get("exp", 0) - time.time()
+    if settings.AUTH_TOKEN_CACHE_ENABLED and ttl > 0:
+        _verified_tokens.set(token_cache_key(token), payload, ttl=ttl)
+
+
+async def decode_clerk_token(token: str) -> dict:
+    """Full verification: JWKS key lookup and RS256 signature, exp and iat checks"""
+    # Get the signing key from the in-memory JWKS (no network I/O unless the kid is new)
+    kid = jwt.get_unverified_header(token).get("kid")
+    signing_key = await get_jwks_store().get_signing_key(kid)
+
+    # Verify and decode the JWT token
+    return jwt.decode(
+        token,
+        signing_key.key,
+        algorithms=["RS256"],
+        options={
+            "verify_signature": True,
+            "verify_exp": True,
+            "verify_iat": True,
+        }
+    )
+
+
+async def verify_clerk_claims(token: str) -> dict:
     """
-    Verify Clerk JWT token using JWKS and return user ID
+    Verify Clerk JWT token using JWKS and return its claims
+
+    Tokens already verified are served from an in-process cache until they
+    expire, skipping the key lookup and signature check.
 
     Returns:
-        str: The user ID (from 'sub' claim)
+        dict: Decoded token claims (always including 'sub')
     """
     try:
-        # Get the JWKS client
-        jwks_client = get_jwks_client()
-
-        # Get the signing key from the JWKS
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
-
-        # Verify and decode the JWT token
-        payload = jwt.decode(
-            token,
-            signing_key.key,
-            algorithms=["RS256"],
-            options={
-                "verify_signature": True,
-                "verify_exp": True,
-                "verify_iat": True,
-            }
+        payload = (
+            _verified_tokens.get(token_cache_key(token))
+            if settings.AUTH_TOKEN_CACHE_ENABLED
+            else None
         )
+        if payload is not None:
+            metrics.increment("auth_token_cache_hits")
+        else:
+            metrics.increment("auth_token_cache_misses")
+            payload = await decode_clerk_token(token)
+            cache_verified_token(token, payload)
 
         # Extract user ID from the token
         user_id = payload.get("sub")
@@ -103,8 +171,10 @@ async def verify_clerk_token(token: str) -> str:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        return user_id
+        return payload
 
+    except HTTPException:
+        raise
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -117,6 +187,12 @@ async def verify_clerk_token(token: str) -> str:
             detail=f"Invalid token: {str(e)}",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    except httpx.HTTPError:
+        # The signing keys could not be fetched; the token itself may be fine
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Clerk signing keys unavailable. Please try again.",
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -125,6 +201,41 @@ async def verify_clerk_token(token: str) -> str:
         )
 
 
+async def verify_clerk_token(token: str) -> str:
+    """
+    Verify Clerk JWT token using JWKS and return user ID
+
+    Returns:
+        str: The user ID (from 'sub' claim)
+    """
+    return (await verify_clerk_claims(token))["sub"]
+
+
+def get_clerk_http_client() -> httpx.AsyncClient:
+    """Get the process-wide pooled HTTP/2 client for the Clerk Backend API"""
+    global _clerk_http_client
+    if _clerk_http_client is None or _clerk_http_client.is_closed:
+        _clerk_http_client = httpx.AsyncClient(
+            base_url=settings.CLERK_API_URL,
+            headers={
+                "Authorization": f"Bearer {settings.CLERK_SECRET_KEY}",
+                "Content-Type": "application/json",
+            },
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _clerk_http_client
+
+
+async def close_clerk_http_client():
+    """Close the pooled Clerk client (called on application shutdown)"""
+    global _clerk_http_client
+    if _clerk_http_client is not None:
+        await _clerk_http_client.aclose()
+        _clerk_http_client = None
+
+
 async def fetch_clerk_user_details(user_id: str) -> dict:
     """
     Fetch full user details from Clerk API using Secret Key
@@ -136,33 +247,26 @@ async def fetch_clerk_user_details(user_id: str) -> dict:
         dict: Full user data from Clerk API
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"https://api.clerk.com/v1/users/{user_id}",
-                headers={
-                    "Authorization": f"Bearer {settings.CLERK_SECRET_KEY}",
-                    "Content-Type": "application/json",
-                },
-            )
+        response = await get_clerk_http_client().get(f"/users/{user_id}")
 
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 401:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid Clerk Secret Key",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            elif response.status_code == 404:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"User {user_id} not found in Clerk",
-                )
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to fetch user from Clerk API: {response.status_code}",
-                )
+        if response.status_code == 200:
+            return response.json()
+        elif response.status_code == 401:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid Clerk Secret Key",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        elif response.status_code == 404:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User {user_id} not found in Clerk",
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to fetch user from Clerk API: {response.status_code}",
+            )
     except HTTPException:
         raise
     except httpx.TimeoutException:
@@ -177,6 +281,88 @@ async def fetch_clerk_user_details(user_id: str) -> dict:
         )
 
 
+async def _load_profile(user_id: str) -> dict:
+    """Fetch a profile from Clerk and cache it"""
+    profile = await fetch_clerk_user_details(user_id)
+    _profile_cache.set(user_id, (time.monotonic(), profile))
+    return profile
+
+
+def _start_profile_fetch(user_id: str) -> asyncio.Task:
+    """Start (or join) the single in-flight fetch for a user"""
+    task = _profile_fetches.get(user_id)
+    if task is None:
+        task = asyncio.create_task(_load_profile(user_id))
+        _profile_fetches[user_id] = task
+        task.add_done_callback(lambda _: _profile_fetches.pop(user_id, None))
+    return task
+
+
+def _log_refresh_failure(task: asyncio.Task, user_id: str):
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is None:
+        return
+    if isinstance(error, HTTPException) and error.status_code == 404:
+        _profile_cache.pop(user_id)
+    print(f"Clerk profile refresh error for user {user_id}: {getattr(error, 'detail', error)}")
+
+
+async def get_clerk_user_profile(user_id: str) -> dict:
+    """
+    Clerk user profile, cached with stale-while-revalidate
+
+    Fresh entries (younger than CLERK_PROFILE_CACHE_TTL_SECONDS) are returned
+    directly. Stale ones (up to CLERK_PROFILE_CACHE_STALE_SECONDS) are returned
+    immediately while one background fetch refreshes them. Misses wait for a
+    fetch shared by every concurrent request for the same user.
+    """
+    entry = _profile_cache.get(user_id) if settings.CLERK_PROFILE_CACHE_ENABLED else None
+    if entry is not None:
+        fetched_at, profile = entry
+        if time.monotonic() - fetched_at >= settings.CLERK_PROFILE_CACHE_TTL_SECONDS:
+            if user_id not in _profile_fetches:
+                metrics.increment("clerk_profile_cache_refreshes")
+                task = _start_profile_fetch(user_id)
+                task.add_done_callback(lambda done: _log_refresh_failure(done, user_id))
+        metrics.increment("clerk_profile_cache_hits")
+        return profile
+
+    metrics.increment("clerk_profile_cache_misses")
+    if not settings.CLERK_PROFILE_CACHE_ENABLED:
+        return await fetch_clerk_user_details(user_id)
+    # Shielded so one cancelled request doesn't cancel the fetch for the others
+    return await asyncio.shield(_start_profile_fetch(user_id))
+
+
+def invalidate_clerk_user_profile(user_id: str):
+    """Drop a cached profile so the next lookup fetches it from Clerk"""
+    _profile_cache.pop(user_id)
+
+
+def user_from_claims(claims: dict) -> Optional[ClerkUserData]:
+    """
+    Build user data from verified session token claims
+
+    Expects a Clerk session token template with email, first_name, last_name
+    and username claims. Returns None if a required claim is missing, so the
+    caller can fall back to the Clerk API.
+    """
+    if any(not claims.get(claim) for claim in CLAIMS_REQUIRED):
+        return None
+
+    email = claims["email"]
+    return ClerkUserData(
+        id=claims["sub"],
+        email=email,
+        first_name=claims.get("first_name"),
+        last_name=claims.get("last_name"),
+        username=claims.get("username"),
+        email_addresses=[{"email_address": email}],
+    )
+
+
 async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
 ) -> ClerkUserData:
@@ -188,11 +374,20 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Step 1: Verify the JWT token and get user ID
-    user_id = await verify_clerk_token(credentials.credentials)
+    # Step 1: Verify the JWT token
+    claims = await verify_clerk_claims(credentials.credentials)
+    user_id = claims["sub"]
+
+    # Claims mode: the session token template carries the profile, no HTTP call
+    if settings.CLERK_AUTH_MODE == "claims":
+        user = user_from_claims(claims)
+        if user is not None:
+            metrics.increment("auth_claims_only")
+            return user
+        metrics.increment("auth_claims_fallback")
 
-    # Step 2: Fetch full user details from Clerk API
-    user_data = await fetch_clerk_user_details(user_id)
+    # Step 2: Fetch full user details from Clerk API (cached per user)
+    user_data = await get_clerk_user_profile(user_id)
 
     # Step 3: Extract primary email
     primary_email = None
@@ -219,6 +414,19 @@ async def get_current_user(
     )
 
 
+async def get_current_user_fresh(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+) -> ClerkUserData:
+    """
+    Like get_current_user, but refetches the Clerk profile instead of serving
+    it from cache (for /auth/sync-user, which runs on login and so should see
+    profile edits right away)
+    """
+    if credentials:
+        invalidate_clerk_user_profile(await verify_clerk_token(credentials.credentials))
+    return await get_current_user(credentials)
+
+
 async def get_user_id(request: Request) -> Optional[str]:
     """Extract user ID from request (for dependency injection)"""
     try:
@@ -0,0 +1,123 @@
+"""
+Async JWKS key store for Clerk token verification
+Keys are prefetched at startup and refreshed in the background, so requests
+only read an in-memory dict. An unknown `kid` triggers one shared refetch
+(throttled once keys are loaded). Fetch failures raise httpx.HTTPError.
+"""
+
+from typing import Callable, Optional
+import asyncio
+import time
+
+import httpx
+import jwt
+from jwt import PyJWK, PyJWKSet
+
+# Minimum seconds between refetches triggered by unknown key IDs
+UNKNOWN_KID_REFETCH_INTERVAL = 10.0
+
+
+class JWKSStore:
+    """In-memory signing keys by kid, fetched asynchronously"""
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: float,
+        on_keys_changed: Optional[Callable[[set[str]], None]] = None,
+        timeout: float = 5.0,
+    ):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.on_keys_changed = on_keys_changed
+        self.timeout = timeout
+        self._keys: dict[str, PyJWK] = {}
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._fetch_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._last_unknown_refetch = 0.0
+
+    def load(self, jwks: dict) -> None:
+        """Replace the key set with a parsed JWKS document"""
+        key_set = PyJWKSet.from_dict(jwks)
+        self._keys = {key.key_id: key for key in key_set.keys if key.key_id}
+        if self.on_keys_changed:
+            self.on_keys_changed(set(self._keys))
+
+    async def _fetch(self) -> None:
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(timeout=self.timeout)
+        response = await self._http_client.get(self.url)
+        response.raise_for_status()
+        self.load(response.json())
+        print(f"🔑 Loaded {len(self._keys)} Clerk signing key(s)")
+
+    async def refresh(self) -> None:
+        """Fetch the key set; concurrent callers share one request"""
+        if self._fetch_task is None or self._fetch_task.done():
+            self._fetch_task = asyncio.create_task(self._fetch())
+        await asyncio.shield(self._fetch_task)
+
+    async def get_signing_key(self, kid: Optional[str]) -> PyJWK:
+        """
+        Signing key for a token's kid
+
+        Raises:
+            jwt.InvalidTokenError: If the kid is missing or not in the key set
+                (even after a refetch)
+            httpx.HTTPError: If a needed refetch fails
+        """
+        if not kid:
+            raise jwt.InvalidTokenError("Token header has no kid")
+
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        # Possibly a newly rotated key; refetch, but not once per bogus token.
+        # A fetch already in flight is always joined, and with no keys loaded
+        # yet (the prefetch failed) every lookup retries
+        fetch_in_flight = self._fetch_task is not None and not self._fetch_task.done()
+        if (
+            fetch_in_flight
+            or not self._keys
+            or time.monotonic() - self._last_unknown_refetch >= UNKNOWN_KID_REFETCH_INTERVAL
+        ):
+            if not fetch_in_flight:
+                self._last_unknown_refetch = time.monotonic()
+            await self.refresh()
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+
+        raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️ JWKS refresh failed, keeping current keys: {e}")
+
+    async def start(self) -> None:
+        """Prefetch the keys and start the periodic refresh"""
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f"⚠️ JWKS prefetch failed, will retry on first request: {e}")
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        """Stop the refresh task and close the HTTP client"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
@@ -0,0 +1,90 @@
+"""
+Streaming NDJSON export of a user's research and LinkedIn post archive
+Rows are read through server-side cursors and written one batch at a time,
+so memory use stays constant regardless of archive size.
+"""
+
+from typing import AsyncIterator
+import json
+import zlib
+
+from app.config import get_settings
+from app.database.connection import AsyncSessionLocal
+from app.database.research_crud import stream_research_memories
+from app.database.linkedin_crud import stream_user_linkedin_posts
+from app.services import metrics
+
+settings = get_settings()
+
+
+def _to_line(record: dict) -> str:
+    return json.dumps(record, default=str, ensure_ascii=False) + "\n"
+
+
+async def export_ndjson(user_id: str) -> AsyncIterator[bytes]:
+    """
+    Yield the user's archive as NDJSON, one chunk per fetched batch
+
+    Each line is a JSON object with a "type" of "research" or "linkedin_post".
+    """
+    rows_exported = 0
+    async with AsyncSessionLocal() as session:
+        async for batch in stream_research_memories(session, user_id, settings.EXPORT_BATCH_SIZE):
+            yield "".join(
+                _to_line(
+                    {
+                        "type": "research",
+                        "id": row.id,
+                        "query": row.query,
+                        "response": row.response,
+                        "sources": row.sources or [],
+                        "session_id": (row.extra_data or {}).get("session_id"),
+                        "created_at": row.created_at,
+                    }
+                )
+                for row in batch
+            ).encode("utf-8")
+            rows_exported += len(batch)
+
+        async for batch in stream_user_linkedin_posts(session, user_id, settings.EXPORT_BATCH_SIZE):
+            yield "".join(
+                _to_line(
+                    {
+                        "type": "linkedin_post",
+                        "id": post.id,
+                        "session_id": post.session_id,
+                        "research_memory_id": post.research_memory_id,
+                        "original_content": original_content,
+                        "full_post": post.full_post,
+                        "hook": post.hook,
+                        "main_content": post.main_content,
+                        "cta": post.cta,
+                        "hashtags": post.hashtags or [],
+                        "emojis_used": post.emojis_used or [],
+                        "character_count": post.character_count,
+                        "post_style": post.post_style,
+                        "tone": post.tone,
+                        "target_length": post.target_length,
+                        "is_posted": post.is_posted,
+                        "posted_at": post.posted_at,
+                        "created_at": post.created_at,
+                    }
+                )
+                for post, original_content in batch
+            ).encode("utf-8")
+            rows_exported += len(batch)
+            # Posts in a finished batch are no longer needed by the session
+            session.expunge_all()
+
+    metrics.increment("export_rows", rows_exported)
+    metrics.increment("exports_total")
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compress a byte stream incrementally into a single gzip member"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,328 @@
+"""
+Per-user cache of memory context inputs
+Entries hold the summary and the selected (query, response) turns rather than
+the formatted prompt text, so a save can append its turn to the user's recent
+and session entries in place instead of flushing them.
+Every change bumps a per-user generation; a context read from the database is
+only stored if the generation is unchanged, so a read that races a save cannot
+cache stale context for the full TTL.
+The in-process backend is the default; the Redis backend shares entries
+across workers (requires the optional `redis` package).
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Optional, Protocol
+import hashlib
+import itertools
+import json
+
+from app.config import get_settings
+from app.services.cache import TTLCache
+from app.services.research_cache import normalize_query
+from app.services import metrics
+
+settings = get_settings()
+
+# Field prefix for recency-based context, which doesn't depend on the query
+RECENT_FIELD = "recent"
+# Field prefix for session-scoped context
+SESSION_FIELD = "session"
+# How long Redis keeps a user's generation counter after their last invalidation
+GENERATION_TTL_SECONDS = 86400
+# Entry kinds: recent or similar memories, or the turns of one session
+MEMORY_KIND = "memory"
+SESSION_KIND = "session"
+
+# Maps (field, value) to the new value, or None to drop the entry
+EntryUpdate = Callable[[str, str], Optional[str]]
+
+
+class MemoryContextBackend(Protocol):
+    """Storage for per-user memory context entries"""
+
+    async def get(self, user_id: str, field: str) -> Optional[str]: ...
+
+    async def generation(self, user_id: str) -> int: ...
+
+    async def set(self, user_id: str, field: str, value: str, generation: int) -> None: ...
+
+    async def update(self, user_id: str, update: EntryUpdate) -> None: ...
+
+    async def invalidate(self, user_id: str) -> None: ...
+
+
+class InProcessMemoryContextBackend:
+    """Size-bounded LRU of users, each holding a small dict of context entries"""
+
+    def __init__(self, max_users: int, ttl: float, max_entries_per_user: int = 32):
+        self._users = TTLCache(maxsize=max_users, ttl=ttl)
+        self.max_entries_per_user = max_entries_per_user
+        # Values come from one process-wide counter, so an evicted generation
+        # (read back as 0) can never match a stale reader's captured value
+        self._generations = TTLCache(maxsize=max_users, ttl=ttl)
+        self._counter = itertools.count(1)
+
+    async def get(self, user_id: str, field: str) -> Optional[str]:
+        entries = self._users.get(user_id)
+        return None if entries is None else entries.get(field)
+
+    async def generation(self, user_id: str) -> int:
+        return self._generations.get(user_id, 0)
+
+    async def set(self, user_id: str, field: str, value: str, generation: int) -> None:
+        if self._generations.get(user_id, 0) != generation:
+            return
+        entries = self._users.get(user_id)
+        if entries is None:
+            entries = {}
+            self._users.set(user_id, entries)
+        if len(entries) >= self.max_entries_per_user:
+            entries.pop(next(iter(entries)))
+        entries[field] = value
+
+    async def update(self, user_id: str, update: EntryUpdate) -> None:
+        entries = self._users.get(user_id)
+        if entries is not None:
+            for field, value in list(entries.items()):
+                new_value = update(field, value)
+                if new_value is None:
+                    del entries[field]
+                else:
+                    entries[field] = new_value
+        self._generations.set(user_id, next(self._counter))
+
+    async def invalidate(self, user_id: str) -> None:
+        self._users.pop(user_id)
+        self._generations.set(user_id, next(self._counter))
+
+
+class RedisMemoryContextBackend:
+    """Shared backend: one Redis hash per user, expired as a whole"""
+
+    def __init__(self, redis_url: str, ttl: int):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(redis_url, decode_responses=True)
+        self.ttl = ttl
+
+    def _key(self, user_id: str) -> str:
+        return f"memory_context:{user_id}"
+
+    def _generation_key(self, user_id: str) -> str:
+        return f"memory_context_generation:{user_id}"
+
+    async def get(self, user_id: str, field: str) -> Optional[str]:
+        return await self._redis.hget(self._key(user_id), field)
+
+    async def generation(self, user_id: str) -> int:
+        return int(await self._redis.get(self._generation_key(user_id)) or 0)
+
+    async def set(self, user_id: str, field: str, value: str, generation: int) -> None:
+        from redis.exceptions import WatchError
+
+        key = self._key(user_id)
+        generation_key = self._generation_key(user_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            # WATCH makes the write fail if an invalidation lands after the check
+            await pipe.watch(generation_key)
+            if int(await pipe.get(generation_key) or 0) != generation:
+                return
+            pipe.multi()
+            pipe.hset(key, field, value)
+            pipe.expire(key, self.ttl)
+            try:
+                await pipe.execute()
+            except WatchError:
+                pass
+
+    async def update(self, user_id: str, update: EntryUpdate) -> None:
+        from redis.exceptions import WatchError
+
+        key = self._key(user_id)
+        generation_key = self._generation_key(user_id)
+        for _ in range(3):
+            async with self._redis.pipeline(transaction=True) as pipe:
+                # Retried if another worker changes the user's entries meanwhile
+                await pipe.watch(key, generation_key)
+                entries = await pipe.hgetall(key)
+                updated = {}
+                for field, value in entries.items():
+                    new_value = update(field, value)
+                    if new_value is not None:
+                        updated[field] = new_value
+                pipe.multi()
+                pipe.delete(key)
+                if updated:
+                    pipe.hset(key, mapping=updated)
+                    pipe.expire(key, self.ttl)
+                pipe.incr(generation_key)
+                pipe.expire(generation_key, GENERATION_TTL_SECONDS)
+                try:
+                    await pipe.execute()
+                    return
+                except WatchError:
+                    continue
+        await self.invalidate(user_id)
+
+    async def invalidate(self, user_id: str) -> None:
+        generation_key = self._generation_key(user_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key(user_id))
+            pipe.incr(generation_key)
+            pipe.expire(generation_key, GENERATION_TTL_SECONDS)
+            await pipe.execute()
+
+
+@lru_cache()
+def get_memory_context_backend() -> MemoryContextBackend:
+    """Get the configured memory context cache backend"""
+    if settings.MEMORY_CONTEXT_CACHE_BACKEND == "redis":
+        return RedisMemoryContextBackend(
+            settings.REDIS_URL, settings.MEMORY_CONTEXT_CACHE_TTL_SECONDS
+        )
+    return InProcessMemoryContextBackend(
+        max_users=settings.MEMORY_CONTEXT_CACHE_MAX_USERS,
+        ttl=settings.MEMORY_CONTEXT_CACHE_TTL_SECONDS,
+    )
+
+
+def context_field(query: Optional[str], limit: int, session_id: Optional[str] = None) -> str:
+    """Cache field for a lookup: per session, per query for semantic retrieval, shared otherwise"""
+    if session_id:
+        return f"{SESSION_FIELD}:{session_id}:{limit}"
+    if not query or settings.MEMORY_RETRIEVAL_MODE != "semantic":
+        return f"{RECENT_FIELD}:{limit}"
+    query_hash = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+    return f"{query_hash}:{limit}"
+
+
+def is_semantic_field(field: str) -> bool:
+    """Whether an entry came from a similarity search (keyed by query hash)"""
+    return not field.startswith((f"{RECENT_FIELD}:", f"{SESSION_FIELD}:"))
+
+
+def context_entry(kind: str, summary: str, turns: list[list[Optional[str]]]) -> dict[str, Any]:
+    """Cacheable context inputs: the summary plus (query, response) turns, oldest first"""
+    return {"kind": kind, "summary": summary, "turns": turns}
+
+
+async def get_cached_context(user_id: str, field: str) -> Optional[dict[str, Any]]:
+    """Cached context entry, or None on a miss (cache errors count as misses)"""
+    if not settings.MEMORY_CONTEXT_CACHE_ENABLED:
+        return None
+    try:
+        value = await get_memory_context_backend().get(user_id, field)
+    except Exception as e:
+        print(f"Memory context cache read error: {str(e)}")
+        value = None
+
+    metrics.increment(
+        "memory_context_cache_hits" if value is not None else "memory_context_cache_misses"
+    )
+    return None if value is None else json.loads(value)
+
+
+async def get_context_generation(user_id: str) -> Optional[int]:
+    """
+    The user's cache generation, captured before reading context from the database
+
+    Returns:
+        Generation to pass to set_cached_context, or None if caching is off or
+        the backend is unavailable
+    """
+    if not settings.MEMORY_CONTEXT_CACHE_ENABLED:
+        return None
+    try:
+        return await get_memory_context_backend().generation(user_id)
+    except Exception as e:
+        print(f"Memory context cache read error: {str(e)}")
+        return None
+
+
+async def set_cached_context(
+    user_id: str, field: str, entry: dict[str, Any], generation: Optional[int]
+) -> None:
+    """Store a context entry for a user, unless it changed since `generation`"""
+    if not settings.MEMORY_CONTEXT_CACHE_ENABLED or generation is None:
+        return
+    try:
+        await get_memory_context_backend().set(user_id, field, json.dumps(entry), generation)
+    except Exception as e:
+        print(f"Memory context cache write error: {str(e)}")
+
+
+def _append_turns(saved: list[dict[str, Any]], snippet_chars: int) -> EntryUpdate:
+    """Entry update adding newly saved interactions to recent and session entries"""
+
+    def update(field: str, value: str) -> Optional[str]:
+        if is_semantic_field(field):
+            # Not searchable until embedded; drop_semantic_context runs then
+            return value
+        entry = json.loads(value)
+        prefix, _, limit = field.rpartition(":")
+        if prefix == RECENT_FIELD:
+            new_turns = [
+                [memory["query"], memory["response"][:snippet_chars]] for memory in saved
+            ]
+        else:
+            # Session fields hold recent memory when the session had no turns yet
+            if entry["kind"] != SESSION_KIND:
+                return None
+            session_id = prefix[len(SESSION_FIELD) + 1:]
+            new_turns = [
+                [memory["query"][:snippet_chars], memory["response"][:snippet_chars]]
+                for memory in saved
+                if memory["extra_data"].get("session_id") == session_id
+            ]
+        if not new_turns:
+            return value
+        entry["turns"] = (entry["turns"] + new_turns)[-int(limit):]
+        return json.dumps(entry)
+
+    return update
+
+
+async def append_cached_turns(
+    user_id: str, saved: list[dict[str, Any]], snippet_chars: int
+) -> None:
+    """
+    Add a user's newly saved interactions to their cached context in place
+
+    Recent and session entries keep their last `limit` turns, so warm requests
+    keep hitting after a save; entries that can't be updated are dropped.
+
+    Args:
+        user_id: Clerk user ID
+        saved: The user's saved memories (query, response, extra_data), oldest first
+        snippet_chars: Characters of each response (and session query) to keep
+    """
+    if not settings.MEMORY_CONTEXT_CACHE_ENABLED:
+        return
+    try:
+        await get_memory_context_backend().update(user_id, _append_turns(saved, snippet_chars))
+    except Exception as e:
+        print(f"Memory context cache update error: {str(e)}")
+        await invalidate_user_context(user_id)
+
+
+async def drop_semantic_context(user_id: str) -> None:
+    """Drop a user's similarity-search entries (a new memory became searchable)"""
+    if not settings.MEMORY_CONTEXT_CACHE_ENABLED:
+        return
+    try:
+        await get_memory_context_backend().update(
+            user_id, lambda field, value: None if is_semantic_field(field) else value
+        )
+    except Exception as e:
+        print(f"Memory context cache update error: {str(e)}")
+        await invalidate_user_context(user_id)
+
+
+async def invalidate_user_context(user_id: str) -> None:
+    """Drop every cached context entry for a user (called when their memory changes)"""
+    if not settings.MEMORY_CONTEXT_CACHE_ENABLED:
+        return
+    try:
+        await get_memory_context_backend().invalidate(user_id)
+    except Exception as e:
+        print(f"Memory context cache invalidation error: {str(e)}")
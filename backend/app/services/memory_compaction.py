@@ -0,0 +1,185 @@
+"""
+Background compaction of research memory into rolling per-user summaries
+Memories older than the newest MEMORY_SUMMARY_KEEP_RECENT are folded, in
+batches, into one summary per user, so the memory context stays bounded no
+matter how long the history grows. Every worker runs the loop, but a Postgres
+advisory lock lets only one of them compact per cycle.
+"""
+
+from typing import Optional
+import asyncio
+
+from google.genai import types
+from sqlalchemy import func, select
+
+from app.config import get_settings
+from app.database.connection import AsyncSessionLocal, engine
+from app.database.research_crud import (
+    get_memory_summary,
+    get_memories_to_compact,
+    get_users_pending_compaction,
+    save_memory_summary,
+)
+from app.agent.gemini import stream_generate, Priority
+from app.services.memory_cache import invalidate_user_context
+from app.services import metrics
+
+settings = get_settings()
+
+# Characters of each response given to the summarizer
+COMPACTION_SNIPPET_CHARS = 600
+
+# Advisory lock key shared by all workers (arbitrary, unique to this job)
+COMPACTION_LOCK_KEY = 0x6D656D73
+
+SUMMARY_PROMPT = """You maintain a compact long-term memory of a user's research history.
+
+Existing summary (may be empty):
+{summary}
+
+Older interactions to fold in (oldest first):
+{interactions}
+
+Write the updated summary in at most {max_words} words. Keep the user's recurring
+topics and interests, key findings they were already given, and any stated
+preferences. Drop small talk and repeated details. Plain text, no preamble."""
+
+_compaction_task: Optional[asyncio.Task] = None
+
+
+async def compact_user_memory(user_id: str) -> bool:
+    """
+    Fold the user's oldest unsummarized memories into their summary
+
+    Args:
+        user_id: Clerk user ID
+
+    Returns:
+        True if the summary was updated
+    """
+    async with AsyncSessionLocal() as session:
+        existing = await get_memory_summary(session, user_id)
+        rows = await get_memories_to_compact(
+            session,
+            user_id,
+            after_id=existing.summarized_through_id if existing else 0,
+            keep_recent=settings.MEMORY_SUMMARY_KEEP_RECENT,
+            limit=settings.MEMORY_SUMMARY_MAX_BATCH,
+            snippet_chars=COMPACTION_SNIPPET_CHARS,
+        )
+    if not rows:
+        return False
+
+    interactions = "\n\n".join(
+        f"Query: {row.query}\nResponse: {row.response}" for row in rows
+    )
+    prompt = SUMMARY_PROMPT.format(
+        summary=existing.summary if existing else "",
+        interactions=interactions,
+        max_words=settings.MEMORY_SUMMARY_MAX_WORDS,
+    )
+    contents = [types.Content(role="user", parts=[types.Part.from_text(text=prompt)])]
+    # Summarizing is a rewrite, not a reasoning task
+    config = types.GenerateContentConfig(
+        thinking_config=types.ThinkingConfig(thinking_budget=0),
+    )
+
+    summary = (
+        await stream_generate(
+            contents, config, priority=Priority.BATCH, metric_name="memory_compaction"
+        )
+    ).strip()
+    if not summary:
+        return False
+
+    async with AsyncSessionLocal() as session:
+        await save_memory_summary(
+            session,
+            user_id,
+            summary,
+            summarized_through_id=rows[-1].id,
+            added_count=len(rows),
+        )
+        await session.commit()
+
+    await invalidate_user_context(user_id)
+    metrics.increment("memory_compactions")
+    metrics.observe("memory_compaction_rows", len(rows))
+    print(f"🗜️ Folded {len(rows)} memories into summary for user {user_id}")
+    return True
+
+
+async def run_compaction_cycle() -> int:
+    """Compact every user with enough unsummarized history; returns users compacted"""
+    async with AsyncSessionLocal() as session:
+        user_ids = await get_users_pending_compaction(
+            session,
+            keep_recent=settings.MEMORY_SUMMARY_KEEP_RECENT,
+            min_batch=settings.MEMORY_SUMMARY_MIN_BATCH,
+        )
+
+    compacted = 0
+    for user_id in user_ids:
+        try:
+            if await compact_user_memory(user_id):
+                compacted += 1
+        except Exception as e:
+            print(f"Memory compaction error for user {user_id}: {str(e)}")
+    return compacted
+
+
+async def run_exclusive_compaction_cycle() -> Optional[int]:
+    """
+    Run a compaction cycle unless another worker is already running one
+
+    Returns:
+        Users compacted, or None if the cycle was skipped
+    """
+    # SQLite (tests) runs in a single process
+    if engine.dialect.name != "postgresql":
+        return await run_compaction_cycle()
+
+    # Session-level lock on a dedicated connection; released explicitly, or by
+    # Postgres if the connection dies mid-cycle
+    async with engine.connect() as conn:
+        acquired = await conn.scalar(select(func.pg_try_advisory_lock(COMPACTION_LOCK_KEY)))
+        await conn.commit()
+        if not acquired:
+            metrics.increment("memory_compaction_cycles_skipped")
+            return None
+        try:
+            return await run_compaction_cycle()
+        finally:
+            await conn.scalar(select(func.pg_advisory_unlock(COMPACTION_LOCK_KEY)))
+            await conn.commit()
+
+
+async def _compaction_loop():
+    while True:
+        await asyncio.sleep(settings.MEMORY_COMPACTION_INTERVAL_SECONDS)
+        try:
+            await run_exclusive_compaction_cycle()
+        except Exception as e:
+            print(f"Memory compaction cycle error: {str(e)}")
+
+
+def start_memory_compaction() -> None:
+    """Start the periodic compaction job (called from the app lifespan in every worker)"""
+    global _compaction_task
+    if not settings.MEMORY_SUMMARY_ENABLED:
+        return
+    if _compaction_task is None or _compaction_task.done():
+        _compaction_task = asyncio.create_task(_compaction_loop())
+
+
+async def stop_memory_compaction() -> None:
+    """Stop the periodic compaction job"""
+    global _compaction_task
+    if _compaction_task is None:
+        return
+    _compaction_task.cancel()
+    try:
+        await _compaction_task
+    except asyncio.CancelledError:
+        pass
+    _compaction_task = None
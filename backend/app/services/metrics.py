@@ -0,0 +1,40 @@
+"""
+Lightweight in-process metrics registry
+Exposed as JSON on GET /metrics
+"""
+
+from collections import defaultdict
+
+_counters: dict[str, float] = defaultdict(float)
+_gauges: dict[str, float] = {}
+_timings: dict[str, dict] = {}
+
+
+def increment(name: str, value: float = 1) -> None:
+    """Increase a monotonic counter"""
+    _counters[name] += value
+
+
+def set_gauge(name: str, value: float) -> None:
+    """Record the current value of a gauge"""
+    _gauges[name] = value
+
+
+def observe(name: str, value: float) -> None:
+    """Record a timing/size observation (count, sum, max)"""
+    timing = _timings.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+    timing["count"] += 1
+    timing["sum"] += value
+    timing["max"] = max(timing["max"], value)
+
+
+def snapshot() -> dict:
+    """Current value of every metric"""
+    return {
+        "counters": dict(_counters),
+        "gauges": dict(_gauges),
+        "timings": {
+            name: {**timing, "avg": timing["sum"] / timing["count"]}
+            for name, timing in _timings.items()
+        },
+    }
@@ -0,0 +1,176 @@
+"""
+Exact-match research result cache
+Two tiers: in-process LRU with TTL, backed by the research_cache Postgres table.
+Lookups never write; expired rows are deleted by a periodic cleanup job.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import asyncio
+import hashlib
+import re
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import get_settings
+from app.database.connection import AsyncSessionLocal
+from app.database.models import ResearchCache
+from app.services.cache import TTLCache
+from app.services import metrics
+
+settings = get_settings()
+
+_memory_tier = TTLCache(
+    maxsize=settings.RESEARCH_CACHE_MAX_ENTRIES,
+    ttl=settings.RESEARCH_CACHE_TTL_SECONDS,
+)
+_cleanup_task: Optional[asyncio.Task] = None
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    normalized = re.sub(r"\s+", " ", query).strip().lower()
+    return normalized.rstrip("?!. ")
+
+
+def make_cache_key(
+    query: str, memory_context: str, thinking_level: Optional[str] = None
+) -> str:
+    """
+    Build the cache key for a query
+
+    Args:
+        query: Raw user query
+        memory_context: Formatted memory context that will be sent with the query
+        thinking_level: Thinking level override, or None for the classified level
+
+    Returns:
+        Hex sha256 of the normalized query, a fingerprint of the memory context
+        and the thinking level
+    """
+    memory_fingerprint = hashlib.sha256(memory_context.encode("utf-8")).hexdigest()
+    raw_key = f"{normalize_query(query)}\x00{memory_fingerprint}\x00{thinking_level or 'auto'}"
+    return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+
+async def get_cached_response(cache_key: str) -> Optional[str]:
+    """
+    Look up a stored final_response, checking the in-process tier first
+
+    Returns:
+        Cached response text, or None on a miss
+    """
+    if not settings.RESEARCH_CACHE_ENABLED:
+        return None
+
+    response = _memory_tier.get(cache_key)
+    if response is not None:
+        metrics.increment("research_cache_memory_hits")
+        return response
+
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(ResearchCache.response, ResearchCache.expires_at).where(
+                    ResearchCache.cache_key == cache_key,
+                    ResearchCache.expires_at > datetime.now(timezone.utc),
+                )
+            )
+            row = result.first()
+    except Exception as e:
+        print(f"Research cache lookup error: {str(e)}")
+        row = None
+
+    if row is None:
+        metrics.increment("research_cache_misses")
+        return None
+
+    # Promote to the in-process tier for the remaining lifetime of the entry
+    remaining = (row.expires_at - datetime.now(timezone.utc)).total_seconds()
+    _memory_tier.set(cache_key, row.response, ttl=remaining)
+    metrics.increment("research_cache_db_hits")
+    return row.response
+
+
+async def store_cached_response(cache_key: str, query: str, response: str) -> None:
+    """Store a final_response in both cache tiers"""
+    if not settings.RESEARCH_CACHE_ENABLED or not response:
+        return
+
+    _memory_tier.set(cache_key, response)
+
+    expires_at = datetime.now(timezone.utc) + timedelta(
+        seconds=settings.RESEARCH_CACHE_TTL_SECONDS
+    )
+    try:
+        async with AsyncSessionLocal() as session:
+            stmt = insert(ResearchCache).values(
+                cache_key=cache_key,
+                query=query,
+                response=response,
+                hit_count=0,
+                expires_at=expires_at,
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ResearchCache.cache_key],
+                set_={"response": stmt.excluded.response, "expires_at": stmt.excluded.expires_at},
+            )
+            await session.execute(stmt)
+            await session.commit()
+    except Exception as e:
+        print(f"Research cache store error: {str(e)}")
+
+
+async def purge_expired_entries() -> int:
+    """Delete expired research_cache rows; returns the number removed"""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            delete(ResearchCache).where(ResearchCache.expires_at < datetime.now(timezone.utc))
+        )
+        await session.commit()
+    return result.rowcount
+
+
+async def _cleanup_loop():
+    while True:
+        await asyncio.sleep(settings.RESEARCH_CACHE_CLEANUP_INTERVAL_SECONDS)
+        try:
+            removed = await purge_expired_entries()
+            metrics.increment("research_cache_rows_purged", removed)
+        except Exception as e:
+            print(f"Research cache cleanup error: {str(e)}")
+
+
+def start_cache_cleanup() -> None:
+    """Start the periodic expired-row cleanup (called from the app lifespan)"""
+    global _cleanup_task
+    if not settings.RESEARCH_CACHE_ENABLED:
+        return
+    if _cleanup_task is None or _cleanup_task.done():
+        _cleanup_task = asyncio.create_task(_cleanup_loop())
+
+
+async def stop_cache_cleanup() -> None:
+    """Stop the periodic cleanup"""
+    global _cleanup_task
+    if _cleanup_task is None:
+        return
+    _cleanup_task.cancel()
+    try:
+        await _cleanup_task
+    except asyncio.CancelledError:
+        pass
+    _cleanup_task = None
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for both tiers"""
+    snapshot = metrics.snapshot()["counters"]
+    return {
+        "enabled": settings.RESEARCH_CACHE_ENABLED,
+        "memory_tier": _memory_tier.stats(),
+        "memory_hits": snapshot.get("research_cache_memory_hits", 0),
+        "db_hits": snapshot.get("research_cache_db_hits", 0),
+        "misses": snapshot.get("research_cache_misses", 0),
+    }
@@ -0,0 +1,162 @@
+"""
+Research execution service
+Runs the research graph behind the exact-match result cache, coalescing
+identical in-flight queries into a single graph execution
+"""
+
+from typing import Optional
+import asyncio
+
+from app.agent.graph import research_graph
+from app.agent.tools import get_memory_context
+from app.services.research_cache import (
+    make_cache_key,
+    get_cached_response,
+    store_cached_response,
+)
+from app.services import metrics
+
+RESEARCH_TOOLS = ["google_search", "arxiv_search"]
+
+
+class ResearchFlight:
+    """One in-flight graph execution shared by every identical concurrent request
+
+    The graph only calls `put` on its event queue, so this object stands in for
+    the queue and fans each event out to every attached requester. Events are
+    kept so requesters that join late still see the full stream.
+    """
+
+    def __init__(self):
+        self.events: list[dict] = []
+        self.subscribers: list[asyncio.Queue] = []
+        self.task: Optional[asyncio.Task] = None
+
+    async def put(self, event: dict):
+        self.events.append(event)
+        for subscriber in self.subscribers:
+            subscriber.put_nowait(event)
+
+    def subscribe(self, event_queue: asyncio.Queue):
+        """Replay events emitted so far, then receive new ones"""
+        for event in self.events:
+            event_queue.put_nowait(event)
+        self.subscribers.append(event_queue)
+
+    def unsubscribe(self, event_queue: asyncio.Queue):
+        if event_queue in self.subscribers:
+            self.subscribers.remove(event_queue)
+
+
+_in_flight: dict[str, ResearchFlight] = {}
+
+
+async def replay_cached_events(event_queue: asyncio.Queue, response_text: str):
+    """Emit the usual tool and delta events for a cache hit so the frontend flow is unchanged"""
+    for tool in RESEARCH_TOOLS:
+        await event_queue.put({"type": "tool_start", "tool": tool, "cached": True})
+    for tool in RESEARCH_TOOLS:
+        await event_queue.put({"type": "tool_complete", "tool": tool, "cached": True})
+    await event_queue.put({"type": "response_delta", "delta": response_text})
+
+
+async def execute_research(
+    flight: ResearchFlight,
+    cache_key: str,
+    user_id: str,
+    query: str,
+    memory_context: str,
+    thinking_level: Optional[str],
+) -> str:
+    """Run the research graph once, broadcasting its events to the flight's requesters"""
+    result = await research_graph.ainvoke(
+        {
+            "user_id": user_id,
+            "query": query,
+            "memory_context": memory_context,
+            "gemini_response": "",
+            "arxiv_response": "",
+            "final_response": "",
+            "timed_out_tools": [],
+            "thinking_level": thinking_level,
+            "arxiv_relevance": 0.0,
+            "event_queue": flight,
+            "grounded_stream": None,
+        }
+    )
+
+    response_text = result.get("final_response", "")
+
+    # Partial answers (a tool missed its deadline) are not worth serving again
+    if not result.get("timed_out_tools"):
+        await store_cached_response(cache_key, query, response_text)
+
+    return response_text
+
+
+def finish_flight(flight_key: str, task: asyncio.Task):
+    """Drop a finished execution from the in-flight map"""
+    _in_flight.pop(flight_key, None)
+    # Retrieve the exception so a flight whose requesters all left isn't logged as unhandled
+    if not task.cancelled():
+        task.exception()
+
+
+async def run_research(
+    user_id: str,
+    query: str,
+    event_queue: Optional[asyncio.Queue] = None,
+    thinking_level: Optional[str] = None,
+    session_id: Optional[str] = None,
+) -> str:
+    """
+    Answer a research query, serving identical queries from cache or from an
+    identical execution that is already in flight
+
+    Args:
+        user_id: User ID from Clerk
+        query: User's research query
+        event_queue: Optional queue for streaming events to the frontend
+        thinking_level: Optional override of the classified thinking level
+        session_id: Optional conversation session (scopes the memory context)
+
+    Returns:
+        Final synthesized response text
+    """
+    # Memory context is part of the cache key, so load it before the graph runs
+    memory_context = await get_memory_context(user_id, query, session_id=session_id)
+    # Answers produced at different thinking levels are cached and coalesced separately
+    cache_key = make_cache_key(query, memory_context, thinking_level)
+    flight_key = cache_key
+
+    flight = _in_flight.get(flight_key)
+    if flight is None:
+        cached_response = await get_cached_response(cache_key)
+        if cached_response is not None:
+            print(f"\n⚡ Research cache hit for query: {query}")
+            if event_queue:
+                await replay_cached_events(event_queue, cached_response)
+            return cached_response
+
+        # Re-check: another request may have started this query during the lookup
+        flight = _in_flight.get(flight_key)
+
+    if flight is None:
+        flight = ResearchFlight()
+        flight.task = asyncio.create_task(
+            execute_research(flight, cache_key, user_id, query, memory_context, thinking_level)
+        )
+        _in_flight[flight_key] = flight
+        flight.task.add_done_callback(lambda task: finish_flight(flight_key, task))
+    else:
+        print(f"\n🔗 Joining in-flight research for query: {query}")
+        metrics.increment("research_coalesced_total")
+
+    if event_queue:
+        flight.subscribe(event_queue)
+    try:
+        # Shielded so one requester disconnecting doesn't cancel the others
+        return await asyncio.shield(flight.task)
+    finally:
+        if event_queue:
+            flight.unsubscribe(event_queue)
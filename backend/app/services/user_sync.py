@@ -1,12 +1,48 @@
 """
 User synchronization service for Clerk authentication
+Users are written with one INSERT ... ON CONFLICT DO UPDATE statement, and a
+per-process cache of profile hashes skips the database when nothing changed.
 """
 
-from sqlalchemy import select
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, Dict, Any
+from typing import NamedTuple, Optional, Dict, Any
+import hashlib
+import json
 
+from app.config import get_settings
+from app.database.connection import AsyncSessionLocal
 from app.database.models import UserPreferences
+from app.services.cache import TTLCache
+from app.services import metrics
+
+settings = get_settings()
+
+# Profile fields mirrored from Clerk into user_preferences
+SYNCED_FIELDS = ("email", "first_name", "last_name", "username")
+
+# clerk_user_id -> hash of the profile last written for that user
+_synced_users = TTLCache(
+    maxsize=settings.USER_SYNC_CACHE_MAX_ENTRIES,
+    ttl=settings.USER_SYNC_CACHE_TTL_SECONDS,
+)
+
+
+class SyncedUser(NamedTuple):
+    """User profile as stored in user_preferences"""
+
+    clerk_user_id: str
+    email: str
+    first_name: Optional[str]
+    last_name: Optional[str]
+    username: Optional[str]
+
+
+def profile_hash(clerk_data: dict) -> str:
+    """Fingerprint of the synced profile fields"""
+    fields = {field: clerk_data.get(field) for field in SYNCED_FIELDS}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
 
 
 def extract_clerk_user_data(clerk_response: dict) -> dict:
@@ -60,16 +96,19 @@ def extract_clerk_user_data(clerk_response: dict) -> dict:
 
 async def get_or_create_user(
     session: AsyncSession, clerk_data: dict
-) -> UserPreferences:
+) -> SyncedUser:
     """
-    Get existing user or create new user from Clerk data
+    Create the user, or update their profile fields if any changed
+
+    A single INSERT ... ON CONFLICT (clerk_user_id) DO UPDATE ... WHERE the
+    fields differ, so an unchanged user costs one statement and no row write.
 
     Args:
         session: Async database session
         clerk_data: Extracted Clerk user data from extract_clerk_user_data()
 
     Returns:
-        UserPreferences object (existing or newly created)
+        SyncedUser with the stored profile
 
     Raises:
         ValueError: If clerk_user_id or email is missing
@@ -82,51 +121,57 @@ async def get_or_create_user(
     if not email:
         raise ValueError("email is required")
 
-    # Check if user exists
-    stmt = select(UserPreferences).where(
-        UserPreferences.clerk_user_id == clerk_user_id
+    profile = {field: clerk_data.get(field) for field in SYNCED_FIELDS}
+    stmt = insert(UserPreferences).values(
+        clerk_user_id=clerk_user_id,
+        preferences={},
+        **profile,
     )
-    result = await session.execute(stmt)
-    existing_user = result.scalar_one_or_none()
-
-    if existing_user:
-        # Update user data if changed
-        updated = False
-
-        if existing_user.email != email:
-            existing_user.email = email
-            updated = True
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserPreferences.clerk_user_id],
+        set_={
+            **{field: stmt.excluded[field] for field in SYNCED_FIELDS},
+            "updated_at": func.now(),
+        },
+        where=or_(
+            *(
+                getattr(UserPreferences, field).is_distinct_from(stmt.excluded[field])
+                for field in SYNCED_FIELDS
+            )
+        ),
+    ).returning(UserPreferences.clerk_user_id)
 
-        if existing_user.first_name != clerk_data.get("first_name"):
-            existing_user.first_name = clerk_data.get("first_name")
-            updated = True
-
-        if existing_user.last_name != clerk_data.get("last_name"):
-            existing_user.last_name = clerk_data.get("last_name")
-            updated = True
+    result = await session.execute(stmt)
+    # No row back means the user exists and nothing differed
+    written = result.scalar_one_or_none() is not None
+    await session.commit()
 
-        if existing_user.username != clerk_data.get("username"):
-            existing_user.username = clerk_data.get("username")
-            updated = True
+    metrics.increment("user_sync_writes" if written else "user_sync_unchanged")
+    _synced_users.set(clerk_user_id, profile_hash(clerk_data))
+    return SyncedUser(clerk_user_id=clerk_user_id, **profile)
 
-        if updated:
-            await session.commit()
-            await session.refresh(existing_user)
 
-        return existing_user
+async def ensure_user_synced(clerk_data: dict) -> str:
+    """
+    Make sure the user row matches the Clerk profile, skipping the database
+    when this process recently wrote the same profile
 
-    # Create new user
-    new_user = UserPreferences(
-        clerk_user_id=clerk_user_id,
-        email=email,
-        first_name=clerk_data.get("first_name"),
-        last_name=clerk_data.get("last_name"),
-        username=clerk_data.get("username"),
-        preferences={},
-    )
+    Args:
+        clerk_data: Extracted Clerk user data
 
-    session.add(new_user)
-    await session.commit()
-    await session.refresh(new_user)
+    Returns:
+        The Clerk user ID
 
-    return new_user
+    Raises:
+        ValueError: If clerk_user_id or email is missing
+    """
+    clerk_user_id = clerk_data.get("clerk_user_id")
+    if clerk_user_id and clerk_data.get("email"):
+        if _synced_users.get(clerk_user_id) == profile_hash(clerk_data):
+            metrics.increment("user_sync_cache_hits")
+            return clerk_user_id
+
+    metrics.increment("user_sync_cache_misses")
+    async with AsyncSessionLocal() as session:
+        user = await get_or_create_user(session, clerk_data)
+    return user.clerk_user_id
@@ -0,0 +1,112 @@
+"""
+Write-behind queue: callers enqueue rows and return immediately, a single
+flusher task persists them in batches (one flush call per batch).
+The queue is bounded, so producers wait when the database falls behind.
+"""
+
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+import asyncio
+import time
+
+from app.services import metrics
+
+T = TypeVar("T")
+
+
+class WriteBehindQueue(Generic[T]):
+    """Bounded queue drained by a background flusher in batches"""
+
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[list[T]], Awaitable[None]],
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        max_retries: int = 3,
+    ):
+        self.name = name
+        self._flush = flush
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._runner: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the flusher task (no-op if it is already running)"""
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+
+    async def put(self, item: T) -> None:
+        """
+        Enqueue an item for persistence
+
+        Waits while the queue is full (backpressure) instead of dropping writes.
+        """
+        self.start()
+        if self._queue.full():
+            metrics.increment(f"{self.name}_backpressure_waits")
+            started = time.monotonic()
+            await self._queue.put(item)
+            metrics.observe(f"{self.name}_backpressure_seconds", time.monotonic() - started)
+        else:
+            self._queue.put_nowait(item)
+        metrics.set_gauge(f"{self.name}_queue_depth", self._queue.qsize())
+
+    async def close(self, timeout: float = 30.0) -> None:
+        """Flush everything still queued, then stop the flusher"""
+        if self._runner is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ {self.name}: {self._queue.qsize()} queued writes not flushed before shutdown")
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+
+    async def _next_batch(self) -> list[T]:
+        """Wait for one item, then collect more until the batch is full or the interval ends"""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                metrics.set_gauge(f"{self.name}_queue_depth", self._queue.qsize())
+
+    async def _write(self, batch: list[T]) -> None:
+        """Flush a batch, retrying transient failures with exponential backoff"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                started = time.monotonic()
+                await self._flush(batch)
+                metrics.increment(f"{self.name}_flushed", len(batch))
+                metrics.observe(f"{self.name}_flush_seconds", time.monotonic() - started)
+                metrics.observe(f"{self.name}_batch_size", len(batch))
+                return
+            except Exception as e:
+                print(f"{self.name} flush error (attempt {attempt + 1}): {str(e)}")
+                if attempt < self.max_retries:
+                    await asyncio.sleep(min(2 ** attempt, 10))
+
+        metrics.increment(f"{self.name}_dropped", len(batch))
+        print(f"❌ {self.name}: dropped {len(batch)} writes after {self.max_retries + 1} attempts")
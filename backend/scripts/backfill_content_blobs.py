@@ -0,0 +1,60 @@
+"""
+Backfill: move research responses and LinkedIn source texts into content_blobs
+
+Rows saved before content_blobs existed keep their text inline
+(research_memory.response, linkedin_posts.original_content). This pages
+through them by ID, stores each text once as a compressed blob and swaps the
+inline copy for the hash (plus the preview and length for research memory).
+Safe to re-run; rows already moved are skipped.
+
+Usage (from backend/, with the production .env):
+    python scripts/backfill_content_blobs.py [batch_size]
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database.connection import AsyncSessionLocal, close_db
+from app.database.linkedin_crud import get_inline_posts, move_original_content_to_blobs
+from app.database.research_crud import get_inline_memories, move_responses_to_blobs
+
+
+async def backfill(label: str, fetch, move, batch_size: int) -> int:
+    """Move one table's inline texts batch by batch; each batch commits on its own"""
+    after_id = 0
+    moved = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            rows = await fetch(session, after_id, batch_size)
+            if not rows:
+                break
+            await move(session, rows)
+            await session.commit()
+
+        moved += len(rows)
+        after_id = rows[-1].id
+        print(f"📦 Moved {moved} {label} to content_blobs (through id {after_id})")
+    return moved
+
+
+async def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    try:
+        memories = await backfill(
+            "research responses", get_inline_memories, move_responses_to_blobs, batch_size
+        )
+        posts = await backfill(
+            "LinkedIn source texts", get_inline_posts, move_original_content_to_blobs, batch_size
+        )
+    finally:
+        await close_db()
+
+    print(f"✅ Backfill done: {memories} research responses, {posts} LinkedIn source texts")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
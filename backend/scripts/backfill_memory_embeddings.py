@@ -0,0 +1,72 @@
+"""
+Backfill: embed research memories saved before semantic retrieval existed
+
+Pages through research_memory rows that have no row in
+research_memory_embeddings and adds them to the vector index. Safe to re-run;
+rows embedded in the meantime (by the app or an earlier run) are skipped.
+Embeds the stored response preview (RESPONSE_PREVIEW_CHARS), which covers
+most of what new memories are embedded from.
+
+Usage (from backend/, with the production .env):
+    python scripts/backfill_memory_embeddings.py [batch_size]
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.agent.gemini import embed_text, Priority
+from app.agent.tools import memory_embedding_text
+from app.database.connection import AsyncSessionLocal, close_db
+from app.database.memory_index import get_memory_index
+from app.database.research_crud import get_unembedded_memories
+from app.services.memory_cache import invalidate_user_context
+
+
+async def embed_row(row) -> bool:
+    """Embed one memory and add it to the index; False on failure"""
+    try:
+        embedding = await embed_text(
+            memory_embedding_text(row.query, row.response or ""), priority=Priority.BATCH
+        )
+        await get_memory_index().add(row.user_id, row.id, embedding)
+        return True
+    except Exception as e:
+        print(f"⚠️ Memory {row.id}: {str(e)}")
+        return False
+
+
+async def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    after_id = 0
+    embedded = failed = 0
+    users = set()
+    try:
+        while True:
+            async with AsyncSessionLocal() as session:
+                rows = await get_unembedded_memories(session, after_id, batch_size)
+            if not rows:
+                break
+
+            # The Gemini scheduler bounds how many of these actually run at once
+            results = await asyncio.gather(*(embed_row(row) for row in rows))
+            embedded += sum(results)
+            failed += len(results) - sum(results)
+            users.update(row.user_id for row, ok in zip(rows, results) if ok)
+            after_id = rows[-1].id
+            print(f"🧮 Embedded {embedded} memories so far (through id {after_id})")
+
+        # Cached contexts were built without these memories
+        for user_id in users:
+            await invalidate_user_context(user_id)
+    finally:
+        await close_db()
+
+    print(f"✅ Backfill done: {embedded} embedded, {failed} failed, {len(users)} users")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""
+Microbenchmark: verify_clerk_token throughput with and without the verified-token cache
+
+Signs a token with a throwaway RSA key and loads that key straight into the
+JWKS store, so no network or Clerk account is needed.
+
+Usage (from backend/):
+    python scripts/bench_token_cache.py [iterations]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings require these; the benchmark never talks to Clerk, Gemini or the database
+os.environ.setdefault("CLERK_SECRET_KEY", "sk_test_benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/benchmark")
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.config import get_settings
+from app.middleware import auth
+from app.middleware.jwks import JWKSStore
+
+KID = "bench-key"
+
+
+async def run(iterations: int, cached: bool, token: str) -> float:
+    """Verify the same token `iterations` times; returns verifications per second"""
+    get_settings().AUTH_TOKEN_CACHE_ENABLED = cached
+    auth._verified_tokens.clear()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await auth.verify_clerk_token(token)
+    return iterations / (time.perf_counter() - started)
+
+
+async def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwk.update({"kid": KID, "use": "sig", "alg": "RS256"})
+    store = JWKSStore(url="", refresh_interval=3600, on_keys_changed=auth.sync_active_keys)
+    store.load({"keys": [jwk]})
+    auth.get_jwks_store = lambda: store
+
+    now = int(time.time())
+    token = jwt.encode(
+        {"sub": "user_benchmark", "iat": now, "exp": now + 3600},
+        private_key,
+        algorithm="RS256",
+        headers={"kid": KID},
+    )
+
+    uncached = await run(iterations, cached=False, token=token)
+    cached = await run(iterations, cached=True, token=token)
+
+    print(f"Iterations:   {iterations}")
+    print(f"Uncached:     {uncached:>12,.0f} verifications/s")
+    print(f"Cached:       {cached:>12,.0f} verifications/s")
+    print(f"Speedup:      {cached / uncached:>12.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
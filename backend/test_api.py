@@ -1,28 +1,471 @@
 """
-Simple test script for the research API
+Tests for the research API
+
+Unit tests run with pytest (`uv run pytest test_api.py`) and need no network,
+Clerk account or database. Running this file directly sends a live query to a
+local server instead (`python test_api.py`).
 """
-import requests
+import asyncio
 import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Settings require these; the unit tests never talk to Clerk, Gemini or the database
+os.environ.setdefault("CLERK_SECRET_KEY", "sk_test_unit")
+os.environ.setdefault("GEMINI_API_KEY", "unit")
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/unit")
+
+import httpx
+import jwt
+import pytest
+import requests
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.agent import tools
+from app.config import Settings, get_settings
+from app.database import research_crud
+from app.database.models import ContentBlob, ResearchMemory
+from app.middleware import auth, jwks
+from app.middleware.jwks import JWKSStore
+from app.services import memory_cache, metrics
+from app.services.cache import TTLCache
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def make_signing_key(kid: str):
+    """Throwaway RSA key and its public JWK"""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    public_jwk.update({"kid": kid, "use": "sig", "alg": "RS256"})
+    return private_key, public_jwk
+
+
+def make_token(private_key, kid: str, **claims) -> str:
+    now = int(time.time())
+    payload = {"sub": "user_test", "iat": now, "exp": now + 3600, **claims}
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+class JWKSServer:
+    """Local HTTP server serving a JWKS document, counting requests"""
+
+    def __init__(self, keys: list, delay: float = 0.0):
+        self.keys = keys
+        self.delay = delay
+        self.status = 200
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                time.sleep(server.delay)
+                body = json.dumps({"keys": server.keys}).encode("utf-8")
+                self.send_response(server.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}/.well-known/jwks.json"
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def auth_state(monkeypatch):
+    """Fresh verified-token cache and key set for each test"""
+    monkeypatch.setattr(auth, "_verified_tokens", TTLCache(maxsize=100))
+    monkeypatch.setattr(auth, "_active_kids", set())
+    monkeypatch.setattr(auth, "_profile_cache", TTLCache(maxsize=100, ttl=60))
+
+
+def use_store(monkeypatch, store: JWKSStore):
+    monkeypatch.setattr(auth, "get_jwks_store", lambda: store)
+
+
+# ---------------------------------------------------------------------------
+# JWKS store
+# ---------------------------------------------------------------------------
+
+def test_jwks_known_kid_is_served_from_memory():
+    _, key_a = make_signing_key("key-a")
+
+    async def run():
+        with JWKSServer([key_a]) as server:
+            store = JWKSStore(server.url, refresh_interval=3600)
+            try:
+                await store.refresh()
+                first = await store.get_signing_key("key-a")
+                second = await store.get_signing_key("key-a")
+            finally:
+                await store.close()
+            return server.requests, first, second
+
+    requests_made, first, second = asyncio.run(run())
+    assert first.key_id == "key-a"
+    assert second is first
+    assert requests_made == 1
+
+
+def test_jwks_unknown_kid_triggers_one_shared_refetch():
+    _, key_a = make_signing_key("key-a")
+    _, key_b = make_signing_key("key-b")
+
+    async def run():
+        with JWKSServer([key_a], delay=0.2) as server:
+            store = JWKSStore(server.url, refresh_interval=3600)
+            try:
+                await store.refresh()
+                # Key rotation: the new kid appears before the store refreshes
+                server.keys = [key_a, key_b]
+                keys = await asyncio.gather(
+                    *(store.get_signing_key("key-b") for _ in range(10))
+                )
+            finally:
+                await store.close()
+            return server.requests, keys
+
+    requests_made, keys = asyncio.run(run())
+    assert all(key.key_id == "key-b" for key in keys)
+    assert requests_made == 2
+
+
+def test_jwks_unknown_kid_refetch_is_throttled(monkeypatch):
+    _, key_a = make_signing_key("key-a")
+
+    async def run():
+        with JWKSServer([key_a]) as server:
+            store = JWKSStore(server.url, refresh_interval=3600)
+            try:
+                await store.refresh()
+                with pytest.raises(jwt.InvalidTokenError):
+                    await store.get_signing_key("bogus")
+                after_first = server.requests
+
+                # Within the interval another unknown kid is rejected without a fetch
+                with pytest.raises(jwt.InvalidTokenError):
+                    await store.get_signing_key("bogus")
+                after_second = server.requests
+
+                monkeypatch.setattr(jwks, "UNKNOWN_KID_REFETCH_INTERVAL", 0.0)
+                with pytest.raises(jwt.InvalidTokenError):
+                    await store.get_signing_key("bogus")
+                after_interval = server.requests
+            finally:
+                await store.close()
+            return after_first, after_second, after_interval
+
+    assert asyncio.run(run()) == (2, 2, 3)
+
+
+def test_jwks_empty_store_always_refetches_and_outage_is_503(monkeypatch, auth_state):
+    private_key, key_a = make_signing_key("key-a")
+    token = make_token(private_key, "key-a")
+
+    async def run():
+        with JWKSServer([key_a]) as server:
+            server.status = 503
+            store = JWKSStore(server.url, refresh_interval=3600)
+            use_store(monkeypatch, store)
+            try:
+                # The startup prefetch failed; no throttle while nothing is loaded
+                await store.start()
+                with pytest.raises(httpx.HTTPError):
+                    await store.get_signing_key("key-a")
+                with pytest.raises(HTTPException) as outage:
+                    await auth.verify_clerk_token(token)
+                requests_during_outage = server.requests
+
+                server.status = 200
+                user_id = await auth.verify_clerk_token(token)
+            finally:
+                await store.close()
+            return requests_during_outage, outage.value.status_code, user_id
+
+    requests_during_outage, status_code, user_id = asyncio.run(run())
+    assert requests_during_outage == 3
+    assert status_code == 503
+    assert user_id == "user_test"
+
+
+def test_removed_signing_key_clears_verified_token_cache(monkeypatch, auth_state):
+    private_key, key_a = make_signing_key("key-a")
+    _, key_b = make_signing_key("key-b")
+    token = make_token(private_key, "key-a")
+
+    async def run():
+        with JWKSServer([key_a]) as server:
+            store = JWKSStore(
+                server.url, refresh_interval=3600, on_keys_changed=auth.sync_active_keys
+            )
+            use_store(monkeypatch, store)
+            try:
+                await store.refresh()
+                assert await auth.verify_clerk_token(token) == "user_test"
+                assert auth.token_cache_key(token) in auth._verified_tokens
+
+                # key-a is revoked
+                server.keys = [key_b]
+                await store.refresh()
+                assert len(auth._verified_tokens) == 0
+                with pytest.raises(HTTPException) as rejected:
+                    await auth.verify_clerk_token(token)
+            finally:
+                await store.close()
+            return rejected.value.status_code
+
+    assert asyncio.run(run()) == 401
+
+
+# ---------------------------------------------------------------------------
+# Claims-only authentication
+# ---------------------------------------------------------------------------
+
+def test_auth_mode_rejects_unknown_values():
+    with pytest.raises(ValidationError):
+        Settings(CLERK_AUTH_MODE="Claims")
+
+
+def test_claims_mode_skips_clerk_api_and_falls_back_without_email(monkeypatch, auth_state):
+    private_key, key_a = make_signing_key("key-a")
+    store = JWKSStore("http://127.0.0.1:9/unused", refresh_interval=3600)
+    store.load({"keys": [key_a]})
+    use_store(monkeypatch, store)
+    monkeypatch.setattr(get_settings(), "CLERK_AUTH_MODE", "claims")
+
+    api_calls = []
+
+    async def fake_fetch(user_id):
+        api_calls.append(user_id)
+        return {
+            "id": user_id,
+            "primary_email_address_id": "idn_1",
+            "email_addresses": [{"id": "idn_1", "email_address": "api@example.com"}],
+            "first_name": "Api",
+        }
+
+    monkeypatch.setattr(auth, "fetch_clerk_user_details", fake_fetch)
+
+    def credentials(token):
+        return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    with_claims = make_token(
+        private_key, "key-a", email="ada@example.com", first_name="Ada", username="ada"
+    )
+    without_email = make_token(private_key, "key-a", first_name="Ada")
+
+    user = asyncio.run(auth.get_current_user(credentials(with_claims)))
+    assert user.id == "user_test"
+    assert user.email == "ada@example.com"
+    assert user.first_name == "Ada"
+    assert user.username == "ada"
+    assert api_calls == []
+
+    user = asyncio.run(auth.get_current_user(credentials(without_email)))
+    assert user.email == "api@example.com"
+    assert api_calls == ["user_test"]
+
+
+# ---------------------------------------------------------------------------
+# Memory context cache
+# ---------------------------------------------------------------------------
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def commit(self):
+        pass
+
+
+def test_memory_context_cache_keeps_hitting_across_saves(monkeypatch):
+    monkeypatch.setattr(get_settings(), "MEMORY_RETRIEVAL_MODE", "recent")
+    monkeypatch.setattr(get_settings(), "MEMORY_CONTEXT_CACHE_ENABLED", True)
+    backend = memory_cache.InProcessMemoryContextBackend(max_users=10, ttl=60)
+    monkeypatch.setattr(memory_cache, "get_memory_context_backend", lambda: backend)
+
+    saved = []
+    loads = []
+
+    async def fake_summary(user_id):
+        return "Earlier work on graphs"
+
+    async def fake_recent(user_id, limit):
+        loads.append("recent")
+        rows = [SimpleNamespace(query=m["query"], response=m["response"][:200]) for m in saved]
+        return rows[-limit:]
+
+    async def fake_session(user_id, session_id, limit):
+        loads.append("session")
+        messages = []
+        for m in saved:
+            messages.append(SimpleNamespace(role="user", content=m["query"][:200]))
+            messages.append(SimpleNamespace(role="assistant", content=m["response"][:200]))
+        return messages[-limit * 2:]
+
+    async def fake_insert(session, memories):
+        return list(range(len(saved), len(saved) + len(memories)))
+
+    async def fake_insert_turns(session, turns):
+        pass
+
+    monkeypatch.setattr(tools, "get_summary_text", fake_summary)
+    monkeypatch.setattr(tools, "get_recent_memories", fake_recent)
+    monkeypatch.setattr(tools, "get_recent_session_messages", fake_session)
+    monkeypatch.setattr(tools, "AsyncSessionLocal", FakeSession)
+    monkeypatch.setattr(tools, "insert_research_memories", fake_insert)
+    monkeypatch.setattr(tools, "insert_conversation_turns", fake_insert_turns)
+
+    async def run():
+        contexts = []
+        for i in range(10):
+            memory = {
+                "user_id": "user_test",
+                "query": f"question {i}",
+                "response": f"answer {i} " + "x" * 300,
+                "extra_data": {"session_id": "s1"},
+                "created_at": None,
+            }
+            await tools.persist_research_memories([memory])
+            saved.append(memory)
+            contexts.append(
+                (
+                    await tools.get_memory_context("user_test", "next", limit=3),
+                    await tools.get_memory_context("user_test", "next", limit=3, session_id="s1"),
+                )
+            )
+        return contexts
+
+    before = metrics.snapshot()["counters"]
+    contexts = asyncio.run(run())
+    after = metrics.snapshot()["counters"]
+
+    def delta(name):
+        return after.get(name, 0) - before.get(name, 0)
+
+    # One cold load per entry; every later request hits despite the saves
+    assert loads == ["recent", "session"]
+    assert delta("memory_context_cache_misses") == 2
+    assert delta("memory_context_cache_hits") == 18
+
+    # Cached context matches what a fresh database read returns
+    loads.clear()
+    backend_fresh = memory_cache.InProcessMemoryContextBackend(max_users=10, ttl=60)
+    monkeypatch.setattr(memory_cache, "get_memory_context_backend", lambda: backend_fresh)
+    fresh = asyncio.run(tools.get_memory_context("user_test", "next", limit=3))
+    fresh_session = asyncio.run(
+        tools.get_memory_context("user_test", "next", limit=3, session_id="s1")
+    )
+    assert contexts[-1] == (fresh, fresh_session)
+    assert "question 9" in fresh and "question 6" not in fresh
+
+
+# ---------------------------------------------------------------------------
+# Research history search (SQLite fallback)
+# ---------------------------------------------------------------------------
+
+def test_search_ranks_matches_and_escapes_highlights():
+    def memory(user_id, query, response):
+        return {
+            "user_id": user_id,
+            "query": query,
+            "response": response,
+            "sources": [],
+            "extra_data": {},
+            "created_at": None,
+        }
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                ResearchMemory.metadata.create_all,
+                tables=[ContentBlob.__table__, ResearchMemory.__table__],
+            )
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        try:
+            async with session_factory() as session:
+                ids = await research_crud.insert_research_memories(
+                    session,
+                    [
+                        memory("user_a", "Graph basics", "A transformer is not a graph."),
+                        memory("user_a", "<script>Transformer</script> layers", "Transformer blocks."),
+                        memory("user_a", "Unrelated", "x" * 2000 + " transformer"),
+                        memory("user_b", "Transformer", "Transformer transformer"),
+                    ],
+                )
+                await session.commit()
+                results = await research_crud.search_research_memories(
+                    session, "user_a", "transformer"
+                )
+                return ids, results
+        finally:
+            await engine.dispose()
+
+    ids, results = asyncio.run(run())
+
+    # Query matches outrank body-only ones; other users and matches past the preview are excluded
+    assert [result.id for result in results] == [ids[1], ids[0]]
+    assert results[0].rank > results[1].rank
+    assert results[0].query == (
+        "&lt;script&gt;<mark>Transformer</mark>&lt;/script&gt; layers"
+    )
+    assert results[0].snippet == "<mark>Transformer</mark> blocks."
+    assert "<mark>transformer</mark>" in results[1].snippet
+
+
+# ---------------------------------------------------------------------------
+# Live smoke test
+# ---------------------------------------------------------------------------
+
+def main():
+    # Test the public endpoint
+    url = "http://localhost:8000/api/research/public"
+    data = {
+        "query": "What is transformer architecture in deep learning?"
+    }
+
+    print("Testing Research Assistant API...")
+    print(f"Sending question: {data['query']}\n")
 
-# Test the public endpoint
-url = "http://localhost:8000/api/research/public"
-data = {
-    "query": "What is transformer architecture in deep learning?"
-}
+    try:
+        response = requests.post(url, json=data, timeout=60)
 
-print("Testing Research Assistant API...")
-print(f"Sending question: {data['query']}\n")
+        if response.status_code == 200:
+            result = response.json()
+            print("Success!")
+            print(f"\nResponse:\n{result['response']}\n")
+        else:
+            print(f"Error: {response.status_code}")
+            print(response.text)
 
-try:
-    response = requests.post(url, json=data, timeout=60)
+    except Exception as e:
+        print(f"Error: {str(e)}")
 
-    if response.status_code == 200:
-        result = response.json()
-        print("Success!")
-        print(f"\nResponse:\n{result['response']}\n")
-    else:
-        print(f"Error: {response.status_code}")
-        print(response.text)
 
-except Exception as e:
-    print(f"Error: {str(e)}")
+if __name__ == "__main__":
+    main()
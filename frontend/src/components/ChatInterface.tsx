@@ -10,7 +10,12 @@ import { motion } from 'framer-motion'
 import { Send, Loader2, AlertCircle, Sparkles } from 'lucide-react'
 import { useAuth } from '@clerk/nextjs'
 import { useChatStore } from '@/hooks/useChat'
-import { sendResearchQueryStream, fetchResearchHistory, StreamEvent } from '@/lib/api'
+import {
+  sendResearchQueryStream,
+  fetchResearchHistory,
+  fetchResearchHistoryItem,
+  StreamEvent,
+} from '@/lib/api'
 import ChatMessage from './ChatMessage'
 import ChatSidebar from './ChatSidebar'
 import ToolActivityIndicator, { ToolActivity, ToolName } from './ToolActivityIndicator'
@@ -31,6 +36,7 @@ export default function ChatInterface() {
   const [input, setInput] = useState('')
   const [toolActivities, setToolActivities] = useState<ToolActivity[]>([])
   const [placeholderIndex, setPlaceholderIndex] = useState(0)
+  const [streamingText, setStreamingText] = useState('')
   const messagesEndRef = useRef<HTMLDivElement>(null)
   const textareaRef = useRef<HTMLTextAreaElement>(null)
 
@@ -45,6 +51,7 @@ export default function ChatInterface() {
     currentSessionId,
     sessions,
     loadHistoryFromDatabase,
+    replaceMessageContent,
     createNewSession,
   } = useChatStore()
 
@@ -59,10 +66,12 @@ export default function ChatInterface() {
 
         // Only load if we don't have any sessions yet
         if (sessions.length === 0) {
-          const historyData = await fetchResearchHistory(token)
+          // Newest page only, with response previews; older pages load from the
+          // sidebar and full responses when a session is opened
+          const page = await fetchResearchHistory(token, 50, undefined, true)
 
-          if (historyData.history.length > 0) {
-            loadHistoryFromDatabase(historyData.history)
+          if (page.history.length > 0) {
+            loadHistoryFromDatabase(page.history, page.next_cursor)
           } else {
             // No history, create a new empty session
             createNewSession()
@@ -80,10 +89,38 @@ export default function ChatInterface() {
     loadHistory()
   }, []) // Only run once on mount
 
+  // Load full responses for the open session when history only has previews
+  const truncatedIds = (currentSession?.messages ?? [])
+    .filter((message) => message.truncated && message.memoryId !== undefined)
+    .map((message) => message.memoryId as number)
+
+  useEffect(() => {
+    if (!currentSessionId || truncatedIds.length === 0) return
+    const sessionId = currentSessionId
+
+    const loadFullResponses = async () => {
+      try {
+        const token = await getToken()
+        if (!token) return
+
+        const items = await Promise.all(truncatedIds.map((id) => fetchResearchHistoryItem(token, id)))
+        const contents: { [memoryId: number]: string } = {}
+        items.forEach((item) => {
+          contents[item.id] = item.response
+        })
+        replaceMessageContent(sessionId, contents)
+      } catch (err) {
+        console.error('Failed to load full responses:', err)
+      }
+    }
+
+    loadFullResponses()
+  }, [currentSessionId, truncatedIds.join(',')])
+
   // Auto-scroll to bottom when new messages arrive
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
-  }, [currentSession?.messages])
+  }, [currentSession?.messages, streamingText])
 
   // Auto-resize textarea
   useEffect(() => {
@@ -155,6 +192,16 @@ export default function ChatInterface() {
           if (event.tool && !toolsUsed.includes(event.tool)) {
             toolsUsed.push(event.tool)
           }
+        } else if (event.type === 'tool_timeout' && event.tool) {
+          // Tool missed its deadline; the answer is synthesized without it
+          setToolActivities((prev) =>
+            prev.map((activity) =>
+              activity.tool === event.tool ? { ...activity, status: 'timed_out' } : activity
+            )
+          )
+        } else if (event.type === 'response_delta' && event.delta) {
+          // Render synthesized tokens as they arrive
+          setStreamingText((prev) => prev + event.delta)
         } else if (event.type === 'final_response' && event.response) {
           finalResponse = event.response
         } else if (event.type === 'error' && event.error) {
@@ -180,6 +227,7 @@ export default function ChatInterface() {
     } finally {
       setLoading(false)
       setToolActivities([])
+      setStreamingText('')
     }
   }
 
@@ -302,11 +350,16 @@ export default function ChatInterface() {
                       <ToolActivityIndicator activities={toolActivities} />
                     )}
 
-                    <div className="flex gap-2">
-                      <span className="w-2 h-2 bg-purple-500 rounded-full animate-bounce" style={{ animationDelay: '0ms' }} />
-                      <span className="w-2 h-2 bg-purple-500 rounded-full animate-bounce" style={{ animationDelay: '150ms' }} />
-                      <span className="w-2 h-2 bg-purple-500 rounded-full animate-bounce" style={{ animationDelay: '300ms' }} />
-                    </div>
+                    {/* Partial answer streamed token by token */}
+                    {streamingText ? (
+                      <p className="text-sm text-gray-800 whitespace-pre-wrap">{streamingText}</p>
+                    ) : (
+                      <div className="flex gap-2">
+                        <span className="w-2 h-2 bg-purple-500 rounded-full animate-bounce" style={{ animationDelay: '0ms' }} />
+                        <span className="w-2 h-2 bg-purple-500 rounded-full animate-bounce" style={{ animationDelay: '150ms' }} />
+                        <span className="w-2 h-2 bg-purple-500 rounded-full animate-bounce" style={{ animationDelay: '300ms' }} />
+                      </div>
+                    )}
                   </div>
                 </motion.div>
               )}
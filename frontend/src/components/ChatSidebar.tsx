@@ -6,8 +6,10 @@
 'use client'
 
 import { motion, AnimatePresence } from 'framer-motion'
-import { MessageSquarePlus, X, Menu, PanelLeftClose, PanelLeftOpen } from 'lucide-react'
+import { MessageSquarePlus, X, Menu, PanelLeftClose, PanelLeftOpen, Loader2 } from 'lucide-react'
+import { useAuth } from '@clerk/nextjs'
 import { useChatStore } from '@/hooks/useChat'
+import { fetchResearchHistory } from '@/lib/api'
 import { useState } from 'react'
 
 export default function ChatSidebar() {
@@ -16,9 +18,40 @@ export default function ChatSidebar() {
     currentSessionId,
     createNewSession,
     switchSession,
+    historyCursor,
+    appendHistoryPage,
   } = useChatStore()
 
+  const { getToken } = useAuth()
   const [isOpen, setIsOpen] = useState(true)
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
+
+  const handleLoadMore = async () => {
+    if (!historyCursor || isLoadingMore) return
+    setIsLoadingMore(true)
+    try {
+      const token = await getToken()
+      if (!token) return
+
+      const page = await fetchResearchHistory(token, 50, historyCursor, true)
+      appendHistoryPage(page.history, page.next_cursor)
+    } catch (err) {
+      console.error('Failed to load older chats:', err)
+    } finally {
+      setIsLoadingMore(false)
+    }
+  }
+
+  const loadMoreButton = historyCursor && (
+    <button
+      onClick={handleLoadMore}
+      disabled={isLoadingMore}
+      className="w-full flex items-center justify-center gap-2 p-2 text-sm text-gray-500 hover:text-gray-700 hover:bg-gray-50 rounded-lg transition-colors disabled:opacity-50"
+    >
+      {isLoadingMore && <Loader2 className="w-4 h-4 animate-spin" />}
+      <span>{isLoadingMore ? 'Loading...' : 'Load older chats'}</span>
+    </button>
+  )
 
   const handleNewChat = () => {
     createNewSession()
@@ -130,6 +163,8 @@ export default function ChatSidebar() {
                     </motion.div>
                   ))
                 )}
+
+                {loadMoreButton}
               </div>
 
               {/* Footer Info */}
@@ -236,6 +271,8 @@ export default function ChatSidebar() {
                     </motion.div>
                   ))
                 )}
+
+                {loadMoreButton}
               </div>
 
               {/* Footer Info */}
@@ -46,7 +46,7 @@ export default function LinkedInHistorySidebar() {
       const token = await getToken()
       if (!token) return
 
-      const history = await getLinkedInPostHistory(token, 50, 0)
+      const history = await getLinkedInPostHistory(token, 50)
       setPosts(history.posts)
       setFilteredPosts(history.posts)
     } catch (error) {
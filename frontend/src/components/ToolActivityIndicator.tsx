@@ -6,10 +6,10 @@
 'use client'
 
 import { motion, AnimatePresence } from 'framer-motion'
-import { Globe, BookOpen, CheckCircle2, Loader2 } from 'lucide-react'
+import { Globe, BookOpen, CheckCircle2, Clock, Loader2 } from 'lucide-react'
 
 export type ToolName = 'google_search' | 'arxiv_search'
-export type ToolStatus = 'waiting' | 'active' | 'done'
+export type ToolStatus = 'waiting' | 'active' | 'done' | 'timed_out'
 
 export interface ToolActivity {
   tool: ToolName
@@ -55,6 +55,8 @@ export default function ToolActivityIndicator({ activities }: ToolActivityIndica
                 ? 'bg-gray-100 text-gray-500 border border-gray-200'
                 : activity.status === 'active'
                 ? 'bg-blue-50 text-blue-700 border border-blue-200 shadow-sm'
+                : activity.status === 'timed_out'
+                ? 'bg-amber-50 text-amber-700 border border-amber-200 shadow-sm'
                 : 'bg-green-50 text-green-700 border border-green-200 shadow-sm'
             }`}
           >
@@ -79,10 +81,14 @@ export default function ToolActivityIndicator({ activities }: ToolActivityIndica
               </motion.div>
             )}
 
+            {activity.status === 'timed_out' && <Clock className="w-4 h-4" />}
+
             {activity.status === 'waiting' && <Icon className="w-4 h-4 opacity-50" />}
 
             <span>{config.label}</span>
 
+            {activity.status === 'timed_out' && <span className="text-xs">(unavailable)</span>}
+
             {activity.status === 'active' && (
               <motion.div className="flex gap-1">
                 <motion.span
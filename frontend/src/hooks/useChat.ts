@@ -10,6 +10,8 @@ export interface Message {
   content: string
   timestamp: Date
   tools_used?: string[]  // Tools used to generate this response (e.g., ['google_search', 'arxiv_search'])
+  memoryId?: number  // Research memory ID for messages loaded from the database
+  truncated?: boolean  // Content is a preview; the full response is loaded when the session is opened
 }
 
 export interface ChatSession {
@@ -26,6 +28,7 @@ interface ChatStore {
   sessions: ChatSession[]
   isLoading: boolean
   error: string | null
+  historyCursor: string | null  // next_cursor for the next (older) history page; null when all are loaded
 
   // Actions
   createNewSession: () => void
@@ -35,7 +38,68 @@ interface ChatStore {
   switchSession: (sessionId: string) => void
   getCurrentSession: () => ChatSession | null
   deleteSession: (sessionId: string) => void
-  loadHistoryFromDatabase: (historyItems: any[]) => void
+  loadHistoryFromDatabase: (historyItems: any[], nextCursor?: string | null) => void
+  appendHistoryPage: (historyItems: any[], nextCursor?: string | null) => void
+  replaceMessageContent: (sessionId: string, contents: { [memoryId: number]: string }) => void
+}
+
+/**
+ * Group database history items into chat sessions, most recent first
+ */
+function buildSessions(historyItems: any[]): ChatSession[] {
+  // Group history items by session_id
+  const sessionGroups: { [key: string]: any[] } = {}
+
+  historyItems.forEach((item) => {
+    const sessionKey = item.session_id || `single-${item.id}`
+    if (!sessionGroups[sessionKey]) {
+      sessionGroups[sessionKey] = []
+    }
+    sessionGroups[sessionKey].push(item)
+  })
+
+  // Convert grouped items to chat sessions
+  const sessions: ChatSession[] = Object.entries(sessionGroups).map(([sessionKey, items]) => {
+    // Sort items by created_at to maintain chronological order
+    items.sort((a, b) => new Date(a.created_at).getTime() - new Date(b.created_at).getTime())
+
+    const firstItem = items[0]
+    const createdAt = new Date(firstItem.created_at)
+
+    // Build messages from all items in this session
+    const messages: Message[] = []
+    items.forEach((item) => {
+      const timestamp = new Date(item.created_at)
+      messages.push(
+        {
+          id: `msg-db-${item.id}-user`,
+          role: 'user' as const,
+          content: item.query,
+          timestamp: timestamp,
+        },
+        {
+          id: `msg-db-${item.id}-assistant`,
+          role: 'assistant' as const,
+          content: item.response,
+          timestamp: timestamp,
+          memoryId: item.id,
+          truncated: Boolean(item.is_truncated),
+        }
+      )
+    })
+
+    return {
+      id: sessionKey,
+      title: firstItem.query.slice(0, 50) + (firstItem.query.length > 50 ? '...' : ''),
+      messages,
+      createdAt,
+      updatedAt: new Date(items[items.length - 1].created_at),
+    }
+  })
+
+  // Sort sessions by most recent first
+  sessions.sort((a, b) => b.updatedAt.getTime() - a.updatedAt.getTime())
+  return sessions
 }
 
 export const useChatStore = create<ChatStore>((set, get) => ({
@@ -43,6 +107,7 @@ export const useChatStore = create<ChatStore>((set, get) => ({
   sessions: [],
   isLoading: false,
   error: null,
+  historyCursor: null,
 
   createNewSession: () => {
     const newSession: ChatSession = {
@@ -116,62 +181,56 @@ export const useChatStore = create<ChatStore>((set, get) => ({
     })
   },
 
-  loadHistoryFromDatabase: (historyItems) => {
-    // Group history items by session_id
-    const sessionGroups: { [key: string]: any[] } = {}
+  loadHistoryFromDatabase: (historyItems, nextCursor = null) => {
+    const sessions = buildSessions(historyItems)
 
-    historyItems.forEach((item) => {
-      const sessionKey = item.session_id || `single-${item.id}`
-      if (!sessionGroups[sessionKey]) {
-        sessionGroups[sessionKey] = []
-      }
-      sessionGroups[sessionKey].push(item)
+    set({
+      sessions,
+      currentSessionId: sessions[0]?.id || null,
+      historyCursor: nextCursor,
     })
+  },
 
-    // Convert grouped items to chat sessions
-    const sessions: ChatSession[] = Object.entries(sessionGroups).map(([sessionKey, items]) => {
-      // Sort items by created_at to maintain chronological order
-      items.sort((a, b) => new Date(a.created_at).getTime() - new Date(b.created_at).getTime())
-
-      const firstItem = items[0]
-      const createdAt = new Date(firstItem.created_at)
-
-      // Build messages from all items in this session
-      const messages: Message[] = []
-      items.forEach((item) => {
-        const timestamp = new Date(item.created_at)
-        messages.push(
-          {
-            id: `msg-db-${item.id}-user`,
-            role: 'user' as const,
-            content: item.query,
-            timestamp: timestamp,
-          },
-          {
-            id: `msg-db-${item.id}-assistant`,
-            role: 'assistant' as const,
-            content: item.response,
-            timestamp: timestamp,
-          }
-        )
+  appendHistoryPage: (historyItems, nextCursor = null) => {
+    // Pages arrive newest first, so an older page only adds earlier turns to
+    // sessions already shown and sessions older than all of them
+    const olderSessions = buildSessions(historyItems)
+
+    set((state) => {
+      const olderById = new Map(olderSessions.map((session) => [session.id, session]))
+      const sessions = state.sessions.map((session) => {
+        const older = olderById.get(session.id)
+        if (!older) return session
+        olderById.delete(session.id)
+        return {
+          ...session,
+          title: older.title,
+          messages: [...older.messages, ...session.messages],
+          createdAt: older.createdAt,
+        }
       })
 
       return {
-        id: sessionKey,
-        title: firstItem.query.slice(0, 50) + (firstItem.query.length > 50 ? '...' : ''),
-        messages,
-        createdAt,
-        updatedAt: new Date(items[items.length - 1].created_at),
+        sessions: [...sessions, ...olderById.values()],
+        historyCursor: nextCursor,
       }
     })
+  },
 
-    // Sort sessions by most recent first
-    sessions.sort((a, b) => b.updatedAt.getTime() - a.updatedAt.getTime())
-
-    set({
-      sessions,
-      currentSessionId: sessions[0]?.id || null,
-    })
+  replaceMessageContent: (sessionId, contents) => {
+    set((state) => ({
+      sessions: state.sessions.map((session) => {
+        if (session.id !== sessionId) return session
+        return {
+          ...session,
+          messages: session.messages.map((message) =>
+            message.memoryId !== undefined && message.memoryId in contents
+              ? { ...message, content: contents[message.memoryId], truncated: false }
+              : message
+          ),
+        }
+      }),
+    }))
   },
 }))
 
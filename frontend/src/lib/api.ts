@@ -24,15 +24,44 @@ export interface ResearchHistoryItem {
   sources: string[]
   session_id?: string
   created_at: string
+  is_truncated?: boolean // Summary pages: response is a preview, full text via fetchResearchHistoryItem
 }
 
 export interface ResearchHistoryResponse {
   history: ResearchHistoryItem[]
+  next_cursor?: string | null
+}
+
+export interface ResearchSearchItem {
+  id: number
+  query: string // HTML-escaped, with <mark> highlights
+  snippet: string // HTML-escaped, with <mark> highlights
+  rank: number
+  session_id?: string | null
+  created_at: string
+}
+
+export interface ResearchSearchResponse {
+  results: ResearchSearchItem[]
+}
+
+export interface SessionMessage {
+  id: number
+  role: 'user' | 'assistant'
+  content: string
+  research_memory_id?: number | null
+  created_at: string
+}
+
+export interface SessionResponse {
+  session_id: string
+  messages: SessionMessage[]
 }
 
 export interface StreamEvent {
-  type: 'tool_start' | 'tool_complete' | 'final_response' | 'done' | 'error'
+  type: 'tool_start' | 'tool_complete' | 'tool_timeout' | 'response_delta' | 'final_response' | 'done' | 'error'
   tool?: string
+  delta?: string
   response?: string
   session_id?: string
   error?: string
@@ -98,16 +127,20 @@ export async function sendResearchQueryStream(
     throw new Error('Response body is not readable')
   }
 
+  // Holds a partial line when an event is split across network chunks
+  let buffer = ''
+
   try {
     while (true) {
       const { done, value } = await reader.read()
       if (done) break
 
       // Decode the chunk
-      const chunk = decoder.decode(value, { stream: true })
+      buffer += decoder.decode(value, { stream: true })
 
-      // Parse SSE format (data: {json}\n\n)
-      const lines = chunk.split('\n')
+      // Parse SSE format (data: {json}\n\n), keeping the trailing partial line
+      const lines = buffer.split('\n')
+      buffer = lines.pop() ?? ''
       for (const line of lines) {
         if (line.startsWith('data: ')) {
           const data = line.slice(6) // Remove 'data: ' prefix
@@ -133,13 +166,92 @@ export async function sendResearchQueryStream(
 /**
  * Fetch research history from the backend
  * @param token - Clerk authentication token
- * @returns List of past research queries and responses
+ * @param limit - Maximum number of items to return
+ * @param cursor - next_cursor from the previous page (omit for the newest page)
+ * @param summary - Return response previews instead of full bodies
+ * @returns Page of past research queries and responses, newest first
  */
 export async function fetchResearchHistory(
-  token: string
+  token: string,
+  limit: number = 50,
+  cursor?: string,
+  summary: boolean = false
 ): Promise<ResearchHistoryResponse> {
   const response = await axios.get<ResearchHistoryResponse>(
     `${API_BASE_URL}/api/research/history`,
+    {
+      headers: {
+        Authorization: `Bearer ${token}`,
+      },
+      params: { limit, cursor, summary },
+      timeout: 90000,
+    }
+  )
+
+  return response.data
+}
+
+/**
+ * Fetch one research history item with its full response
+ * @param token - Clerk authentication token
+ * @param id - Research memory ID
+ * @returns The history item
+ */
+export async function fetchResearchHistoryItem(
+  token: string,
+  id: number
+): Promise<ResearchHistoryItem> {
+  const response = await axios.get<ResearchHistoryItem>(
+    `${API_BASE_URL}/api/research/history/${id}`,
+    {
+      headers: {
+        Authorization: `Bearer ${token}`,
+      },
+      timeout: 90000,
+    }
+  )
+
+  return response.data
+}
+
+/**
+ * Full-text search over research history
+ * @param token - Clerk authentication token
+ * @param q - Search text
+ * @param limit - Maximum number of results
+ * @returns Ranked results with highlighted query and snippet
+ */
+export async function searchResearchHistory(
+  token: string,
+  q: string,
+  limit: number = 20
+): Promise<ResearchSearchResponse> {
+  const response = await axios.get<ResearchSearchResponse>(
+    `${API_BASE_URL}/api/research/search`,
+    {
+      headers: {
+        Authorization: `Bearer ${token}`,
+      },
+      params: { q, limit },
+      timeout: 90000,
+    }
+  )
+
+  return response.data
+}
+
+/**
+ * Fetch the messages of one conversation session
+ * @param token - Clerk authentication token
+ * @param sessionId - Session ID
+ * @returns Session messages, oldest first
+ */
+export async function fetchResearchSession(
+  token: string,
+  sessionId: string
+): Promise<SessionResponse> {
+  const response = await axios.get<SessionResponse>(
+    `${API_BASE_URL}/api/research/sessions/${encodeURIComponent(sessionId)}`,
     {
       headers: {
         Authorization: `Bearer ${token}`,
@@ -221,6 +333,7 @@ export interface LinkedInPostSavedResponse {
 
 export interface LinkedInPostHistoryResponse {
   posts: LinkedInPostSavedResponse[]
+  next_cursor?: string | null
 }
 
 /**
@@ -252,13 +365,13 @@ export async function saveLinkedInPostToDatabase(
  * Get LinkedIn post history for the authenticated user
  * @param token - Clerk authentication token
  * @param limit - Maximum number of posts to return
- * @param offset - Offset for pagination
+ * @param cursor - next_cursor from the previous page (omit for the newest page)
  * @returns Post history
  */
 export async function getLinkedInPostHistory(
   token: string,
   limit: number = 50,
-  offset: number = 0
+  cursor?: string
 ): Promise<LinkedInPostHistoryResponse> {
   const response = await axios.get<LinkedInPostHistoryResponse>(
     `${API_BASE_URL}/api/linkedin/history`,
@@ -266,7 +379,7 @@ export async function getLinkedInPostHistory(
       headers: {
         Authorization: `Bearer ${token}`,
       },
-      params: { limit, offset },
+      params: { limit, cursor },
       timeout: 90000,
     }
   )